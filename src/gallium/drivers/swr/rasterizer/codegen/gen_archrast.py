@@ -81,9 +81,9 @@ def parse_enums(lines, idx, event_dict):
         preprocessor = re.search(r'#if|#endif', line)
 
         if not preprocessor:
-            enum = re.match(r'(\s*)(\w+)(\s*)', line)
-
-            if enum:
+            # only keep lines that start with an identifier
+            stripped = line.lstrip()
+            if stripped and (stripped[0].isalnum() or stripped[0] == '_'):
                 enum_names.append(line)
 
             end_of_enum = re.match(r'(\s*)};', line)
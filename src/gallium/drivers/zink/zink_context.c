@@ -334,7 +334,7 @@ zink_create_sampler_state(struct pipe_context *pctx,
 
    sci.borderColor = get_border_color(&state->border_color, is_integer);
    if (sci.borderColor > VK_BORDER_COLOR_INT_OPAQUE_WHITE && need_custom) {
-      if (screen->info.have_EXT_custom_border_color &&
+      if (zink_have_EXT_custom_border_color(&screen->info) &&
           screen->info.border_color_feats.customBorderColorWithoutFormat) {
          cbci.sType = VK_STRUCTURE_TYPE_SAMPLER_CUSTOM_BORDER_COLOR_CREATE_INFO_EXT;
          cbci.format = VK_FORMAT_UNDEFINED;
@@ -691,7 +691,7 @@ zink_set_vertex_buffers(struct pipe_context *pctx,
 {
    struct zink_context *ctx = zink_context(pctx);
 
-   if (!zink_screen(pctx->screen)->info.have_EXT_extended_dynamic_state &&
+   if (!zink_have_EXT_extended_dynamic_state(&zink_screen(pctx->screen)->info) &&
        (num_buffers || (!buffers && ctx->gfx_pipeline_state.vertex_buffers_enabled_mask)))
       ctx->gfx_pipeline_state.vertex_state_dirty = true;
    util_set_vertex_buffers_mask(ctx->vertex_buffers, &ctx->gfx_pipeline_state.vertex_buffers_enabled_mask,
@@ -711,7 +711,7 @@ zink_set_viewport_states(struct pipe_context *pctx,
       ctx->vp_state.viewport_states[start_slot + i] = state[i];
    ctx->vp_state.num_viewports = start_slot + num_viewports;
 
-   if (!zink_screen(pctx->screen)->info.have_EXT_extended_dynamic_state) {
+   if (!zink_have_EXT_extended_dynamic_state(&zink_screen(pctx->screen)->info)) {
       if (ctx->gfx_pipeline_state.num_viewports != ctx->vp_state.num_viewports)
          ctx->gfx_pipeline_state.dirty = true;
       ctx->gfx_pipeline_state.num_viewports = ctx->vp_state.num_viewports;
@@ -1256,7 +1256,7 @@ flush_batch(struct zink_context *ctx, bool sync)
       incr_curr_batch(ctx);
 
       zink_start_batch(ctx, batch);
-      if (zink_screen(ctx->base.screen)->info.have_EXT_transform_feedback && ctx->num_so_targets)
+      if (zink_have_EXT_transform_feedback(&zink_screen(ctx->base.screen)->info) && ctx->num_so_targets)
          ctx->dirty_so_targets = true;
    }
 }
@@ -2507,7 +2507,7 @@ zink_context_create(struct pipe_screen *pscreen, void *priv, unsigned flags)
    struct zink_context *ctx = rzalloc(NULL, struct zink_context);
    if (!ctx)
       goto fail;
-   ctx->have_timelines = screen->info.have_KHR_timeline_semaphore;
+   ctx->have_timelines = zink_have_KHR_timeline_semaphore(&screen->info);
 
    ctx->gfx_pipeline_state.dirty = true;
    ctx->compute_pipeline_state.dirty = true;
@@ -2574,7 +2574,7 @@ zink_context_create(struct pipe_screen *pscreen, void *priv, unsigned flags)
    util_dynarray_init(&ctx->free_batch_states, ctx);
    _mesa_hash_table_init(&ctx->batch_states, ctx, NULL, _mesa_key_pointer_equal);
 
-   ctx->gfx_pipeline_state.have_EXT_extended_dynamic_state = screen->info.have_EXT_extended_dynamic_state;
+   ctx->gfx_pipeline_state.have_EXT_extended_dynamic_state = zink_have_EXT_extended_dynamic_state(&screen->info);
 
    slab_create_child(&ctx->transfer_pool, &screen->transfer_pool);
    slab_create_child(&ctx->transfer_pool_unsync, &screen->transfer_pool);
@@ -2606,7 +2606,7 @@ zink_context_create(struct pipe_screen *pscreen, void *priv, unsigned flags)
    else
       ctx->batch.thread_queue = ctx->batch.queue;
 
-   ctx->have_timelines = screen->info.have_KHR_timeline_semaphore;
+   ctx->have_timelines = zink_have_KHR_timeline_semaphore(&screen->info);
    simple_mtx_init(&ctx->batch_mtx, mtx_plain);
    incr_curr_batch(ctx);
    zink_start_batch(ctx, &ctx->batch);
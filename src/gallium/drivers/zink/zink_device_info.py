@@ -23,10 +23,10 @@
 #    Hoe Hao Cheng <haochengho12907@gmail.com>
 # 
 
-from mako.template import Template
-from mako.lookup import TemplateLookup
 from os import path
+from string import Template
 from zink_extensions import Extension,ExtensionRegistry,Version
+from zink_extensions import lookup_switch_cases,bitset_words
 import sys
 
 # constructor: 
@@ -48,7 +48,8 @@ import sys
 #
 #  - conditions: criteria for enabling an extension. This is an array of strings,
 #                where each string is a condition, and all conditions have to be true
-#                for `zink_device_info.have_{name}` to be true.
+#                for `zink_have_{name}()` to return true. For guarded extensions,
+#                it is also always false when `ZINK_HAS_<ext>` is 0.
 #
 #                The code generator will replace "$feats" and "$props" with the
 #                respective variables, e.g. "$feats.nullDescriptor" becomes 
@@ -176,39 +177,12 @@ VERSIONS = [
     Version((1,2,0), (1,2)),
 ]
 
-# There exists some inconsistencies regarding the enum constants, fix them.
-# This is basically generated_code.replace(key, value).
-REPLACEMENTS = {
-    "ROBUSTNESS2": "ROBUSTNESS_2",
-    "PROPERTIES_PROPERTIES": "PROPERTIES",
-}
-
-
-# This template provides helper functions for the other templates.
-# Right now, the following functions are defined:
-# - guard(ext) : surrounds the body with an if-def guard according to
-#                `ext.extension_name()` if `ext.guard` is True.
-include_template = """
-<%def name="guard_(ext, body)">
-%if ext.guard:
-#ifdef ${ext.extension_name()}
-%endif
-   ${capture(body)|trim}
-%if ext.guard:
-#endif
-%endif
-</%def>
-
-## This ugliness is here to prevent mako from adding tons of excessive whitespace
-<%def name="guard(ext)">${capture(guard_, ext, body=caller.body).strip('\\r\\n')}</%def>
-"""
-
-header_code = """
-<%namespace name="helpers" file="helpers"/>
 
+header_code = Template("""
 #ifndef ZINK_DEVICE_INFO_H
 #define ZINK_DEVICE_INFO_H
 
+#include "util/bitset.h"
 #include "util/u_memory.h"
 
 #include <vulkan/vulkan.h>
@@ -219,144 +193,154 @@ header_code = """
 #include "MoltenVK/vk_mvk_moltenvk.h"
 #endif
 
+${has_macros}
+
 struct zink_screen;
 
+enum zink_ext {
+${enum_ids}
+   ZINK_EXT_COUNT
+};
+
+/* the names of the extensions, indexed by enum zink_ext */
+extern const char *const zink_ext_names[ZINK_EXT_COUNT];
+
 struct zink_device_info {
    uint32_t device_version;
 
-%for ext in extensions:
-<%helpers:guard ext="${ext}">
-   bool have_${ext.name_with_vendor()};
-</%helpers:guard>
-%endfor
-%for version in versions:
-   bool have_vulkan${version.struct()};
-%endfor
+   /* indexed by enum zink_ext, use the zink_have_*() helpers below */
+   BITSET_DECLARE(have_mask, ZINK_EXT_COUNT);
+${have_versions}
 
    VkPhysicalDeviceFeatures2 feats;
-%for version in versions:
-   VkPhysicalDeviceVulkan${version.struct()}Features feats${version.struct()};
-%endfor
+${feats_versions}
 
    VkPhysicalDeviceProperties props;
-%for version in versions:
-   VkPhysicalDeviceVulkan${version.struct()}Properties props${version.struct()};
-%endfor
+${props_versions}
 
    VkPhysicalDeviceMemoryProperties mem_props;
 
-%for ext in extensions:
-<%helpers:guard ext="${ext}">
-%if ext.has_features:
-   ${ext.physical_device_struct("Features")} ${ext.field("feats")};
-%endif
-%if ext.has_properties:
-   ${ext.physical_device_struct("Properties")} ${ext.field("props")};
-%endif
-</%helpers:guard>
-%endfor
-
-    const char *extensions[${len(extensions)}];
+${struct_decls}
+
+    enum zink_ext extensions[ZINK_EXT_COUNT];
     uint32_t num_extensions;
 };
 
+${have_accessors}
+
 bool
-zink_get_physical_device_info(struct zink_screen *screen);
+zink_get_physical_device_info(struct zink_screen *screen,
+                              VkExtensionProperties *scratch, uint32_t scratch_cap);
 
 #endif
-"""
-
+""")
 
-impl_code = """
-<%namespace name="helpers" file="helpers"/>
 
+impl_code = Template("""
 #include "zink_device_info.h"
+#include "zink_ext_common.h"
 #include "zink_screen.h"
 
+const char *const zink_ext_names[ZINK_EXT_COUNT] = {
+${name_entries}
+};
+
+/* returns the enum zink_ext of the extension, or -1 if zink doesn't know it */
+static int
+lookup_device_extension(const char *name)
+{
+   switch (zink_ext_name_hash(name)) {
+${lookup_cases}
+   default:
+      return -1;
+   }
+}
+
+/* a struct to add to the pNext chain of the features or properties query
+ * when the extension is supported, the offset is relative to struct
+ * zink_device_info
+ */
+struct device_chain_entry {
+   uint16_t ext;
+   uint16_t offset;
+   VkStructureType stype;
+};
+
+static const struct device_chain_entry device_feats_chain[] = {
+${feats_chain}
+};
+
+static const struct device_chain_entry device_props_chain[] = {
+${props_chain}
+};
+
+/* the extensions zink can't work without */
+static const BITSET_WORD required_extensions[BITSET_WORDS(ZINK_EXT_COUNT)] = {
+   ${required_words}
+};
+
+/* the extensions that are only enabled after checking their features or
+ * properties
+ */
+static const BITSET_WORD queried_extensions[BITSET_WORDS(ZINK_EXT_COUNT)] = {
+   ${queried_words}
+};
+
 bool
-zink_get_physical_device_info(struct zink_screen *screen) 
+zink_get_physical_device_info(struct zink_screen *screen,
+                              VkExtensionProperties *scratch, uint32_t scratch_cap)
 {
    struct zink_device_info *info = &screen->info;
-%for ext in extensions:
-<%helpers:guard ext="${ext}">
-   bool support_${ext.name_with_vendor()} = false;
-</%helpers:guard>
-%endfor
+   BITSET_DECLARE(support, ZINK_EXT_COUNT) = {0};
    uint32_t num_extensions = 0;
 
+   /* device_chain_entry::offset */
+   STATIC_ASSERT(sizeof(struct zink_device_info) <= UINT16_MAX);
+
    // get device memory properties
    vkGetPhysicalDeviceMemoryProperties(screen->pdev, &info->mem_props);
 
-   // enumerate device supported extensions
-   if (vkEnumerateDeviceExtensionProperties(screen->pdev, NULL, &num_extensions, NULL) == VK_SUCCESS) {
-      if (num_extensions > 0) {
-         VkExtensionProperties *extensions = MALLOC(sizeof(VkExtensionProperties) * num_extensions);
-         if (!extensions) goto fail;
-         vkEnumerateDeviceExtensionProperties(screen->pdev, NULL, &num_extensions, extensions);
-
-         for (uint32_t i = 0; i < num_extensions; ++i) {
-         %for ext in extensions:
-         <%helpers:guard ext="${ext}">
-            if (!strcmp(extensions[i].extensionName, "${ext.name}")) {
-         %if ext.core_since:
-         %for version in versions:
-         %if ext.core_since.struct_version == version.struct_version:
-               if (${version.version()} >= screen->vk_version) {
-         %if not (ext.has_features or ext.has_properties):
-                  info->have_${ext.name_with_vendor()} = true;
-         %else:
-                  support_${ext.name_with_vendor()} = true;
-         %endif
-               } else {
-         %if not (ext.has_features or ext.has_properties):
-                  info->have_${ext.name_with_vendor()} = true;
-         %else:
-                  support_${ext.name_with_vendor()} = true;
-         %endif
-               }
-         %endif
-         %endfor
-         %else:
-         %if not (ext.has_features or ext.has_properties):
-               info->have_${ext.name_with_vendor()} = true;
-         %else:
-               support_${ext.name_with_vendor()} = true;
-         %endif
-         %endif
-            }
-         </%helpers:guard>
-         %endfor
-         }
-
-         FREE(extensions);
+   // enumerate device supported extensions, trying the scratch buffer of the
+   // screen first so that only one query is needed in the common case
+   VkExtensionProperties *extensions = scratch;
+   num_extensions = scratch_cap;
+   VkResult result = scratch ?
+      vkEnumerateDeviceExtensionProperties(screen->pdev, NULL, &num_extensions, extensions) :
+      VK_INCOMPLETE;
+   if (result == VK_INCOMPLETE &&
+       vkEnumerateDeviceExtensionProperties(screen->pdev, NULL, &num_extensions, NULL) == VK_SUCCESS) {
+      extensions = MALLOC(sizeof(VkExtensionProperties) * num_extensions);
+      if (!extensions) goto fail;
+      result = vkEnumerateDeviceExtensionProperties(screen->pdev, NULL, &num_extensions, extensions);
+   }
+
+   if (result == VK_SUCCESS || result == VK_INCOMPLETE) {
+      for (uint32_t i = 0; i < num_extensions; ++i) {
+         int ext = lookup_device_extension(extensions[i].extensionName);
+         if (ext >= 0)
+            BITSET_SET(support, ext);
       }
    }
 
+   if (extensions != scratch)
+      FREE(extensions);
+
+   // extensions without features or properties are enabled right away
+   for (unsigned i = 0; i < BITSET_WORDS(ZINK_EXT_COUNT); i++)
+      info->have_mask[i] = support[i] & ~queried_extensions[i];
+
    // get device features
    if (screen->vk_GetPhysicalDeviceFeatures2) {
       // check for device extension features
       info->feats.sType = VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_FEATURES_2;
 
-%for version in versions:
-      if (${version.version()} <= screen->vk_version) {
-         info->feats${version.struct()}.sType = ${version.stype("FEATURES")};
-         info->feats${version.struct()}.pNext = info->feats.pNext;
-         info->feats.pNext = &info->feats${version.struct()};
-         info->have_vulkan${version.struct()} = true;
-      }
-%endfor
-
-%for ext in extensions:
-%if ext.has_features:
-<%helpers:guard ext="${ext}">
-      if (support_${ext.name_with_vendor()}) {
-         info->${ext.field("feats")}.sType = ${ext.stype("FEATURES")};
-         info->${ext.field("feats")}.pNext = info->feats.pNext;
-         info->feats.pNext = &info->${ext.field("feats")};
+${feats_version_chain}
+
+      for (unsigned i = 0; i < ARRAY_SIZE(device_feats_chain); i++) {
+         const struct device_chain_entry *entry = &device_feats_chain[i];
+         if (BITSET_TEST(support, entry->ext))
+            zink_chain_struct(&info->feats, (char *)info + entry->offset, entry->stype);
       }
-</%helpers:guard>
-%endif
-%endfor
 
       screen->vk_GetPhysicalDeviceFeatures2(screen->pdev, &info->feats);
    } else {
@@ -368,25 +352,13 @@ zink_get_physical_device_info(struct zink_screen *screen)
       VkPhysicalDeviceProperties2 props = {};
       props.sType = VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_PROPERTIES_2;
 
-%for version in versions:
-      if (${version.version()} <= screen->vk_version) {
-         info->props${version.struct()}.sType = ${version.stype("PROPERTIES")};
-         info->props${version.struct()}.pNext = props.pNext;
-         props.pNext = &info->props${version.struct()};
-      }
-%endfor
-
-%for ext in extensions:
-%if ext.has_properties:
-<%helpers:guard ext="${ext}">
-      if (support_${ext.name_with_vendor()}) {
-         info->${ext.field("props")}.sType = ${ext.stype("PROPERTIES")};
-         info->${ext.field("props")}.pNext = props.pNext;
-         props.pNext = &info->${ext.field("props")};
+${props_version_chain}
+
+      for (unsigned i = 0; i < ARRAY_SIZE(device_props_chain); i++) {
+         const struct device_chain_entry *entry = &device_props_chain[i];
+         if (BITSET_TEST(support, entry->ext))
+            zink_chain_struct(&props, (char *)info + entry->offset, entry->stype);
       }
-</%helpers:guard>
-%endif
-%endfor
 
       // note: setting up local VkPhysicalDeviceProperties2.
       screen->vk_GetPhysicalDeviceProperties2(screen->pdev, &props);
@@ -394,38 +366,29 @@ zink_get_physical_device_info(struct zink_screen *screen)
 
    // enable the extensions if they match the conditions given by ext.enable_conds 
    if (screen->vk_GetPhysicalDeviceProperties2) {
-        %for ext in extensions:
-<%helpers:guard ext="${ext}">
-<%
-    conditions = ""
-    if ext.enable_conds:
-        for cond in ext.enable_conds:
-            cond = cond.replace("$feats", "info->" + ext.field("feats"))
-            cond = cond.replace("$props", "info->" + ext.field("props"))
-            conditions += "&& (" + cond + ")\\n"
-    conditions = conditions.strip()
-%>\
-      info->have_${ext.name_with_vendor()} |= support_${ext.name_with_vendor()}
-         ${conditions};
-</%helpers:guard>
-        %endfor
+${enable_stmts}
    }
 
-   // generate extension list
-   num_extensions = 0;
+   // check for the required extensions, only walking the bits to name the
+   // missing ones if there are any
+   BITSET_DECLARE(missing, ZINK_EXT_COUNT);
+   BITSET_WORD any_missing = 0;
+   for (unsigned i = 0; i < BITSET_WORDS(ZINK_EXT_COUNT); i++) {
+      missing[i] = required_extensions[i] & ~info->have_mask[i];
+      any_missing |= missing[i];
+   }
 
-%for ext in extensions:
-<%helpers:guard ext="${ext}">
-   if (info->have_${ext.name_with_vendor()}) {
-       info->extensions[num_extensions++] = "${ext.name}";
-%if ext.is_required:
-   } else {
-       debug_printf("ZINK: ${ext.name} required!\\n");
-       goto fail;
-%endif
+   unsigned ext;
+   if (unlikely(any_missing)) {
+      BITSET_FOREACH_SET(ext, missing, ZINK_EXT_COUNT)
+         debug_printf("ZINK: %s required!\\n", zink_ext_names[ext]);
+      goto fail;
    }
-</%helpers:guard>
-%endfor
+
+   // generate extension list
+   num_extensions = 0;
+   BITSET_FOREACH_SET(ext, info->have_mask, ZINK_EXT_COUNT)
+      info->extensions[num_extensions++] = ext;
 
    info->num_extensions = num_extensions;
 
@@ -434,14 +397,47 @@ zink_get_physical_device_info(struct zink_screen *screen)
 fail:
    return false;
 }
-"""
-
-
-def replace_code(code: str, replacement: dict):
-    for (k, v) in replacement.items():
-        code = code.replace(k, v)
-    
-    return code
+""")
+
+
+def render_header(extensions, versions):
+    return header_code.substitute(
+        has_macros="\n".join(ext.emit_has_macro() for ext in extensions if ext.guard),
+        enum_ids="\n".join("   " + ext.enum_id() + "," for ext in extensions),
+        have_versions="\n".join("   bool have_vulkan" + version.struct() + ";" for version in versions),
+        feats_versions="\n".join("   VkPhysicalDeviceVulkan" + version.struct() + "Features feats" + version.struct() + ";"
+                                 for version in versions),
+        props_versions="\n".join("   VkPhysicalDeviceVulkan" + version.struct() + "Properties props" + version.struct() + ";"
+                                 for version in versions),
+        struct_decls="\n".join(ext.emit_struct_decls() for ext in extensions
+                               if ext.has_features or ext.has_properties),
+        have_accessors="\n".join(ext.emit_have_accessor() for ext in extensions))
+
+
+def render_impl(extensions, versions):
+    feats_version_chain = []
+    props_version_chain = []
+    for version in versions:
+        feats_version_chain.append("      if (" + version.version() + " <= screen->vk_version) {\n"
+                                   + "         zink_chain_struct(&info->feats, &info->feats" + version.struct() + ",\n"
+                                   + "                           " + version.stype("FEATURES") + ");\n"
+                                   + "         info->have_vulkan" + version.struct() + " = true;\n"
+                                   + "      }")
+        props_version_chain.append("      if (" + version.version() + " <= screen->vk_version)\n"
+                                   + "         zink_chain_struct(&props, &info->props" + version.struct() + ",\n"
+                                   + "                           " + version.stype("PROPERTIES") + ");")
+
+    return impl_code.substitute(
+        name_entries="\n".join(ext.emit_name_entry() for ext in extensions),
+        lookup_cases=lookup_switch_cases(extensions, lambda i, ext: ext.enum_id()),
+        feats_chain="\n".join(ext.emit_chain_entry("feats") for ext in extensions if ext.has_features),
+        props_chain="\n".join(ext.emit_chain_entry("props") for ext in extensions if ext.has_properties),
+        required_words=", ".join(bitset_words(extensions, lambda ext: ext.is_required)),
+        queried_words=", ".join(bitset_words(extensions, lambda ext: ext.has_features or ext.has_properties)),
+        feats_version_chain="\n".join(feats_version_chain),
+        props_version_chain="\n".join(props_version_chain),
+        enable_stmts="\n".join(ext.emit_enable_stmt() for ext in extensions
+                               if ext.has_features or ext.has_properties))
 
 
 if __name__ == "__main__":
@@ -449,24 +445,26 @@ if __name__ == "__main__":
         header_path = sys.argv[1]
         impl_path = sys.argv[2]
         vkxml_path = sys.argv[3]
+        # optional, vk.xml as parsed by zink_extensions.py
+        registry_path = sys.argv[4] if len(sys.argv) > 4 else None
 
         header_path = path.abspath(header_path)
         impl_path = path.abspath(impl_path)
         vkxml_path = path.abspath(vkxml_path)
     except:
-        print("usage: %s <path to .h> <path to .c> <path to vk.xml>" % sys.argv[0])
+        print("usage: %s <path to .h> <path to .c> <path to vk.xml> [<path to .json>]" % sys.argv[0])
         exit(1)
 
-    registry = ExtensionRegistry(vkxml_path)
+    registry = ExtensionRegistry(vkxml_path, registry_path)
 
     extensions = EXTENSIONS
     versions = VERSIONS
-    replacement = REPLACEMENTS
 
     # Perform extension validation and set core_since for the extension if available
     error_count = 0
     for ext in extensions:
-        if not registry.in_registry(ext.name):
+        entry = registry.get_registry_entry(ext.name)
+        if entry is None:
             # disable validation for nonstandard extensions
             if ext.is_nonstandard:
                 continue
@@ -475,8 +473,6 @@ if __name__ == "__main__":
             print("The extension {} is not registered in vk.xml - a typo?".format(ext.name))
             continue
 
-        entry = registry.get_registry_entry(ext.name)
-
         if entry.ext_type != "device":
             error_count += 1
             print("The extension {} is {} extension - expected a device extension.".format(ext.name, entry.ext_type))
@@ -500,15 +496,10 @@ if __name__ == "__main__":
         print("zink_device_info.py: Found {} error(s) in total. Quitting.".format(error_count))
         exit(1)
 
-    lookup = TemplateLookup()
-    lookup.put_string("helpers", include_template)
-
     with open(header_path, "w") as header_file:
-        header = Template(header_code, lookup=lookup).render(extensions=extensions, versions=versions).strip()
-        header = replace_code(header, replacement)
+        header = render_header(extensions, versions).strip()
         print(header, file=header_file)
 
     with open(impl_path, "w") as impl_file:
-        impl = Template(impl_code, lookup=lookup).render(extensions=extensions, versions=versions).strip()
-        impl = replace_code(impl, replacement)
+        impl = render_impl(extensions, versions).strip()
         print(impl, file=impl_file)
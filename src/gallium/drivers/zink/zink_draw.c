@@ -166,7 +166,7 @@ zink_bind_vertex_buffers(struct zink_batch *batch, struct zink_context *ctx)
       }
    }
 
-   if (screen->info.have_EXT_extended_dynamic_state)
+   if (zink_have_EXT_extended_dynamic_state(&screen->info))
       screen->vk_CmdBindVertexBuffers2EXT(batch->state->cmdbuf, 0,
                                           elems->hw_state.num_bindings,
                                           buffers, buffer_offsets, NULL, buffer_strides);
@@ -439,7 +439,7 @@ zink_draw_vbo(struct pipe_context *pctx,
    if (dinfo->index_size > 0) {
        uint32_t restart_index = util_prim_restart_index_from_size(dinfo->index_size);
        if ((dinfo->primitive_restart && (dinfo->restart_index != restart_index)) ||
-           (!screen->info.have_EXT_index_type_uint8 && dinfo->index_size == 1)) {
+           (!zink_have_EXT_index_type_uint8(&screen->info) && dinfo->index_size == 1)) {
           util_translate_prim_restart_ib(pctx, dinfo, dindirect, &draws[0], &index_buffer);
           need_index_buffer_unref = true;
        } else {
@@ -499,7 +499,7 @@ zink_draw_vbo(struct pipe_context *pctx,
       };
       viewports[i] = viewport;
    }
-   if (screen->info.have_EXT_extended_dynamic_state)
+   if (zink_have_EXT_extended_dynamic_state(&screen->info))
       screen->vk_CmdSetViewportWithCountEXT(batch->state->cmdbuf, ctx->vp_state.num_viewports, viewports);
    else
       vkCmdSetViewport(batch->state->cmdbuf, 0, ctx->vp_state.num_viewports, viewports);
@@ -519,7 +519,7 @@ zink_draw_vbo(struct pipe_context *pctx,
          scissors[i].extent.height = ctx->fb_state.height;
       }
    }
-   if (screen->info.have_EXT_extended_dynamic_state)
+   if (zink_have_EXT_extended_dynamic_state(&screen->info))
       screen->vk_CmdSetScissorWithCountEXT(batch->state->cmdbuf, ctx->vp_state.num_viewports, scissors);
    else
       vkCmdSetScissor(batch->state->cmdbuf, 0, ctx->vp_state.num_viewports, scissors);
@@ -543,7 +543,7 @@ zink_draw_vbo(struct pipe_context *pctx,
                                   ctx->stencil_ref.ref_value[0]);
    }
 
-   if (screen->info.have_EXT_extended_dynamic_state) {
+   if (zink_have_EXT_extended_dynamic_state(&screen->info)) {
       screen->vk_CmdSetDepthBoundsTestEnableEXT(batch->state->cmdbuf, dsa_state->hw_state.depth_bounds_test);
       if (dsa_state->hw_state.depth_bounds_test)
          vkCmdSetDepthBounds(batch->state->cmdbuf,
@@ -635,7 +635,7 @@ zink_draw_vbo(struct pipe_context *pctx,
          index_size = MAX2(index_size, 2);
       switch (index_size) {
       case 1:
-         assert(screen->info.have_EXT_index_type_uint8);
+         assert(zink_have_EXT_index_type_uint8(&screen->info));
          index_type = VK_INDEX_TYPE_UINT8_EXT;
          break;
       case 2:
@@ -0,0 +1,76 @@
+/*
+ * Permission is hereby granted, free of charge, to any person obtaining a
+ * copy of this software and associated documentation files (the "Software"),
+ * to deal in the Software without restriction, including without limitation
+ * on the rights to use, copy, modify, merge, publish, distribute, sub
+ * license, and/or sell copies of the Software, and to permit persons to whom
+ * the Software is furnished to do so, subject to the following conditions:
+ *
+ * The above copyright notice and this permission notice (including the next
+ * paragraph) shall be included in all copies or substantial portions of the
+ * Software.
+ *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ * FITNESS FOR A PARTICULAR PURPOSE AND NON-INFRINGEMENT. IN NO EVENT SHALL
+ * THE AUTHOR(S) AND/OR THEIR SUPPLIERS BE LIABLE FOR ANY CLAIM,
+ * DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR
+ * OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE
+ * USE OR OTHER DEALINGS IN THE SOFTWARE.
+ */
+
+/* helpers shared by the code generated by zink_device_info.py and
+ * zink_instance.py
+ */
+
+#ifndef ZINK_EXT_COMMON_H
+#define ZINK_EXT_COMMON_H
+
+#include <stdbool.h>
+#include <stdint.h>
+#include <string.h>
+
+#include <vulkan/vulkan.h>
+
+/* must match NAME_HASH_PRIME_FACTOR in zink_extensions.py */
+#define ZINK_NAME_HASH_PRIME_FACTOR 5024183
+
+/* compares a reported name with a known one of at least 8 characters.
+ * The names reported by the driver are stored in arrays of
+ * VK_MAX_EXTENSION_NAME_SIZE characters, so the first 8 bytes can be compared
+ * at once, which rejects mismatches without a byte-wise loop.
+ */
+static inline bool
+zink_ext_name_eq(const char *reported, const char *known)
+{
+   return !memcmp(reported, known, 8) && !strcmp(reported + 8, known + 8);
+}
+
+/* the generated lookup functions switch on this hash of the name, with one
+ * case per known name
+ */
+static inline uint32_t
+zink_ext_name_hash(const char *name)
+{
+   uint32_t hash = 0;
+   for (const char *p = name; *p; p++)
+      hash = hash * ZINK_NAME_HASH_PRIME_FACTOR + *p;
+
+   return hash;
+}
+
+/* sets the sType of s and inserts it in the pNext chain of base, right
+ * after base
+ */
+static inline void
+zink_chain_struct(void *base, void *s, VkStructureType stype)
+{
+   VkBaseOutStructure *base_out = base;
+   VkBaseOutStructure *s_out = s;
+
+   s_out->sType = stype;
+   s_out->pNext = base_out->pNext;
+   base_out->pNext = s_out;
+}
+
+#endif
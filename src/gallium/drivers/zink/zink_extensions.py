@@ -20,7 +20,9 @@
 # IN THE SOFTWARE.
 # 
 
+import json
 import re
+import sys
 from xml.etree import ElementTree
 from typing import List,Tuple
 
@@ -36,43 +38,66 @@ class Version:
         else:
             self.struct_version = struct
 
+        self._version_str = ("VK_MAKE_VERSION("
+                             + str(self.device_version[0])
+                             + ","
+                             + str(self.device_version[1])
+                             + ","
+                             + str(self.device_version[2])
+                             + ")")
+        self._struct_str = str(self.struct_version[0]) + str(self.struct_version[1])
+        self._stype_prefix = ("VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_VULKAN_"
+                              + str(self.struct_version[0]) + "_" + str(self.struct_version[1])
+                              + '_')
+
     # e.g. "VK_MAKE_VERSION(1,2,0)"
     def version(self):
-        return ("VK_MAKE_VERSION("
-               + str(self.device_version[0])
-               + ","
-               + str(self.device_version[1])
-               + ","
-               + str(self.device_version[2])
-               + ")")
+        return self._version_str
 
     # e.g. "10"
     def struct(self):
-        return (str(self.struct_version[0])+str(self.struct_version[1]))
+        return self._struct_str
 
-    # the sType of the extension's struct
-    # e.g. VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_TRANSFORM_FEEDBACK_FEATURES_EXT
-    # for VK_EXT_transform_feedback and struct="FEATURES"
+    # the sType of the version's struct
+    # e.g. VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_VULKAN_1_2_FEATURES
+    # for Vulkan 1.2 and struct="FEATURES"
     def stype(self, struct: str):
-        return ("VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_VULKAN_"
-                + str(self.struct_version[0]) + "_" + str(self.struct_version[1])
-                + '_' + struct)
+        return self._stype_prefix + struct
+
+# matches the "$feats" and "$props" placeholders of the enable conditions
+COND_STRUCT_PATTERN = re.compile(r"\$(feats|props)")
 
 class Extension:
-    name           : str       = None
-    alias          : str       = None
-    is_required    : bool      = False
-    is_nonstandard : bool      = False
-    enable_conds   : List[str] = None
+    # the templates access these attributes many times per extension, so keep
+    # them in slots instead of a per-instance __dict__
+    __slots__ = ('name', 'alias', 'is_required', 'is_nonstandard',
+                 'enable_conds', 'has_properties', 'has_features', 'guard',
+                 'core_since', 'instance_funcs',
+                 '_pure', '_camel', '_vendor', '_upper', '_upper_pure')
+
+    name           : str
+    alias          : str
+    is_required    : bool
+    is_nonstandard : bool
+    enable_conds   : List[str]
 
     # these are specific to zink_device_info.py:
-    has_properties : bool      = False
-    has_features   : bool      = False
-    guard          : bool      = False
+    has_properties : bool
+    has_features   : bool
+    guard          : bool
 
     # these are specific to zink_instance.py:
-    core_since     : Version   = None
-    instance_funcs : List[str] = None
+    core_since     : Version
+    instance_funcs : List[str]
+
+    # the upper-cased names used by the Vulkan headers don't always follow
+    # from the extension name, e.g. VK_EXT_ROBUSTNESS_2_EXTENSION_NAME for
+    # VK_EXT_robustness2 but VK_KHR_MAINTENANCE1_EXTENSION_NAME for
+    # VK_KHR_maintenance1, so the exceptions are listed here
+    UPPER_NAME_OVERRIDES = {
+        "VK_EXT_robustness2": "VK_EXT_ROBUSTNESS_2",
+        "VK_KHR_get_physical_device_properties2": "VK_KHR_GET_PHYSICAL_DEVICE_PROPERTIES_2",
+    }
 
     def __init__(self, name, alias="", required=False, nonstandard=False,
                  properties=False, features=False, conditions=None, guard=False,
@@ -91,9 +116,18 @@ class Extension:
         if alias == "" and (properties == True or features == True):
             raise RuntimeError("alias must be available when properties and/or features are used")
 
+        # the accessors below are called over and over by the templates, so
+        # derive the different spellings of the name only once
+        parts = name.split('_')
+        self._pure = '_'.join(parts[2:])
+        self._camel = "".join([x.title() for x in parts[2:]])
+        self._vendor = parts[1]
+        self._upper = self.UPPER_NAME_OVERRIDES.get(name, name.upper())
+        self._upper_pure = self._upper.split('_', 2)[2]
+
     # e.g.: "VK_EXT_robustness2" -> "robustness2"
     def pure_name(self):
-        return '_'.join(self.name.split('_')[2:])
+        return self._pure
     
     # e.g.: "VK_EXT_robustness2" -> "EXT_robustness2"
     def name_with_vendor(self):
@@ -101,14 +135,24 @@ class Extension:
     
     # e.g.: "VK_EXT_robustness2" -> "Robustness2"
     def name_in_camel_case(self):
-        return "".join([x.title() for x in self.name.split('_')[2:]])
+        return self._camel
     
-    # e.g.: "VK_EXT_robustness2" -> "VK_EXT_ROBUSTNESS2_EXTENSION_NAME"
-    # do note that inconsistencies exist, i.e. we have
-    # VK_EXT_ROBUSTNESS_2_EXTENSION_NAME defined in the headers, but then
-    # we also have VK_KHR_MAINTENANCE1_EXTENSION_NAME
+    # e.g.: "VK_EXT_robustness2" -> "VK_EXT_ROBUSTNESS_2"
+    def upper_name(self):
+        return self._upper
+
+    # e.g.: "VK_EXT_robustness2" -> "VK_EXT_ROBUSTNESS_2_EXTENSION_NAME"
     def extension_name(self):
-        return self.name.upper() + "_EXTENSION_NAME"
+        return self._upper + "_EXTENSION_NAME"
+
+    # e.g.: "VK_EXT_robustness2" -> "ZINK_EXT_EXT_ROBUSTNESS_2"
+    def enum_id(self):
+        return "ZINK_EXT_" + self._upper[3:]
+
+    # the macro that is 1 if a guarded extension is known to the Vulkan
+    # headers and 0 otherwise, e.g. "ZINK_HAS_EXTX_PORTABILITY_SUBSET"
+    def has_macro(self):
+        return "ZINK_HAS_" + self._upper[3:]
 
     # generate a C string literal for the extension
     def extension_name_literal(self):
@@ -121,30 +165,162 @@ class Extension:
         return self.alias + '_' + suffix
 
     def physical_device_struct(self, struct: str):
-        if self.name_in_camel_case().endswith(struct):
+        if self._camel.endswith(struct):
             struct = ""
 
         return ("VkPhysicalDevice"
-                + self.name_in_camel_case()
+                + self._camel
                 + struct
-                + self.vendor())
+                + self._vendor)
 
     # the sType of the extension's struct
     # e.g. VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_TRANSFORM_FEEDBACK_FEATURES_EXT
     # for VK_EXT_transform_feedback and struct="FEATURES"
+    # e.g. VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_DRIVER_PROPERTIES_KHR (and not
+    # ..._DRIVER_PROPERTIES_PROPERTIES_KHR) for VK_KHR_driver_properties
     def stype(self, struct: str):
+        pure_name = self._upper_pure
+        if pure_name.endswith('_' + struct):
+            pure_name = pure_name[:-len(struct) - 1]
+
         return ("VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_" 
-                + self.pure_name().upper()
+                + pure_name
                 + '_' + struct + '_' 
-                + self.vendor())
+                + self._vendor)
 
     # e.g. EXT in VK_EXT_robustness2
     def vendor(self):
-        return self.name.split('_')[1]
+        return self._vendor
+
+    # The emit_*() functions below return finished lines of
+    # zink_device_info.{c,h}, already wrapped in the #ifdef of the extension
+    # if it is guarded, so the templates only have to join them.
+
+    # surrounds the code with an #if on has_macro() if the extension is
+    # guarded
+    def guarded(self, code: str):
+        if not self.guard:
+            return code
+
+        return "#if " + self.has_macro() + "\n" + code + "\n#endif"
+
+    # defines has_macro(), for guarded extensions only
+    def emit_has_macro(self):
+        return ("#ifdef " + self.extension_name() + "\n"
+                + "#define " + self.has_macro() + " 1\n"
+                + "#else\n"
+                + "#define " + self.has_macro() + " 0\n"
+                + "#endif")
+
+    # the inline function testing the extension's bit in have_mask, for
+    # guarded extensions this is constant false when the headers lack the
+    # extension
+    def emit_have_accessor(self):
+        test = "BITSET_TEST(info->have_mask, " + self.enum_id() + ")"
+        if self.guard:
+            test = self.has_macro() + " && " + test
+
+        return ("static inline bool\n"
+                + "zink_have_" + self.name_with_vendor() + "(const struct zink_device_info *info)\n"
+                + "{\n"
+                + "   return " + test + ";\n"
+                + "}\n")
+
+    # the feature/properties struct fields of zink_device_info, or "" if the
+    # extension has none
+    def emit_struct_decls(self):
+        decls = []
+        if self.has_features:
+            decls.append("   " + self.physical_device_struct("Features") + " " + self.field("feats") + ";")
+        if self.has_properties:
+            decls.append("   " + self.physical_device_struct("Properties") + " " + self.field("props") + ";")
+
+        return self.guarded("\n".join(decls)) if decls else ""
+
+    # e.g. '   [ZINK_EXT_EXT_ROBUSTNESS_2] = "VK_EXT_robustness2",'
+    def emit_name_entry(self):
+        return "   [" + self.enum_id() + "] = " + self.extension_name_literal() + ","
+
+    # the case of the lookup switch, see lookup_switch_cases()
+    def emit_lookup_case(self, hash: int, value: str):
+        return self.guarded("   case " + "0x%08x" % hash + ":\n"
+                            + "      return zink_ext_name_eq(name, " + self.extension_name_literal() + ") ? "
+                            + value + " : -1;")
+
+    # the entry of the extension in the features ("feats") or properties
+    # ("props") pNext chain table
+    def emit_chain_entry(self, suffix: str):
+        struct = "FEATURES" if suffix == "feats" else "PROPERTIES"
+        return self.guarded("   { " + self.enum_id()
+                            + ", offsetof(struct zink_device_info, " + self.field(suffix) + "), "
+                            + self.stype(struct) + " },")
+
+    # the statement that sets have_<name> according to the enable_conds,
+    # once the features and properties have been queried
+    def emit_enable_stmt(self):
+        # without conditions, the statement doesn't refer to the extension's
+        # structs, so test has_macro() at runtime and let the compiler drop
+        # the dead statement instead of needing the preprocessor
+        runtime_guard = self.guard and not self.enable_conds
+
+        stmt = "      if ("
+        if runtime_guard:
+            stmt += self.has_macro() + " && "
+        stmt += "BITSET_TEST(support, " + self.enum_id() + ")"
+        for cond in self.enable_conds or []:
+            cond = COND_STRUCT_PATTERN.sub(lambda m: "info->" + self.field(m.group(1)), cond)
+            stmt += " &&\n          (" + cond + ")"
+        stmt += ")\n         BITSET_SET(info->have_mask, " + self.enum_id() + ");"
+
+        return stmt if runtime_guard else self.guarded(stmt)
 
 # Type aliases
 Layer = Extension
 
+# The generated code looks up extension and layer names by switching on the
+# result of zink_ext_name_hash() from zink_ext_common.h, which is the same
+# function as name_hash() below, so keep the two in sync.
+NAME_HASH_PRIME_FACTOR = 5024183
+
+def name_hash(name: str):
+    h = 0
+    for c in name:
+        h = ((h * NAME_HASH_PRIME_FACTOR) + ord(c)) & 0xffffffff
+    return h
+
+# Returns a list of (hash, index, extension) tuples sorted by hash, where
+# index is the position of the extension in the given list.
+def hash_table(extensions: List[Extension]):
+    for ext in extensions:
+        # zink_ext_name_eq() compares the first 8 bytes at once
+        if len(ext.name) < 8:
+            raise RuntimeError("the name {} is too short for zink_ext_name_eq()".format(ext.name))
+
+    table = sorted((name_hash(ext.name), i, ext) for i, ext in enumerate(extensions))
+
+    for (a, b) in zip(table, table[1:]):
+        if a[0] == b[0]:
+            raise RuntimeError("hash collision between {} and {}".format(a[2].name, b[2].name))
+
+    return table
+
+# Returns the C initializers of the BITSET_WORDs of a bitset which has the
+# bit of each extension matching pred set, with the position of the extension
+# in the given list as its bit index.
+def bitset_words(extensions: List[Extension], pred):
+    words = [0] * ((len(extensions) + 31) // 32)
+    for i, ext in enumerate(extensions):
+        if pred(ext):
+            words[i // 32] |= 1 << (i % 32)
+
+    return ["0x%08x" % w for w in words]
+
+# Returns the cases of a switch on zink_ext_name_hash(name) which return
+# value(index, extension) for each known name, and -1 for anything else.
+def lookup_switch_cases(extensions: List[Extension], value=lambda i, ext: str(i)):
+    return "\n".join(ext.emit_lookup_case(hash, value(i, ext))
+                     for (hash, i, ext) in hash_table(extensions))
+
 class ExtensionRegistryEntry:
     # type of extension - right now it's either "instance" or "device"
     ext_type          : str       = ""
@@ -160,7 +336,14 @@ class ExtensionRegistry:
     # key = extension name, value = registry entry
     registry = dict()
 
-    def __init__(self, vkxml_path: str):
+    # If registry_path is given, the registry is loaded from the JSON file
+    # written out by this script at build time, which is a lot faster than
+    # parsing vk.xml again in each generator.
+    def __init__(self, vkxml_path: str, registry_path: str = None):
+        if registry_path:
+            self.load(registry_path)
+            return
+
         vkxml = ElementTree.parse(vkxml_path)
 
         for ext in vkxml.findall("extensions/extension"):
@@ -168,7 +351,8 @@ class ExtensionRegistry:
             if ext.get("supported") == "disabled":
                 continue
 
-            name = ext.attrib["name"]
+            # the names are looked up again and again by the generators
+            name = sys.intern(ext.attrib["name"])
 
             entry = ExtensionRegistryEntry()
             entry.ext_type = ext.attrib["type"]
@@ -200,12 +384,29 @@ class ExtensionRegistry:
 
             self.registry[name] = entry
 
+    def load(self, registry_path: str):
+        with open(registry_path, "r") as registry_file:
+            registry = json.load(registry_file)
+
+        for (name, fields) in registry.items():
+            entry = ExtensionRegistryEntry()
+            for (field, value) in fields.items():
+                setattr(entry, field, value)
+            if entry.promoted_in:
+                entry.promoted_in = tuple(entry.promoted_in)
+            self.registry[sys.intern(name)] = entry
+
+    def save(self, registry_path: str):
+        registry = { name: vars(entry) for (name, entry) in self.registry.items() }
+        with open(registry_path, "w") as registry_file:
+            json.dump(registry, registry_file)
+
     def in_registry(self, ext_name: str):
         return ext_name in self.registry
 
+    # returns None if the extension is not in the registry
     def get_registry_entry(self, ext_name: str):
-        if self.in_registry(ext_name):
-            return self.registry[ext_name]
+        return self.registry.get(ext_name)
 
     # Parses e.g. "VK_VERSION_x_y" to integer tuple (x, y)
     # For any erroneous inputs, None is returned
@@ -223,3 +424,14 @@ class ExtensionRegistry:
 
     def is_properties_struct(self, struct: str):
         return re.match(r"VkPhysicalDevice.*Properties.*", struct) is not None
+
+
+if __name__ == "__main__":
+    try:
+        vkxml_path = sys.argv[1]
+        registry_path = sys.argv[2]
+    except:
+        print("usage: %s <path to vk.xml> <path to .json>" % sys.argv[0])
+        exit(1)
+
+    ExtensionRegistry(vkxml_path).save(registry_path)
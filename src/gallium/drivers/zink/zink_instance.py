@@ -23,10 +23,11 @@
 #    Hoe Hao Cheng <haochengho12907@gmail.com>
 #
 
-from mako.template import Template
 from os import path
+from string import Template
 from xml.etree import ElementTree
 from zink_extensions import Extension,Layer,ExtensionRegistry,Version
+from zink_extensions import lookup_switch_cases
 import sys
 
 # constructor: Extension(name, core_since=None, functions=[])
@@ -60,11 +61,7 @@ LAYERS = [
       conditions=["have_EXT_debug_utils", "!have_layer_KHRONOS_validation"]),
 ]
 
-REPLACEMENTS = {
-    "VK_KHR_GET_PHYSICAL_DEVICE_PROPERTIES2_EXTENSION_NAME" : "VK_KHR_GET_PHYSICAL_DEVICE_PROPERTIES_2_EXTENSION_NAME"
-}
-
-header_code = """
+header_code = Template("""
 #ifndef ZINK_INSTANCE_H
 #define ZINK_INSTANCE_H
 
@@ -83,116 +80,140 @@ struct zink_screen;
 struct zink_instance_info {
    uint32_t loader_version;
 
-%for ext in extensions:
-   bool have_${ext.name_with_vendor()};
-%endfor
+${have_decls}
 
-%for layer in layers:
-   bool have_layer_${layer.pure_name()};
-%endfor
+${have_layer_decls}
 };
 
 VkInstance
-zink_create_instance(struct zink_instance_info *instance_info);
+zink_create_instance(struct zink_instance_info *instance_info,
+                     VkExtensionProperties *scratch, uint32_t scratch_cap);
 
 bool
 zink_load_instance_extensions(struct zink_screen *screen);
 
 #endif
-"""
+""")
 
-impl_code = """
+impl_code = Template("""
 #include "zink_instance.h"
+#include "zink_ext_common.h"
 #include "zink_screen.h"
 
+static const char *const instance_extension_names[] = {
+${extension_names}
+};
+
+/* returns the index of the extension in instance_extension_names, or -1 */
+static int
+lookup_instance_extension(const char *name)
+{
+   switch (zink_ext_name_hash(name)) {
+${extension_lookup_cases}
+   default:
+      return -1;
+   }
+}
+
+/* returns the index of the layer in the layers zink knows, or -1 */
+static int
+lookup_instance_layer(const char *name)
+{
+   switch (zink_ext_name_hash(name)) {
+${layer_lookup_cases}
+   default:
+      return -1;
+   }
+}
+
 VkInstance
-zink_create_instance(struct zink_instance_info *instance_info)
+zink_create_instance(struct zink_instance_info *instance_info,
+                     VkExtensionProperties *scratch, uint32_t scratch_cap)
 {
    /* reserve one slot for MoltenVK */
-   const char *layers[${len(layers) + 1}] = { 0 };
+   const char *layers[${num_layer_slots}] = { 0 };
    uint32_t num_layers = 0;
    
-   const char *extensions[${len(extensions) + 1}] = { 0 };
+   const char *extensions[${num_extension_slots}] = { 0 };
    uint32_t num_extensions = 0;
 
-%for ext in extensions:
-   bool have_${ext.name_with_vendor()} = false;
-%endfor
-
-%for layer in layers:
-   bool have_layer_${layer.pure_name()} = false;
-%endfor
+   bool support_extension[${num_extensions}] = {0};
+   bool support_layer[${num_layers}] = {0};
 
 #if defined(MVK_VERSION)
    bool have_moltenvk_layer = false;
 #endif
 
-   // Build up the extensions from the reported ones but only for the unnamed layer
-   uint32_t extension_count = 0;
-   if (vkEnumerateInstanceExtensionProperties(NULL, &extension_count, NULL) == VK_SUCCESS) {
-       VkExtensionProperties *extension_props = malloc(extension_count * sizeof(VkExtensionProperties));
-       if (extension_props) {
-           if (vkEnumerateInstanceExtensionProperties(NULL, &extension_count, extension_props) == VK_SUCCESS) {
-              for (uint32_t i = 0; i < extension_count; i++) {
-        %for ext in extensions:
-                if (!strcmp(extension_props[i].extensionName, ${ext.extension_name_literal()})) {
-                    have_${ext.name_with_vendor()} = true;
-                    extensions[num_extensions++] = ${ext.extension_name_literal()};
-                }
-        %endfor
-              }
-           }
-       free(extension_props);
-       }
+   // Build up the extensions from the reported ones but only for the unnamed layer,
+   // trying the scratch buffer of the screen first so that only one query is
+   // needed in the common case
+   VkExtensionProperties *extension_props = scratch;
+   uint32_t extension_count = scratch_cap;
+   VkResult result = scratch ?
+      vkEnumerateInstanceExtensionProperties(NULL, &extension_count, extension_props) :
+      VK_INCOMPLETE;
+   if (result == VK_INCOMPLETE &&
+       vkEnumerateInstanceExtensionProperties(NULL, &extension_count, NULL) == VK_SUCCESS) {
+      extension_props = malloc(extension_count * sizeof(VkExtensionProperties));
+      if (extension_props)
+         result = vkEnumerateInstanceExtensionProperties(NULL, &extension_count, extension_props);
+   }
+
+   if (extension_props && (result == VK_SUCCESS || result == VK_INCOMPLETE)) {
+      for (uint32_t i = 0; i < extension_count; i++) {
+         int ext = lookup_instance_extension(extension_props[i].extensionName);
+         if (ext >= 0) {
+            support_extension[ext] = true;
+            extensions[num_extensions++] = instance_extension_names[ext];
+         }
+      }
    }
 
+   if (extension_props != scratch)
+      free(extension_props);
+
+${have_locals}
+
    // Clear have_EXT_debug_utils if we do not want debug info
    if (!(zink_debug & ZINK_DEBUG_VALIDATION)) {
       have_EXT_debug_utils = false;
    }
 
-    // Build up the layers from the reported ones
-    uint32_t layer_count = 0;
-
-    if (vkEnumerateInstanceLayerProperties(&layer_count, NULL) == VK_SUCCESS) {
-        VkLayerProperties *layer_props = malloc(layer_count * sizeof(VkLayerProperties));
-        if (layer_props) {
-            if (vkEnumerateInstanceLayerProperties(&layer_count, layer_props) == VK_SUCCESS) {
-               for (uint32_t i = 0; i < layer_count; i++) {
-%for layer in layers:
-                  if (!strcmp(layer_props[i].layerName, ${layer.extension_name_literal()})) {
-                     have_layer_${layer.pure_name()} = true;
-                  }
-%endfor
+   // Build up the layers from the reported ones, with the same stack buffer
+   // fast path as for the extensions
+   VkLayerProperties stack_layer_props[32];
+   VkLayerProperties *layer_props = stack_layer_props;
+   uint32_t layer_count = ARRAY_SIZE(stack_layer_props);
+   result = vkEnumerateInstanceLayerProperties(&layer_count, layer_props);
+   if (result == VK_INCOMPLETE &&
+       vkEnumerateInstanceLayerProperties(&layer_count, NULL) == VK_SUCCESS) {
+      layer_props = malloc(layer_count * sizeof(VkLayerProperties));
+      if (layer_props)
+         result = vkEnumerateInstanceLayerProperties(&layer_count, layer_props);
+   }
+
+   if (layer_props && (result == VK_SUCCESS || result == VK_INCOMPLETE)) {
+      for (uint32_t i = 0; i < layer_count; i++) {
+         int layer = lookup_instance_layer(layer_props[i].layerName);
+         if (layer >= 0)
+            support_layer[layer] = true;
 #if defined(MVK_VERSION)
-                  if (!strcmp(layer_props[i].layerName, "MoltenVK")) {
-                     have_moltenvk_layer = true;
-                     layers[num_layers++] = "MoltenVK";
-                  }
+         if (zink_ext_name_eq(layer_props[i].layerName, "MoltenVK")) {
+            have_moltenvk_layer = true;
+            layers[num_layers++] = "MoltenVK";
+         }
 #endif
-               }
-            }
-        free(layer_props);
-        }
-    }
-
-%for ext in extensions:
-   instance_info->have_${ext.name_with_vendor()} = have_${ext.name_with_vendor()};
-%endfor
-
-%for layer in layers:
-<%
-    conditions = ""
-    if layer.enable_conds:
-        for cond in layer.enable_conds:
-            conditions += "&& (" + cond + ") "
-    conditions = conditions.strip()
-%>\
-   if (have_layer_${layer.pure_name()} ${conditions}) {
-      layers[num_layers++] = ${layer.extension_name_literal()};
-      instance_info->have_layer_${layer.pure_name()} = true;
+      }
    }
-%endfor
+
+   if (layer_props != stack_layer_props)
+      free(layer_props);
+
+${have_layer_locals}
+
+${have_assignments}
+
+${layer_enables}
 
    VkApplicationInfo ai = {};
    ai.sType = VK_STRUCTURE_TYPE_APPLICATION_INFO;
@@ -229,41 +250,75 @@ zink_load_instance_extensions(struct zink_screen *screen)
       printf("zink: Loader %d.%d.%d \\n", VK_VERSION_MAJOR(screen->instance_info.loader_version), VK_VERSION_MINOR(screen->instance_info.loader_version), VK_VERSION_PATCH(screen->instance_info.loader_version));
    }
 
-%for ext in extensions:
-%if bool(ext.instance_funcs) and not ext.core_since:
-   if (screen->instance_info.have_${ext.name_with_vendor()}) {
-   %for func in ext.instance_funcs:
-      GET_PROC_ADDR_INSTANCE_LOCAL(screen->instance, ${func}${ext.vendor()});
-      screen->vk_${func} = vk_${func}${ext.vendor()};
-   %endfor
-   }
-%elif bool(ext.instance_funcs):
-   if (screen->instance_info.have_${ext.name_with_vendor()}) {
-      if (screen->vk_version < ${ext.core_since.version()}) {
-      %for func in ext.instance_funcs:
-         GET_PROC_ADDR_INSTANCE_LOCAL(screen->instance, ${func}${ext.vendor()});
-         screen->vk_${func} = vk_${func}${ext.vendor()};
-         if (!screen->vk_${func}) return false;
-      %endfor
-      } else {
-      %for func in ext.instance_funcs:
-         GET_PROC_ADDR_INSTANCE(${func});
-      %endfor
-      }
-   }
-%endif
-%endfor
+${instance_func_loads}
 
    return true;
 }
-"""
-
+""")
+
+
+# the code loading the functions of the extension in
+# zink_load_instance_extensions(), or "" if it doesn't have any
+def load_instance_funcs(ext):
+    if not ext.instance_funcs:
+        return ""
+
+    lines = ["   if (screen->instance_info.have_" + ext.name_with_vendor() + ") {"]
+    if not ext.core_since:
+        for func in ext.instance_funcs:
+            lines.append("      GET_PROC_ADDR_INSTANCE_LOCAL(screen->instance, " + func + ext.vendor() + ");")
+            lines.append("      screen->vk_" + func + " = vk_" + func + ext.vendor() + ";")
+    else:
+        lines.append("      if (screen->vk_version < " + ext.core_since.version() + ") {")
+        for func in ext.instance_funcs:
+            lines.append("         GET_PROC_ADDR_INSTANCE_LOCAL(screen->instance, " + func + ext.vendor() + ");")
+            lines.append("         screen->vk_" + func + " = vk_" + func + ext.vendor() + ";")
+            lines.append("         if (!screen->vk_" + func + ") return false;")
+        lines.append("      } else {")
+        for func in ext.instance_funcs:
+            lines.append("         GET_PROC_ADDR_INSTANCE(" + func + ");")
+        lines.append("      }")
+    lines.append("   }")
+
+    return "\n".join(lines)
+
+
+def layer_enable(layer):
+    conditions = ""
+    if layer.enable_conds:
+        for cond in layer.enable_conds:
+            conditions += "&& (" + cond + ") "
+    conditions = conditions.strip()
 
-def replace_code(code: str, replacement: dict):
-    for (k, v) in replacement.items():
-        code = code.replace(k, v)
-    
-    return code
+    return ("   if (have_layer_" + layer.pure_name() + " " + conditions + ") {\n"
+            + "      layers[num_layers++] = " + layer.extension_name_literal() + ";\n"
+            + "      instance_info->have_layer_" + layer.pure_name() + " = true;\n"
+            + "   }")
+
+
+def render_header(extensions, layers):
+    return header_code.substitute(
+        have_decls="\n".join("   bool have_" + ext.name_with_vendor() + ";" for ext in extensions),
+        have_layer_decls="\n".join("   bool have_layer_" + layer.pure_name() + ";" for layer in layers))
+
+
+def render_impl(extensions, layers):
+    return impl_code.substitute(
+        extension_names="\n".join("   " + ext.extension_name_literal() + "," for ext in extensions),
+        extension_lookup_cases=lookup_switch_cases(extensions),
+        layer_lookup_cases=lookup_switch_cases(layers),
+        num_layer_slots=len(layers) + 1,
+        num_extension_slots=len(extensions) + 1,
+        num_extensions=len(extensions),
+        num_layers=len(layers),
+        have_locals="\n".join("   bool have_" + ext.name_with_vendor() + " = support_extension[" + str(idx) + "];"
+                              for idx, ext in enumerate(extensions)),
+        have_layer_locals="\n".join("   bool have_layer_" + layer.pure_name() + " = support_layer[" + str(idx) + "];"
+                                    for idx, layer in enumerate(layers)),
+        have_assignments="\n".join("   instance_info->have_" + ext.name_with_vendor() + " = have_" + ext.name_with_vendor() + ";"
+                                   for ext in extensions),
+        layer_enables="\n".join(layer_enable(layer) for layer in layers),
+        instance_func_loads="\n".join(filter(None, (load_instance_funcs(ext) for ext in extensions))))
 
 
 if __name__ == "__main__":
@@ -271,24 +326,26 @@ if __name__ == "__main__":
         header_path = sys.argv[1]
         impl_path = sys.argv[2]
         vkxml_path = sys.argv[3]
+        # optional, vk.xml as parsed by zink_extensions.py
+        registry_path = sys.argv[4] if len(sys.argv) > 4 else None
 
         header_path = path.abspath(header_path)
         impl_path = path.abspath(impl_path)
         vkxml_path = path.abspath(vkxml_path)
     except:
-        print("usage: %s <path to .h> <path to .c> <path to vk.xml>" % sys.argv[0])
+        print("usage: %s <path to .h> <path to .c> <path to vk.xml> [<path to .json>]" % sys.argv[0])
         exit(1)
 
-    registry = ExtensionRegistry(vkxml_path)
+    registry = ExtensionRegistry(vkxml_path, registry_path)
 
     extensions = EXTENSIONS
     layers = LAYERS
-    replacement = REPLACEMENTS
 
     # Perform extension validation and set core_since for the extension if available
     error_count = 0
     for ext in extensions:
-        if not registry.in_registry(ext.name):
+        entry = registry.get_registry_entry(ext.name)
+        if entry is None:
             # disable validation for nonstandard extensions
             if ext.is_nonstandard:
                 continue
@@ -296,8 +353,6 @@ if __name__ == "__main__":
             error_count += 1
             print("The extension {} is not registered in vk.xml - a typo?".format(ext.name))
             continue
-        
-        entry = registry.get_registry_entry(ext.name)
 
         if entry.ext_type != "instance":
             error_count += 1
@@ -318,11 +373,9 @@ if __name__ == "__main__":
         exit(1)
 
     with open(header_path, "w") as header_file:
-        header = Template(header_code).render(extensions=extensions, layers=layers).strip()
-        header = replace_code(header, replacement)
+        header = render_header(extensions, layers).strip()
         print(header, file=header_file)
 
     with open(impl_path, "w") as impl_file:
-        impl = Template(impl_code).render(extensions=extensions, layers=layers).strip()
-        impl = replace_code(impl, replacement)
+        impl = render_impl(extensions, layers).strip()
         print(impl, file=impl_file)
@@ -117,7 +117,7 @@ zink_create_gfx_pipeline(struct zink_screen *screen,
    VkPipelineRasterizationProvokingVertexStateCreateInfoEXT pv_state;
    pv_state.sType = VK_STRUCTURE_TYPE_PIPELINE_RASTERIZATION_PROVOKING_VERTEX_STATE_CREATE_INFO_EXT;
    pv_state.provokingVertexMode = state->rast_state->pv_mode;
-   if (screen->info.have_EXT_provoking_vertex &&
+   if (zink_have_EXT_provoking_vertex(&screen->info) &&
        state->rast_state->pv_mode == VK_PROVOKING_VERTEX_MODE_LAST_VERTEX_EXT) {
       pv_state.pNext = rast_state.pNext;
       rast_state.pNext = &pv_state;
@@ -142,7 +142,7 @@ zink_create_gfx_pipeline(struct zink_screen *screen,
       VK_DYNAMIC_STATE_STENCIL_REFERENCE,
    };
    unsigned state_count = 4;
-   if (screen->info.have_EXT_extended_dynamic_state) {
+   if (zink_have_EXT_extended_dynamic_state(&screen->info)) {
       dynamicStateEnables[state_count++] = VK_DYNAMIC_STATE_VIEWPORT_WITH_COUNT_EXT;
       dynamicStateEnables[state_count++] = VK_DYNAMIC_STATE_SCISSOR_WITH_COUNT_EXT;
       dynamicStateEnables[state_count++] = VK_DYNAMIC_STATE_DEPTH_BOUNDS;
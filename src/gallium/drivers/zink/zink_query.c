@@ -997,7 +997,7 @@ zink_get_timestamp(struct pipe_context *pctx)
 {
    struct zink_screen *screen = zink_screen(pctx->screen);
    uint64_t timestamp, deviation;
-   assert(screen->info.have_EXT_calibrated_timestamps);
+   assert(zink_have_EXT_calibrated_timestamps(&screen->info));
    VkCalibratedTimestampInfoEXT cti = {};
    cti.sType = VK_STRUCTURE_TYPE_CALIBRATED_TIMESTAMP_INFO_EXT;
    cti.timeDomain = VK_TIME_DOMAIN_DEVICE_EXT;
@@ -256,7 +256,7 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return 1;
 
    case PIPE_CAP_TEXTURE_MIRROR_CLAMP_TO_EDGE:
-      return screen->info.have_KHR_sampler_mirror_clamp_to_edge;
+      return zink_have_KHR_sampler_mirror_clamp_to_edge(&screen->info);
 
    case PIPE_CAP_POLYGON_OFFSET_CLAMP:
       return screen->info.feats.features.depthBiasClamp;
@@ -271,14 +271,14 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return screen->info.feats.features.multiDrawIndirect;
 
    case PIPE_CAP_MULTI_DRAW_INDIRECT_PARAMS:
-      return screen->info.have_KHR_draw_indirect_count;
+      return zink_have_KHR_draw_indirect_count(&screen->info);
 
    case PIPE_CAP_START_INSTANCE:
       return (screen->info.have_vulkan12 && screen->info.feats11.shaderDrawParameters) ||
-              screen->info.have_KHR_shader_draw_parameters;
+              zink_have_KHR_shader_draw_parameters(&screen->info);
 
    case PIPE_CAP_VERTEX_ELEMENT_INSTANCE_DIVISOR:
-      return screen->info.have_EXT_vertex_attribute_divisor;
+      return zink_have_EXT_vertex_attribute_divisor(&screen->info);
 
    case PIPE_CAP_MAX_VERTEX_STREAMS:
       return screen->info.tf_props.maxTransformFeedbackStreams;
@@ -306,10 +306,10 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return 1;
 
    case PIPE_CAP_FRAGMENT_SHADER_INTERLOCK:
-      return screen->info.have_EXT_fragment_shader_interlock;
+      return zink_have_EXT_fragment_shader_interlock(&screen->info);
 
    case PIPE_CAP_TGSI_CLOCK:
-      return screen->info.have_KHR_shader_clock;
+      return zink_have_KHR_shader_clock(&screen->info);
 
    case PIPE_CAP_POINT_SPRITE:
       return 1;
@@ -350,10 +350,10 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return screen->info.feats.features.independentBlend;
 
    case PIPE_CAP_MAX_STREAM_OUTPUT_BUFFERS:
-      return screen->info.have_EXT_transform_feedback ? screen->info.tf_props.maxTransformFeedbackBuffers : 0;
+      return zink_have_EXT_transform_feedback(&screen->info) ? screen->info.tf_props.maxTransformFeedbackBuffers : 0;
    case PIPE_CAP_STREAM_OUTPUT_PAUSE_RESUME:
    case PIPE_CAP_STREAM_OUTPUT_INTERLEAVE_BUFFERS:
-      return screen->info.have_EXT_transform_feedback;
+      return zink_have_EXT_transform_feedback(&screen->info);
 
    case PIPE_CAP_MAX_TEXTURE_ARRAY_LAYERS:
       return screen->info.props.limits.maxImageArrayLayers;
@@ -362,7 +362,7 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return screen->info.feats.features.depthClamp;
 
    case PIPE_CAP_SHADER_STENCIL_EXPORT:
-      return screen->info.have_EXT_shader_stencil_export;
+      return zink_have_EXT_shader_stencil_export(&screen->info);
 
    case PIPE_CAP_TGSI_INSTANCEID:
    case PIPE_CAP_MIXED_COLORBUFFER_FORMATS:
@@ -378,7 +378,7 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return 1;
 
    case PIPE_CAP_CONDITIONAL_RENDER:
-     return screen->info.have_EXT_conditional_rendering;
+     return zink_have_EXT_conditional_rendering(&screen->info);
 
    case PIPE_CAP_GLSL_FEATURE_LEVEL_COMPATIBILITY:
       return 130;
@@ -392,7 +392,7 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return screen->info.props.limits.minUniformBufferOffsetAlignment;
 
    case PIPE_CAP_QUERY_TIMESTAMP:
-      return screen->info.have_EXT_calibrated_timestamps &&
+      return zink_have_EXT_calibrated_timestamps(&screen->info) &&
              screen->timestamp_valid_bits > 0;
 
    case PIPE_CAP_MIN_MAP_BUFFER_ALIGNMENT:
@@ -440,7 +440,7 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return screen->info.props.limits.maxTexelGatherOffset;
 
    case PIPE_CAP_SAMPLER_REDUCTION_MINMAX_ARB:
-      return screen->vk_version >= VK_MAKE_VERSION(1,2,0) || screen->info.have_EXT_sampler_filter_minmax;
+      return screen->vk_version >= VK_MAKE_VERSION(1,2,0) || zink_have_EXT_sampler_filter_minmax(&screen->info);
 
    case PIPE_CAP_TGSI_FS_FINE_DERIVATIVE:
       return 1;
@@ -465,7 +465,7 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
 
    case PIPE_CAP_TGSI_VS_LAYER_VIEWPORT:
    case PIPE_CAP_TGSI_TES_LAYER_VIEWPORT:
-      return screen->info.have_EXT_shader_viewport_index_layer ||
+      return zink_have_EXT_shader_viewport_index_layer(&screen->info) ||
              (screen->info.feats12.shaderOutputLayer &&
               screen->info.feats12.shaderOutputViewportIndex);
 
@@ -539,13 +539,13 @@ zink_get_param(struct pipe_screen *pscreen, enum pipe_cap param)
       return MIN2(screen->info.props.limits.maxVertexOutputComponents / 4 / 2, 16);
 
    case PIPE_CAP_DMABUF:
-      return screen->info.have_KHR_external_memory_fd;
+      return zink_have_KHR_external_memory_fd(&screen->info);
 
    case PIPE_CAP_DEPTH_BOUNDS_TEST:
       return screen->info.feats.features.depthBounds;
 
    case PIPE_CAP_POST_DEPTH_COVERAGE:
-      return screen->info.have_EXT_post_depth_coverage;
+      return zink_have_EXT_post_depth_coverage(&screen->info);
 
    default:
       return u_pipe_screen_get_param_defaults(pscreen, param);
@@ -604,7 +604,7 @@ zink_get_shader_param(struct pipe_screen *pscreen,
       case PIPE_SHADER_TESS_CTRL:
       case PIPE_SHADER_TESS_EVAL:
          if (screen->info.feats.features.tessellationShader &&
-             screen->info.have_KHR_maintenance2)
+             zink_have_KHR_maintenance2(&screen->info))
             return INT_MAX;
          break;
 
@@ -713,7 +713,7 @@ zink_get_shader_param(struct pipe_screen *pscreen,
    case PIPE_SHADER_CAP_FP16:
    case PIPE_SHADER_CAP_FP16_DERIVATIVES:
       return screen->info.feats12.shaderFloat16 ||
-             (screen->info.have_KHR_shader_float16_int8 &&
+             (zink_have_KHR_shader_float16_int8(&screen->info) &&
               screen->info.shader_float16_int8_feats.shaderFloat16);
 
    case PIPE_SHADER_CAP_INT16:
@@ -1160,7 +1160,7 @@ zink_get_format(struct zink_screen *screen, enum pipe_format format)
 static bool
 load_device_extensions(struct zink_screen *screen)
 {
-   if (screen->info.have_EXT_transform_feedback) {
+   if (zink_have_EXT_transform_feedback(&screen->info)) {
       GET_PROC_ADDR(CmdBindTransformFeedbackBuffersEXT);
       GET_PROC_ADDR(CmdBeginTransformFeedbackEXT);
       GET_PROC_ADDR(CmdEndTransformFeedbackEXT);
@@ -1168,20 +1168,20 @@ load_device_extensions(struct zink_screen *screen)
       GET_PROC_ADDR(CmdEndQueryIndexedEXT);
       GET_PROC_ADDR(CmdDrawIndirectByteCountEXT);
    }
-   if (screen->info.have_KHR_external_memory_fd)
+   if (zink_have_KHR_external_memory_fd(&screen->info))
       GET_PROC_ADDR(GetMemoryFdKHR);
 
-   if (screen->info.have_EXT_conditional_rendering) {
+   if (zink_have_EXT_conditional_rendering(&screen->info)) {
       GET_PROC_ADDR(CmdBeginConditionalRenderingEXT);
       GET_PROC_ADDR(CmdEndConditionalRenderingEXT);
    }
 
-   if (screen->info.have_KHR_draw_indirect_count) {
+   if (zink_have_KHR_draw_indirect_count(&screen->info)) {
       GET_PROC_ADDR_KHR(CmdDrawIndexedIndirectCount);
       GET_PROC_ADDR_KHR(CmdDrawIndirectCount);
    }
 
-   if (screen->info.have_EXT_calibrated_timestamps) {
+   if (zink_have_EXT_calibrated_timestamps(&screen->info)) {
       GET_PROC_ADDR_INSTANCE(GetPhysicalDeviceCalibrateableTimeDomainsEXT);
       GET_PROC_ADDR(GetCalibratedTimestampsEXT);
 
@@ -1203,7 +1203,7 @@ load_device_extensions(struct zink_screen *screen)
       assert(have_device_time);
       free(domains);
    }
-   if (screen->info.have_EXT_extended_dynamic_state) {
+   if (zink_have_EXT_extended_dynamic_state(&screen->info)) {
       GET_PROC_ADDR(CmdSetViewportWithCountEXT);
       GET_PROC_ADDR(CmdSetScissorWithCountEXT);
       GET_PROC_ADDR(CmdSetDepthBoundsTestEnableEXT);
@@ -1216,28 +1216,28 @@ load_device_extensions(struct zink_screen *screen)
       GET_PROC_ADDR(CmdSetFrontFaceEXT);
    }
 
-   if (screen->info.have_EXT_image_drm_format_modifier)
+   if (zink_have_EXT_image_drm_format_modifier(&screen->info))
       GET_PROC_ADDR(GetImageDrmFormatModifierPropertiesEXT);
 
-   if (screen->info.have_KHR_timeline_semaphore)
+   if (zink_have_KHR_timeline_semaphore(&screen->info))
       GET_PROC_ADDR_KHR(WaitSemaphores);
 
-   if (screen->info.have_KHR_maintenance3)
+   if (zink_have_KHR_maintenance3(&screen->info))
       GET_PROC_ADDR_KHR(GetDescriptorSetLayoutSupport);
 
    screen->have_triangle_fans = true;
-#if defined(VK_EXTX_PORTABILITY_SUBSET_EXTENSION_NAME)
-   if (screen->info.have_EXTX_portability_subset) {
+#if ZINK_HAS_EXTX_PORTABILITY_SUBSET
+   if (zink_have_EXTX_portability_subset(&screen->info)) {
       screen->have_triangle_fans = (VK_TRUE == screen->info.portability_subset_extx_feats.triangleFans);
    }
-#endif // VK_EXTX_PORTABILITY_SUBSET_EXTENSION_NAME
+#endif // ZINK_HAS_EXTX_PORTABILITY_SUBSET
 
-   if (screen->info.have_KHR_swapchain) {
+   if (zink_have_KHR_swapchain(&screen->info)) {
       GET_PROC_ADDR(CreateSwapchainKHR);
       GET_PROC_ADDR(DestroySwapchainKHR);
    }
 
-   if (screen->info.have_EXT_sample_locations) {
+   if (zink_have_EXT_sample_locations(&screen->info)) {
       GET_PROC_ADDR(CmdSetSampleLocationsEXT);
       GET_PROC_ADDR_INSTANCE(GetPhysicalDeviceMultisamplePropertiesEXT);
    }
@@ -1398,7 +1398,7 @@ zink_screen_init_semaphore(struct zink_screen *screen)
       screen->sem = sem;
       return true;
    }
-   screen->info.have_KHR_timeline_semaphore = false;
+   BITSET_CLEAR(screen->info.have_mask, ZINK_EXT_KHR_TIMELINE_SEMAPHORE);
    return false;
 }
 
@@ -1425,7 +1425,7 @@ zink_query_memory_info(struct pipe_screen *pscreen, struct pipe_memory_info *inf
 {
    struct zink_screen *screen = zink_screen(pscreen);
    memset(info, 0, sizeof(struct pipe_memory_info));
-   if (screen->info.have_EXT_memory_budget && screen->vk_GetPhysicalDeviceMemoryProperties2) {
+   if (zink_have_EXT_memory_budget(&screen->info) && screen->vk_GetPhysicalDeviceMemoryProperties2) {
       VkPhysicalDeviceMemoryProperties2 mem = {};
       mem.sType = VK_STRUCTURE_TYPE_PHYSICAL_DEVICE_MEMORY_PROPERTIES_2;
 
@@ -1488,7 +1488,11 @@ zink_create_logical_device(struct zink_screen *screen)
       dci.pEnabledFeatures = &screen->info.feats.features;
    }
 
-   dci.ppEnabledExtensionNames = screen->info.extensions;
+   const char *extensions[ZINK_EXT_COUNT];
+   for (unsigned i = 0; i < screen->info.num_extensions; i++)
+      extensions[i] = zink_ext_names[screen->info.extensions[i]];
+
+   dci.ppEnabledExtensionNames = extensions;
    dci.enabledExtensionCount = screen->info.num_extensions;
 
    vkCreateDevice(screen->pdev, &dci, NULL, &dev);
@@ -1514,9 +1518,9 @@ check_base_requirements(struct zink_screen *screen)
        !screen->info.feats.features.alphaToOne ||
        !screen->info.feats.features.shaderClipDistance ||
        !(screen->info.feats12.scalarBlockLayout ||
-         screen->info.have_EXT_scalar_block_layout) ||
-       !screen->info.have_KHR_maintenance1 ||
-       !screen->info.have_EXT_custom_border_color) {
+         zink_have_EXT_scalar_block_layout(&screen->info)) ||
+       !zink_have_KHR_maintenance1(&screen->info) ||
+       !zink_have_EXT_custom_border_color(&screen->info)) {
       fprintf(stderr, "WARNING: The Vulkan device doesn't support "
               "the base Zink requirements, some incorrect rendering "
               "might occur\n");
@@ -1535,8 +1539,16 @@ zink_internal_create_screen(const struct pipe_screen_config *config)
 
    zink_debug = debug_get_option_zink_debug();
 
+   /* scratch space for the instance and device extension enumerations, which
+    * fall back to allocating their own array if it is too small
+    */
+   const uint32_t num_ext_props = 256;
+   VkExtensionProperties *ext_props =
+      ralloc_array(screen, VkExtensionProperties, num_ext_props);
+
    screen->instance_info.loader_version = zink_get_loader_version();
-   screen->instance = zink_create_instance(&screen->instance_info);
+   screen->instance = zink_create_instance(&screen->instance_info,
+                                           ext_props, ext_props ? num_ext_props : 0);
 
    if (!screen->instance)
       goto fail;
@@ -1558,10 +1570,12 @@ zink_internal_create_screen(const struct pipe_screen_config *config)
    if (!zink_load_instance_extensions(screen))
       goto fail;
 
-   if (!zink_get_physical_device_info(screen)) {
+   if (!zink_get_physical_device_info(screen, ext_props,
+                                      ext_props ? num_ext_props : 0)) {
       debug_printf("ZINK: failed to detect features\n");
       goto fail;
    }
+   ralloc_free(ext_props);
 
    /* Some Vulkan implementations have special requirements for WSI
     * allocations.
@@ -1607,7 +1621,7 @@ zink_internal_create_screen(const struct pipe_screen_config *config)
    pcci.sType = VK_STRUCTURE_TYPE_PIPELINE_CACHE_CREATE_INFO;
    pcci.pNext = NULL;
    /* we're single-threaded now, so we don't need synchronization */
-   pcci.flags = screen->info.have_EXT_pipeline_creation_cache_control ? VK_PIPELINE_CACHE_CREATE_EXTERNALLY_SYNCHRONIZED_BIT_EXT : 0;
+   pcci.flags = zink_have_EXT_pipeline_creation_cache_control(&screen->info) ? VK_PIPELINE_CACHE_CREATE_EXTERNALLY_SYNCHRONIZED_BIT_EXT : 0;
    pcci.initialDataSize = 0;
    pcci.pInitialData = NULL;
    if (screen->disk_cache) {
@@ -1629,7 +1643,7 @@ zink_internal_create_screen(const struct pipe_screen_config *config)
    screen->total_video_mem = get_video_mem(screen);
    if (!os_get_total_physical_memory(&screen->total_mem))
       goto fail;
-   if (screen->info.have_KHR_timeline_semaphore)
+   if (zink_have_KHR_timeline_semaphore(&screen->info))
       zink_screen_init_semaphore(screen);
 
    simple_mtx_init(&screen->surface_mtx, mtx_plain);
@@ -1687,7 +1701,7 @@ zink_drm_create_screen(int fd, const struct pipe_screen_config *config)
 {
    struct zink_screen *ret = zink_internal_create_screen(config);
 
-   if (ret && !ret->info.have_KHR_external_memory_fd) {
+   if (ret && !zink_have_KHR_external_memory_fd(&ret->info)) {
       debug_printf("ZINK: KHR_external_memory_fd required!\n");
       zink_destroy_screen(&ret->base);
       return NULL;
@@ -62,7 +62,7 @@ zink_create_vertex_elements_state(struct pipe_context *pctx,
       ves->bindings[binding].binding = binding;
       ves->bindings[binding].inputRate = elem->instance_divisor ? VK_VERTEX_INPUT_RATE_INSTANCE : VK_VERTEX_INPUT_RATE_VERTEX;
 
-      assert(!elem->instance_divisor || zink_screen(pctx->screen)->info.have_EXT_vertex_attribute_divisor);
+      assert(!elem->instance_divisor || zink_have_EXT_vertex_attribute_divisor(&zink_screen(pctx->screen)->info));
       ves->divisor[binding] = elem->instance_divisor;
       assert(elem->instance_divisor <= screen->info.vdiv_props.maxVertexAttribDivisor);
 
@@ -391,7 +391,7 @@ zink_bind_depth_stencil_alpha_state(struct pipe_context *pctx, void *cso)
       struct zink_gfx_pipeline_state *state = &ctx->gfx_pipeline_state;
       if (state->depth_stencil_alpha_state != &ctx->dsa_state->hw_state) {
          state->depth_stencil_alpha_state = &ctx->dsa_state->hw_state;
-         state->dirty |= !zink_screen(pctx->screen)->info.have_EXT_extended_dynamic_state;
+         state->dirty |= !zink_have_EXT_extended_dynamic_state(&zink_screen(pctx->screen)->info);
       }
    }
 }
@@ -474,7 +474,7 @@ zink_bind_rasterizer_state(struct pipe_context *pctx, void *cso)
 
    if (ctx->rast_state) {
       if (ctx->gfx_pipeline_state.rast_state != &ctx->rast_state->hw_state) {
-         if (screen->info.have_EXT_provoking_vertex &&
+         if (zink_have_EXT_provoking_vertex(&screen->info) &&
              (!ctx->gfx_pipeline_state.rast_state ||
               ctx->gfx_pipeline_state.rast_state->pv_mode != ctx->rast_state->hw_state.pv_mode) &&
              /* without this prop, change in pv mode requires new rp */
@@ -489,7 +489,7 @@ zink_bind_rasterizer_state(struct pipe_context *pctx, void *cso)
 
       if (ctx->gfx_pipeline_state.front_face != ctx->rast_state->front_face) {
          ctx->gfx_pipeline_state.front_face = ctx->rast_state->front_face;
-         ctx->gfx_pipeline_state.dirty |= !zink_screen(pctx->screen)->info.have_EXT_extended_dynamic_state;
+         ctx->gfx_pipeline_state.dirty |= !zink_have_EXT_extended_dynamic_state(&zink_screen(pctx->screen)->info);
       }
       if (ctx->line_width != ctx->rast_state->line_width) {
          ctx->line_width = ctx->rast_state->line_width;
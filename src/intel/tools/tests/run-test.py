@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import argparse
+import concurrent.futures
 import difflib
 import errno
 import os
@@ -23,6 +24,10 @@ parser.add_argument('--gen_name',
 parser.add_argument('--gen_folder',
                     type=pathlib.Path,
                     help='name of the folder for the generation')
+parser.add_argument('--jobs',
+                    type=int,
+                    default=os.cpu_count(),
+                    help='number of tests to run at once')
 args = parser.parse_args()
 
 wrapper = os.environ.get('MESON_EXE_WRAPPER')
@@ -31,41 +36,56 @@ if wrapper is not None:
 else:
     i965_asm = [args.i965_asm]
 
-success = True
-
-for asm_file in args.gen_folder.glob('*.asm'):
+def run_test(asm_file):
+    '''Assembles asm_file and returns the diff of the output against the
+    expected one, which is empty when the test passes.'''
     expected_file = asm_file.stem + '.expected'
     expected_path = args.gen_folder / expected_file
 
-    try:
-        command = i965_asm + [
-            '--type', 'hex',
-            '--gen', args.gen_name,
-            asm_file
-        ]
-        with subprocess.Popen(command,
-                              stdout=subprocess.PIPE,
-                              stderr=subprocess.DEVNULL) as cmd:
-            lines_after = [line.decode('ascii') for line in cmd.stdout.readlines()]
-    except OSError as e:
-        if e.errno == errno.ENOEXEC:
-            print('Skipping due to inability to run host binaries.',
-                  file=sys.stderr)
-            exit(77)
-        raise
+    command = i965_asm + [
+        '--type', 'hex',
+        '--gen', args.gen_name,
+        asm_file
+    ]
+    with subprocess.Popen(command,
+                          stdout=subprocess.PIPE,
+                          stderr=subprocess.DEVNULL) as cmd:
+        output = cmd.stdout.read()
+
+    expected = expected_path.read_bytes()
 
-    with expected_path.open() as f:
-        lines_before = f.readlines()
+    # Most tests pass, so only diff the lines when the bytes differ
+    if output == expected:
+        return ''
 
-    diff = ''.join(difflib.unified_diff(lines_before, lines_after,
+    lines_after = output.decode('ascii').splitlines(keepends=True)
+    lines_before = expected.decode('ascii').splitlines(keepends=True)
+
+    return ''.join(difflib.unified_diff(lines_before, lines_after,
                                         expected_file, asm_file.stem + '.out'))
 
-    if diff:
-        print('Output comparison for {}:'.format(asm_file.name))
-        print(diff)
-        success = False
-    else:
-        print('{} : PASS'.format(asm_file.name))
+
+success = True
+
+asm_files = list(args.gen_folder.glob('*.asm'))
+
+try:
+    # The tests mostly wait for i965_asm, so threads are enough to run them
+    # in parallel
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        for asm_file, diff in zip(asm_files, executor.map(run_test, asm_files)):
+            if diff:
+                print('Output comparison for {}:'.format(asm_file.name))
+                print(diff)
+                success = False
+            else:
+                print('{} : PASS'.format(asm_file.name))
+except OSError as e:
+    if e.errno == errno.ENOEXEC:
+        print('Skipping due to inability to run host binaries.',
+              file=sys.stderr)
+        exit(77)
+    raise
 
 if not success:
     exit(1)
@@ -49,6 +49,36 @@ _mesa_pack_ubyte_rgba_row(mesa_format format, uint32_t n,
    pack->pack_rgba_8unorm((uint8_t *)dst, 0, src, 0, n, 1);
 }
 
+/**
+ * Packs a rectangle of R8G8B8A8_UNORM pixels, looking up the pack function
+ * only once rather than for each row.  Strides are in bytes.
+ */
+static inline void
+_mesa_pack_ubyte_rgba_rect(mesa_format format, uint32_t width, uint32_t height,
+                           const uint8_t *src, size_t src_stride,
+                           void *dst, size_t dst_stride)
+{
+   const struct util_format_pack_description *pack = util_format_pack_description(format);
+   uint8_t *dst_row = (uint8_t *)dst;
+
+   /* Rows without padding on either side are packed as a single row, so the
+    * memory is streamed through once and the vector paths only have one
+    * tail to handle.
+    */
+   if (src_stride == (size_t)width * 4 &&
+       dst_stride == (size_t)width * util_format_get_blocksize(format) &&
+       (uint64_t)width * height <= UINT32_MAX) {
+      pack->pack_rgba_8unorm(dst_row, 0, src, 0, width * height, 1);
+      return;
+   }
+
+   for (uint32_t row = 0; row < height; row++) {
+      pack->pack_rgba_8unorm(dst_row, 0, src, 0, width, 1);
+      src += src_stride;
+      dst_row += dst_stride;
+   }
+}
+
 static inline void
 _mesa_pack_uint_rgba_row(mesa_format format, uint32_t n,
                          const uint32_t src[][4], void *dst)
@@ -56,6 +86,41 @@ _mesa_pack_uint_rgba_row(mesa_format format, uint32_t n,
    util_format_pack_rgba(format, dst, src, n);
 }
 
+/**
+ * Packs a rectangle of 32-bit RGBA values, either integers for pure integer
+ * formats or floats, choosing the pack function only once rather than for
+ * each row like util_format_pack_rgba() would.  Strides are in bytes.
+ */
+static inline void
+_mesa_pack_rgba_rect(mesa_format format, uint32_t width, uint32_t height,
+                     const void *src, size_t src_stride,
+                     void *dst, size_t dst_stride)
+{
+   const struct util_format_pack_description *pack = util_format_pack_description(format);
+   const uint8_t *src_row = (const uint8_t *)src;
+   uint8_t *dst_row = (uint8_t *)dst;
+
+   if (util_format_is_pure_uint(format)) {
+      for (uint32_t row = 0; row < height; row++) {
+         pack->pack_rgba_uint(dst_row, 0, (const uint32_t *)src_row, 0, width, 1);
+         src_row += src_stride;
+         dst_row += dst_stride;
+      }
+   } else if (util_format_is_pure_sint(format)) {
+      for (uint32_t row = 0; row < height; row++) {
+         pack->pack_rgba_sint(dst_row, 0, (const int32_t *)src_row, 0, width, 1);
+         src_row += src_stride;
+         dst_row += dst_stride;
+      }
+   } else {
+      for (uint32_t row = 0; row < height; row++) {
+         pack->pack_rgba_float(dst_row, 0, (const float *)src_row, 0, width, 1);
+         src_row += src_stride;
+         dst_row += dst_stride;
+      }
+   }
+}
+
 static inline void
 _mesa_pack_float_z_row(mesa_format format, uint32_t n,
                        const float *src, void *dst)
@@ -25,6 +25,8 @@
 #ifndef FORMAT_UNPACK_H
 #define FORMAT_UNPACK_H
 
+#include <string.h>
+
 #include "util/format/u_format.h"
 #include "formats.h"
 
@@ -54,6 +56,12 @@ static inline void
 _mesa_unpack_float_z_row(mesa_format format, uint32_t n,
                          const void *src, float *dst)
 {
+   /* Plain copies don't need to go through the format description. */
+   if (format == MESA_FORMAT_Z_FLOAT32) {
+      memcpy(dst, src, n * sizeof(float));
+      return;
+   }
+
    util_format_unpack_z_float((enum pipe_format)format, dst, src, n);
 }
 
@@ -62,6 +70,11 @@ static inline void
 _mesa_unpack_uint_z_row(mesa_format format, uint32_t n,
                         const void *src, uint32_t *dst)
 {
+   if (format == MESA_FORMAT_Z_UNORM32) {
+      memcpy(dst, src, n * sizeof(uint32_t));
+      return;
+   }
+
    util_format_unpack_z_32unorm((enum pipe_format)format, dst, src, n);
 }
 
@@ -69,6 +82,11 @@ static inline void
 _mesa_unpack_ubyte_stencil_row(mesa_format format, uint32_t n,
                                const void *src, uint8_t *dst)
 {
+   if (format == MESA_FORMAT_S_UINT8) {
+      memcpy(dst, src, n);
+      return;
+   }
+
    util_format_unpack_s_8uint((enum pipe_format)format, dst, src, n);
 }
 
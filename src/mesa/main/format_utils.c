@@ -377,12 +377,8 @@ _mesa_format_convert(void *void_dst, uint32_t dst_format, size_t dst_stride,
       /* Handle the cases where we can directly pack */
       if (!dst_format_is_mesa_array_format) {
          if (src_array_format == RGBA32_FLOAT) {
-            for (row = 0; row < height; ++row) {
-               _mesa_pack_float_rgba_row(dst_format, width,
-                                         (const float (*)[4])src, dst);
-               src += src_stride;
-               dst += dst_stride;
-            }
+            _mesa_pack_rgba_rect(dst_format, width, height,
+                                 src, src_stride, dst, dst_stride);
             return;
          } else if (src_array_format == RGBA8_UBYTE) {
             assert(!_mesa_is_format_integer_color(dst_format));
@@ -392,22 +388,15 @@ _mesa_format_convert(void *void_dst, uint32_t dst_format, size_t dst_stride,
                                           dst, dst_stride);
             }
             else {
-               for (row = 0; row < height; ++row) {
-                  _mesa_pack_ubyte_rgba_row(dst_format, width, src, dst);
-                  src += src_stride;
-                  dst += dst_stride;
-               }
+               _mesa_pack_ubyte_rgba_rect(dst_format, width, height,
+                                          src, src_stride, dst, dst_stride);
             }
             return;
          } else if (src_array_format == RGBA32_UINT &&
                     _mesa_is_format_unsigned(dst_format)) {
             assert(_mesa_is_format_integer_color(dst_format));
-            for (row = 0; row < height; ++row) {
-               _mesa_pack_uint_rgba_row(dst_format, width,
-                                        (const uint32_t (*)[4])src, dst);
-               src += src_stride;
-               dst += dst_stride;
-            }
+            _mesa_pack_rgba_rect(dst_format, width, height,
+                                 src, src_stride, dst, dst_stride);
             return;
          }
       }
@@ -562,11 +551,9 @@ _mesa_format_convert(void *void_dst, uint32_t dst_format, size_t dst_stride,
             dst += dst_stride;
          }
       } else {
-         for (row = 0; row < height; ++row) {
-            _mesa_pack_uint_rgba_row(dst_format, width,
-                                     (const uint32_t (*)[4])tmp_uint + row * width, dst);
-            dst += dst_stride;
-         }
+         _mesa_pack_rgba_rect(dst_format, width, height,
+                              tmp_uint, width * sizeof(*tmp_uint),
+                              dst, dst_stride);
       }
 
       free(tmp_uint);
@@ -606,11 +593,9 @@ _mesa_format_convert(void *void_dst, uint32_t dst_format, size_t dst_stride,
             dst += dst_stride;
          }
       } else {
-         for (row = 0; row < height; ++row) {
-            _mesa_pack_float_rgba_row(dst_format, width,
-                                      (const float (*)[4])tmp_float + row * width, dst);
-            dst += dst_stride;
-         }
+         _mesa_pack_rgba_rect(dst_format, width, height,
+                              tmp_float, width * sizeof(*tmp_float),
+                              dst, dst_stride);
       }
 
       free(tmp_float);
@@ -650,11 +635,9 @@ _mesa_format_convert(void *void_dst, uint32_t dst_format, size_t dst_stride,
             dst += dst_stride;
          }
       } else {
-         for (row = 0; row < height; ++row) {
-            _mesa_pack_ubyte_rgba_row(dst_format, width,
-                                      (const uint8_t *)(tmp_ubyte + row * width), dst);
-            dst += dst_stride;
-         }
+         _mesa_pack_ubyte_rgba_rect(dst_format, width, height,
+                                    (const uint8_t *)tmp_ubyte, width * sizeof(*tmp_ubyte),
+                                    dst, dst_stride);
       }
 
       free(tmp_ubyte);
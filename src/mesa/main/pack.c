@@ -58,6 +58,10 @@
 #include "format_unpack.h"
 #include "util/format/u_format.h"
 
+#ifdef __SSE2__
+#include <emmintrin.h>
+#endif
+
 /**
  * Flip the 8 bits in each byte of the given array.
  *
@@ -1661,6 +1665,9 @@ _mesa_unpack_ubyte_rgba_row(mesa_format format, uint32_t n,
    }
 }
 
+typedef void (*unpack_depth_stencil_func)(const uint32_t *restrict src,
+                                          uint32_t *restrict dst, uint32_t n);
+
 /** Helper struct for MESA_FORMAT_Z32_FLOAT_S8X24_UINT */
 struct z32f_x24s8
 {
@@ -1670,23 +1677,46 @@ struct z32f_x24s8
 
 
 static void
-unpack_uint_24_8_depth_stencil_Z24_UNORM_S8_UINT(const uint32_t *src, uint32_t *dst, uint32_t n)
+unpack_uint_24_8_depth_stencil_Z24_UNORM_S8_UINT(const uint32_t *restrict src, uint32_t *restrict dst, uint32_t n)
 {
-   uint32_t i;
+   uint32_t i = 0;
+
+#ifdef __SSE2__
+   /* rotate 4 values at a time */
+   for (; i + 4 <= n; i += 4) {
+      __m128i val = _mm_loadu_si128((const __m128i *)(src + i));
+      val = _mm_or_si128(_mm_srli_epi32(val, 24), _mm_slli_epi32(val, 8));
+      _mm_storeu_si128((__m128i *)(dst + i), val);
+   }
+#endif
 
-   for (i = 0; i < n; i++) {
+   for (; i < n; i++) {
       uint32_t val = src[i];
       dst[i] = val >> 24 | val << 8;
    }
 }
 
 static void
-unpack_uint_24_8_depth_stencil_Z32_S8X24(const uint32_t *src,
-                                         uint32_t *dst, uint32_t n)
+unpack_uint_24_8_depth_stencil_Z32_S8X24(const uint32_t *restrict src,
+                                         uint32_t *restrict dst, uint32_t n)
 {
-   uint32_t i;
+   uint32_t i = 0;
+
+#ifdef __SSE2__
+   /* split the depth and stencil of 4 pixels at a time */
+   for (; i + 4 <= n; i += 4) {
+      __m128 lo = _mm_loadu_ps((const float *) (src + i * 2));
+      __m128 hi = _mm_loadu_ps((const float *) (src + i * 2 + 4));
+      __m128 zf = _mm_shuffle_ps(lo, hi, _MM_SHUFFLE(2, 0, 2, 0));
+      __m128i s = _mm_castps_si128(_mm_shuffle_ps(lo, hi, _MM_SHUFFLE(3, 1, 3, 1)));
+      __m128i z24 = _mm_cvttps_epi32(_mm_mul_ps(zf, _mm_set1_ps((float) 0xffffff)));
+      _mm_storeu_si128((__m128i *) (dst + i),
+                       _mm_or_si128(_mm_slli_epi32(z24, 8),
+                                    _mm_and_si128(s, _mm_set1_epi32(0xff))));
+   }
+#endif
 
-   for (i = 0; i < n; i++) {
+   for (; i < n; i++) {
       /* 8 bytes per pixel (float + uint32) */
       float zf = ((float *) src)[i * 2 + 0];
       uint32_t z24 = (uint32_t) (zf * (float) 0xffffff);
@@ -1695,11 +1725,10 @@ unpack_uint_24_8_depth_stencil_Z32_S8X24(const uint32_t *src,
    }
 }
 
-static void
-unpack_uint_24_8_depth_stencil_S8_UINT_Z24_UNORM(const uint32_t *src, uint32_t *dst, uint32_t n)
-{
-   memcpy(dst, src, n * 4);
-}
+static const unpack_depth_stencil_func unpack_uint_24_8_depth_stencil_funcs[] = {
+   [MESA_FORMAT_Z24_UNORM_S8_UINT] = unpack_uint_24_8_depth_stencil_Z24_UNORM_S8_UINT,
+   [MESA_FORMAT_Z32_FLOAT_S8X24_UINT] = unpack_uint_24_8_depth_stencil_Z32_S8X24,
+};
 
 /**
  * Unpack depth/stencil returning as GL_UNSIGNED_INT_24_8.
@@ -1709,62 +1738,84 @@ void
 _mesa_unpack_uint_24_8_depth_stencil_row(mesa_format format, uint32_t n,
                                          const void *src, uint32_t *dst)
 {
-   switch (format) {
-   case MESA_FORMAT_S8_UINT_Z24_UNORM:
-      unpack_uint_24_8_depth_stencil_S8_UINT_Z24_UNORM(src, dst, n);
-      break;
-   case MESA_FORMAT_Z24_UNORM_S8_UINT:
-      unpack_uint_24_8_depth_stencil_Z24_UNORM_S8_UINT(src, dst, n);
-      break;
-   case MESA_FORMAT_Z32_FLOAT_S8X24_UINT:
-      unpack_uint_24_8_depth_stencil_Z32_S8X24(src, dst, n);
-      break;
-   default:
-      unreachable("bad format %s in _mesa_unpack_uint_24_8_depth_stencil_row");
+   /* plain copies are not in the table */
+   if (format == MESA_FORMAT_S8_UINT_Z24_UNORM) {
+      memcpy(dst, src, n * 4);
+      return;
    }
+
+   assert(format < ARRAY_SIZE(unpack_uint_24_8_depth_stencil_funcs) &&
+          unpack_uint_24_8_depth_stencil_funcs[format]);
+
+   unpack_uint_24_8_depth_stencil_funcs[format](src, dst, n);
+}
+
+#ifdef __SSE2__
+/**
+ * Stores 4 z32f_x24s8 values from 24-bit depth and stencil values.  Dividing
+ * in float precision, like the scalar code, gives the same results as the
+ * multiplication by 1.0 / 0xffffff in double precision for any 24-bit depth.
+ */
+static inline void
+store_z32f_x24s8_sse2(struct z32f_x24s8 *d, __m128i z24, __m128i s)
+{
+   __m128i z = _mm_castps_si128(_mm_div_ps(_mm_cvtepi32_ps(z24),
+                                           _mm_set1_ps((float) 0xffffff)));
+
+   _mm_storeu_si128((__m128i *) d, _mm_unpacklo_epi32(z, s));
+   _mm_storeu_si128((__m128i *) (d + 2), _mm_unpackhi_epi32(z, s));
 }
+#endif
 
 static void
-unpack_float_32_uint_24_8_Z24_UNORM_S8_UINT(const uint32_t *src,
-                                            uint32_t *dst, uint32_t n)
+unpack_float_32_uint_24_8_Z24_UNORM_S8_UINT(const uint32_t *restrict src,
+                                            uint32_t *restrict dst, uint32_t n)
 {
-   uint32_t i;
+   uint32_t i = 0;
    struct z32f_x24s8 *d = (struct z32f_x24s8 *) dst;
-   const double scale = 1.0 / (double) 0xffffff;
 
-   for (i = 0; i < n; i++) {
+#ifdef __SSE2__
+   for (; i + 4 <= n; i += 4) {
+      __m128i val = _mm_loadu_si128((const __m128i *) (src + i));
+      store_z32f_x24s8_sse2(d + i, _mm_and_si128(val, _mm_set1_epi32(0xffffff)),
+                            _mm_srli_epi32(val, 24));
+   }
+#endif
+
+   for (; i < n; i++) {
       const uint32_t z24 = src[i] & 0xffffff;
-      d[i].z = z24 * scale;
+      d[i].z = (float) z24 / (float) 0xffffff;
       d[i].x24s8 = src[i] >> 24;
-      assert(d[i].z >= 0.0f);
-      assert(d[i].z <= 1.0f);
    }
 }
 
 static void
-unpack_float_32_uint_24_8_Z32_FLOAT_S8X24_UINT(const uint32_t *src,
-                                               uint32_t *dst, uint32_t n)
-{
-   memcpy(dst, src, n * sizeof(struct z32f_x24s8));
-}
-
-static void
-unpack_float_32_uint_24_8_S8_UINT_Z24_UNORM(const uint32_t *src,
-                                            uint32_t *dst, uint32_t n)
+unpack_float_32_uint_24_8_S8_UINT_Z24_UNORM(const uint32_t *restrict src,
+                                            uint32_t *restrict dst, uint32_t n)
 {
-   uint32_t i;
+   uint32_t i = 0;
    struct z32f_x24s8 *d = (struct z32f_x24s8 *) dst;
-   const double scale = 1.0 / (double) 0xffffff;
 
-   for (i = 0; i < n; i++) {
+#ifdef __SSE2__
+   for (; i + 4 <= n; i += 4) {
+      __m128i val = _mm_loadu_si128((const __m128i *) (src + i));
+      store_z32f_x24s8_sse2(d + i, _mm_srli_epi32(val, 8),
+                            _mm_and_si128(val, _mm_set1_epi32(0xff)));
+   }
+#endif
+
+   for (; i < n; i++) {
       const uint32_t z24 = src[i] >> 8;
-      d[i].z = z24 * scale;
+      d[i].z = (float) z24 / (float) 0xffffff;
       d[i].x24s8 = src[i] & 0xff;
-      assert(d[i].z >= 0.0f);
-      assert(d[i].z <= 1.0f);
    }
 }
 
+static const unpack_depth_stencil_func unpack_float_32_uint_24_8_funcs[] = {
+   [MESA_FORMAT_S8_UINT_Z24_UNORM] = unpack_float_32_uint_24_8_S8_UINT_Z24_UNORM,
+   [MESA_FORMAT_Z24_UNORM_S8_UINT] = unpack_float_32_uint_24_8_Z24_UNORM_S8_UINT,
+};
+
 /**
  * Unpack depth/stencil returning as GL_FLOAT_32_UNSIGNED_INT_24_8_REV.
  * \param format  the source data format
@@ -1783,17 +1834,14 @@ void
 _mesa_unpack_float_32_uint_24_8_depth_stencil_row(mesa_format format, uint32_t n,
                                                   const void *src, uint32_t *dst)
 {
-   switch (format) {
-   case MESA_FORMAT_S8_UINT_Z24_UNORM:
-      unpack_float_32_uint_24_8_S8_UINT_Z24_UNORM(src, dst, n);
-      break;
-   case MESA_FORMAT_Z24_UNORM_S8_UINT:
-      unpack_float_32_uint_24_8_Z24_UNORM_S8_UINT(src, dst, n);
-      break;
-   case MESA_FORMAT_Z32_FLOAT_S8X24_UINT:
-      unpack_float_32_uint_24_8_Z32_FLOAT_S8X24_UINT(src, dst, n);
-      break;
-   default:
-      unreachable("bad format %s in _mesa_unpack_uint_24_8_depth_stencil_row");
+   /* plain copies are not in the table */
+   if (format == MESA_FORMAT_Z32_FLOAT_S8X24_UINT) {
+      memcpy(dst, src, n * sizeof(struct z32f_x24s8));
+      return;
    }
+
+   assert(format < ARRAY_SIZE(unpack_float_32_uint_24_8_funcs) &&
+          unpack_float_32_uint_24_8_funcs[format]);
+
+   unpack_float_32_uint_24_8_funcs[format](src, dst, n);
 }
@@ -659,11 +659,19 @@ fast_read_depth_stencil_pixels(struct gl_context *ctx,
       return GL_TRUE;  /* don't bother trying the slow path */
    }
 
-   for (i = 0; i < height; i++) {
-      _mesa_unpack_uint_24_8_depth_stencil_row(rb->Format, width,
+   if (stride == width * 4 && dstStride == stride) {
+      /* The rows are contiguous in both, so convert them as one long row,
+       * which for S8_UINT_Z24_UNORM is a single memcpy of the whole image.
+       */
+      _mesa_unpack_uint_24_8_depth_stencil_row(rb->Format, width * height,
 					       map, (GLuint *)dst);
-      map += stride;
-      dst += dstStride;
+   } else {
+      for (i = 0; i < height; i++) {
+         _mesa_unpack_uint_24_8_depth_stencil_row(rb->Format, width,
+                                                  map, (GLuint *)dst);
+         map += stride;
+         dst += dstStride;
+      }
    }
 
    ctx->Driver.UnmapRenderbuffer(ctx, rb);
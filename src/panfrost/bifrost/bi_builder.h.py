@@ -97,20 +97,38 @@ def condition(opcode, typecheck, sizecheck):
 def to_suffix(op):
     return "_to" if op["dests"] > 0 else ""
 
+def index_array(prefix, count):
+    if count == 0:
+        return "NULL"
+
+    return "(bi_index []) {{ {} }}".format(", ".join(["{}{}".format(prefix, i) for i in range(count)]))
+
 %>
 
+/* Shared by all builder routines, which only set the modifiers and immediates
+ * of the instruction on top. The counts are constant in each caller, so the
+ * copies are unrolled once this is inlined. Only the fields that are not
+ * written here are cleared, the link is set by the insertion. */
+static inline
+bi_instr * bi_build_instr(bi_builder *b, enum bi_opcode op, unsigned nr_dests, const bi_index *dests, unsigned nr_srcs, const bi_index *srcs)
+{
+    bi_instr *I = linear_alloc_child(b->shader->lin_ctx, sizeof(bi_instr));
+    memset(&I->use, 0, sizeof(I->use));
+    I->op = op;
+    for (unsigned i = 0; i < BI_MAX_DESTS; ++i)
+        I->dest[i] = i < nr_dests ? dests[i] : bi_null();
+    for (unsigned i = 0; i < BI_MAX_SRCS; ++i)
+        I->src[i] = i < nr_srcs ? srcs[i] : bi_null();
+    memset(&I->branch_target, 0, sizeof(bi_instr) - offsetof(bi_instr, branch_target));
+    bi_builder_insert(&b->cursor, I);
+    return I;
+}
+
 % for opcode in ops:
 static inline
-bi_instr * bi_${opcode.replace('.', '_').lower()}${to_suffix(ops[opcode])}(${signature(ops[opcode], modifiers)})
+bi_instr * bi_${names[opcode]}${to_suffix(ops[opcode])}(${signature(opcode)})
 {
-    bi_instr *I = rzalloc(b->shader, bi_instr);
-    I->op = BI_OPCODE_${opcode.replace('.', '_').upper()};
-% for dest in range(ops[opcode]["dests"]):
-    I->dest[${dest}] = dest${dest};
-% endfor
-% for src in range(src_count(ops[opcode])):
-    I->src[${src}] = src${src};
-% endfor
+    bi_instr *I = bi_build_instr(b, BI_OPCODE_${names[opcode].upper()}, ${ops[opcode]["dests"]}, ${index_array("dest", ops[opcode]["dests"])}, ${src_count(ops[opcode])}, ${index_array("src", src_count(ops[opcode]))});
 % for mod in ops[opcode]["modifiers"]:
 % if mod[0:-1] not in SKIP and mod not in SKIP:
     I->${mod} = ${mod};
@@ -122,22 +140,22 @@ bi_instr * bi_${opcode.replace('.', '_').lower()}${to_suffix(ops[opcode])}(${sig
 % if opcode in ZEXT_DEFAULT:
     I->extend = BI_EXTEND_ZEXT;
 % endif
-    bi_builder_insert(&b->cursor, I);
     return I;
 }
 
 % if ops[opcode]["dests"] == 1:
 static inline
-bi_index bi_${opcode.replace('.', '_').lower()}(${signature(ops[opcode], modifiers, no_dests=True)})
+bi_index bi_${names[opcode]}(${signature(opcode, no_dests=True)})
 {
-    return (bi_${opcode.replace('.', '_').lower()}_to(${arguments(ops[opcode])}))->dest[0];
+    return (bi_${names[opcode]}_to(${arguments(opcode)}))->dest[0];
 }
 
 %endif
+%endfor
+% for common_op, variants in groups.items():
 <%
-    common_op = opcode.split('.')[0]
-    variants = [a for a in ops.keys() if a.split('.')[0] == common_op]
-    signatures = [signature(ops[op], modifiers, no_dests=True) for op in variants]
+    opcode = variants[-1]
+    signatures = [signature(op, no_dests=True) for op in variants]
     homogenous = all([sig == signatures[0] for sig in signatures])
     types = [nirtypes(x) for x in variants]
     typeful = False
@@ -151,20 +169,35 @@ bi_index bi_${opcode.replace('.', '_').lower()}(${signature(ops[opcode], modifie
         if size != sizes[0]:
             sized = True
 
-    last = opcode == variants[-1]
+    # When only the bitsize selects the variant, switch on it. Callers mostly
+    # pass a constant bitsize, so forcing the inlining folds the switch away.
+    switched = sized and not typeful and None not in sizes and \
+               len(set(sizes)) == len(sizes) and \
+               not any("cmpf" in ops[x]["modifiers"] for x in variants)
 %>
-% if homogenous and len(variants) > 1 and last:
+% if homogenous and len(variants) > 1:
 % for (suffix, temp, dests, ret) in (('_to', False, 1, 'instr *'), ('', True, 0, 'index')):
 % if not temp or ops[opcode]["dests"] > 0:
-static inline
-bi_${ret} bi_${common_op.replace('.', '_').lower()}${suffix if ops[opcode]['dests'] > 0 else ''}(${signature(ops[opcode], modifiers, typeful=typeful, sized=sized, no_dests=not dests)})
+static ${"ALWAYS_INLINE" if switched else "inline"}
+bi_${ret} bi_${common_op.replace('.', '_').lower()}${suffix if ops[opcode]['dests'] > 0 else ''}(${signature(opcode, typeful=typeful, sized=sized, no_dests=not dests)})
 {
+% if switched:
+    switch (bitsize) {
+% for variant in variants:
+    case ${typesize(variant)}:
+        return (bi_${names[variant]}${to_suffix(ops[opcode])}(${arguments(opcode, temp_dest = temp)}))${"->dest[0]" if temp else ""};
+% endfor
+    default:
+        unreachable("Invalid parameters for ${common_op}");
+    }
+% else:
 % for i, variant in enumerate(variants):
     ${"{}if ({})".format("else " if i > 0 else "", condition(variant, typeful, sized))}
-        return (bi_${variant.replace('.', '_').lower()}${to_suffix(ops[opcode])}(${arguments(ops[opcode], temp_dest = temp)}))${"->dest[0]" if temp else ""};
+        return (bi_${names[variant]}${to_suffix(ops[opcode])}(${arguments(opcode, temp_dest = temp)}))${"->dest[0]" if temp else ""};
 % endfor
     else
         unreachable("Invalid parameters for ${common_op}");
+% endif
 }
 
 %endif
@@ -173,6 +206,7 @@ bi_${ret} bi_${common_op.replace('.', '_').lower()}${suffix if ops[opcode]['dest
 %endfor
 #endif"""
 
+import functools
 import sys
 from bifrost_isa import *
 from mako.template import Template
@@ -181,15 +215,22 @@ instructions = parse_instructions(sys.argv[1], include_pseudo = True)
 ir_instructions = partition_mnemonics(instructions)
 modifier_lists = order_modifiers(ir_instructions)
 
+# The helpers below are called over and over with the same opcode while
+# rendering, for each variant of its group, so cache their results by opcode
+
 # Generate type signature for a builder routine
 
 def should_skip(mod):
     return mod in SKIP or mod[0:-1] in SKIP
 
-def modifier_signature(op):
+@functools.lru_cache(maxsize = None)
+def modifier_signature(opcode):
+    op = ir_instructions[opcode]
     return sorted([m for m in op["modifiers"].keys() if not should_skip(m)])
 
-def signature(op, modifiers, typeful = False, sized = False, no_dests = False):
+@functools.lru_cache(maxsize = None)
+def signature(opcode, typeful = False, sized = False, no_dests = False):
+    op = ir_instructions[opcode]
     return ", ".join(
         ["bi_builder *b"] +
         (["nir_alu_type type"] if typeful == True else []) +
@@ -197,18 +238,28 @@ def signature(op, modifiers, typeful = False, sized = False, no_dests = False):
         ["bi_index dest{}".format(i) for i in range(0 if no_dests else op["dests"])] +
         ["bi_index src{}".format(i) for i in range(src_count(op))] +
         ["{} {}".format(
-        "bool" if len(modifiers[T[0:-1]] if T[-1] in "0123" else modifiers[T]) == 2 else
+        "bool" if len(modifier_lists[T[0:-1]] if T[-1] in "0123" else modifier_lists[T]) == 2 else
         "enum bi_" + T[0:-1] if T[-1] in "0123" else
         "enum bi_" + T,
-        T) for T in modifier_signature(op)] +
+        T) for T in modifier_signature(opcode)] +
         ["uint32_t {}".format(imm) for imm in op["immediates"]])
 
-def arguments(op, temp_dest = True):
+@functools.lru_cache(maxsize = None)
+def arguments(opcode, temp_dest = True):
+    op = ir_instructions[opcode]
     return ", ".join(
         ["b"] +
         ["bi_temp(b->shader)" if temp_dest else 'dest{}'.format(i) for i in range(op["dests"])] +
         ["src{}".format(i) for i in range(src_count(op))] +
-        modifier_signature(op) +
+        modifier_signature(opcode) +
         op["immediates"])
 
-print(Template(COPYRIGHT + TEMPLATE).render(ops = ir_instructions, modifiers = modifier_lists, signature = signature, arguments = arguments, src_count = src_count, SKIP = SKIP))
+# C name of each opcode, as used in the routine names and BI_OPCODE_*
+names = { opcode: opcode.replace('.', '_').lower() for opcode in ir_instructions }
+
+# Variants of each opcode, e.g. FADD.f32 and FADD.v2f16 for FADD, in order
+groups = {}
+for opcode in ir_instructions:
+    groups.setdefault(opcode.split('.')[0], []).append(opcode)
+
+print(Template(COPYRIGHT + TEMPLATE).render(ops = ir_instructions, names = names, groups = groups, signature = signature, arguments = arguments, src_count = src_count, SKIP = SKIP))
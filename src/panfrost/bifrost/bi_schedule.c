@@ -1618,6 +1618,7 @@ static bi_builder *
 bit_builder(void *memctx)
 {
         bi_context *ctx = rzalloc(memctx, bi_context);
+        ctx->lin_ctx = linear_zalloc_parent(ctx, 0);
         list_inithead(&ctx->blocks);
 
         bi_block *blk = rzalloc(ctx, bi_block);
@@ -3158,6 +3158,7 @@ bifrost_compile_shader_nir(nir_shader *nir,
         bifrost_debug = debug_get_option_bifrost_debug();
 
         bi_context *ctx = rzalloc(NULL, bi_context);
+        ctx->lin_ctx = linear_zalloc_parent(ctx, 0);
         ctx->sysval_to_id = panfrost_init_sysvals(&info->sysvals, ctx);
 
         ctx->inputs = inputs;
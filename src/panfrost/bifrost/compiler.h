@@ -547,6 +547,9 @@ typedef struct {
        unsigned ssa_alloc;
        unsigned reg_alloc;
 
+       /* Linear allocator for instructions, freed with the context */
+       void *lin_ctx;
+
        /* Analysis results */
        bool has_liveness;
 
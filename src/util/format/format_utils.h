@@ -74,6 +74,12 @@ _mesa_snorm_to_half(int x, unsigned src_bits)
 static inline unsigned
 _mesa_float_to_unorm(float x, unsigned dst_bits)
 {
+   /* Clamping before the scale compiles to min/max instead of branches, but
+    * the scale is only exact as a float up to 24 bits.
+    */
+   if (dst_bits <= 24)
+      return _mesa_i64roundevenf(CLAMP(x, 0.0f, 1.0f) * MAX_UINT(dst_bits));
+
    if (x < 0.0f)
       return 0;
    else if (x > 1.0f)
@@ -111,15 +117,16 @@ _mesa_unorm_to_unorm(unsigned x, unsigned src_bits, unsigned dst_bits)
 static inline unsigned
 _mesa_snorm_to_unorm(int x, unsigned src_bits, unsigned dst_bits)
 {
-   if (x < 0)
-      return 0;
-   else
-      return _mesa_unorm_to_unorm(x, src_bits - 1, dst_bits);
+   return _mesa_unorm_to_unorm(MAX2(x, 0), src_bits - 1, dst_bits);
 }
 
 static inline int
 _mesa_float_to_snorm(float x, unsigned dst_bits)
 {
+   /* See _mesa_float_to_unorm() */
+   if (dst_bits <= 25)
+      return _mesa_lroundevenf(CLAMP(x, -1.0f, 1.0f) * MAX_INT(dst_bits));
+
    if (x < -1.0f)
       return -MAX_INT(dst_bits);
    else if (x > 1.0f)
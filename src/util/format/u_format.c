@@ -1132,12 +1132,61 @@ util_format_rgb_to_bgr(enum pipe_format format)
    }
 }
 
+static const struct util_format_pack_description *util_format_pack_table[PIPE_FORMAT_COUNT];
+
+static void
+util_format_pack_table_init(void)
+{
+#ifdef UTIL_FORMAT_PACK_AVX2
+   util_cpu_detect();
+#endif
+
+   for (enum pipe_format format = PIPE_FORMAT_NONE; format < PIPE_FORMAT_COUNT; format++) {
+#ifdef UTIL_FORMAT_PACK_AVX2
+      const struct util_format_pack_description *pack = util_format_pack_description_avx2(format);
+      if (pack) {
+         util_format_pack_table[format] = pack;
+         continue;
+      }
+#endif
+#if (defined(PIPE_ARCH_AARCH64) || defined(PIPE_ARCH_ARM)) && !defined NO_FORMAT_ASM
+      const struct util_format_pack_description *pack = util_format_pack_description_neon(format);
+      if (pack) {
+         util_format_pack_table[format] = pack;
+         continue;
+      }
+#endif
+
+      util_format_pack_table[format] = util_format_pack_description_generic(format);
+   }
+}
+
+const struct util_format_pack_description *
+util_format_pack_description(enum pipe_format format)
+{
+   static once_flag flag = ONCE_FLAG_INIT;
+   call_once(&flag, util_format_pack_table_init);
+
+   return util_format_pack_table[format];
+}
+
 static const struct util_format_unpack_description *util_format_unpack_table[PIPE_FORMAT_COUNT];
 
 static void
 util_format_unpack_table_init(void)
 {
+#ifdef UTIL_FORMAT_PACK_AVX2
+   util_cpu_detect();
+#endif
+
    for (enum pipe_format format = PIPE_FORMAT_NONE; format < PIPE_FORMAT_COUNT; format++) {
+#ifdef UTIL_FORMAT_PACK_AVX2
+      const struct util_format_unpack_description *unpack = util_format_unpack_description_avx2(format);
+      if (unpack) {
+         util_format_unpack_table[format] = unpack;
+         continue;
+      }
+#endif
 #if (defined(PIPE_ARCH_AARCH64) || defined(PIPE_ARCH_ARM)) && !defined NO_FORMAT_ASM
       const struct util_format_unpack_description *unpack = util_format_unpack_description_neon(format);
       if (unpack) {
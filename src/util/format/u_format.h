@@ -401,6 +401,13 @@ struct util_format_unpack_description {
                      unsigned width, unsigned height);
 };
 
+/* Whether the pack and unpack code specialized for AVX2 is built.  It is only
+ * chosen when the CPU supports AVX2.
+ */
+#if defined(PIPE_ARCH_SSSE3) && defined(PIPE_CC_GCC) && !defined NO_FORMAT_ASM
+#define UTIL_FORMAT_PACK_AVX2 1
+#endif
+
 typedef void (*util_format_fetch_rgba_func_ptr)(void *restrict dst, const uint8_t *restrict src,
                                                 unsigned i, unsigned j);
 
@@ -412,9 +419,20 @@ typedef void (*util_format_fetch_rgba_func_ptr)(void *restrict dst, const uint8_
 const struct util_format_description *
 util_format_description(enum pipe_format format) ATTRIBUTE_CONST;
 
+/* Lookup with CPU detection for choosing optimized paths. */
 const struct util_format_pack_description *
 util_format_pack_description(enum pipe_format format) ATTRIBUTE_CONST;
 
+/* Codegenned table of CPU-agnostic pack code. */
+const struct util_format_pack_description *
+util_format_pack_description_generic(enum pipe_format format) ATTRIBUTE_CONST;
+
+const struct util_format_pack_description *
+util_format_pack_description_avx2(enum pipe_format format) ATTRIBUTE_CONST;
+
+const struct util_format_pack_description *
+util_format_pack_description_neon(enum pipe_format format) ATTRIBUTE_CONST;
+
 /* Lookup with CPU detection for choosing optimized paths. */
 const struct util_format_unpack_description *
 util_format_unpack_description(enum pipe_format format) ATTRIBUTE_CONST;
@@ -423,6 +441,9 @@ util_format_unpack_description(enum pipe_format format) ATTRIBUTE_CONST;
 const struct util_format_unpack_description *
 util_format_unpack_description_generic(enum pipe_format format) ATTRIBUTE_CONST;
 
+const struct util_format_unpack_description *
+util_format_unpack_description_avx2(enum pipe_format format) ATTRIBUTE_CONST;
+
 const struct util_format_unpack_description *
 util_format_unpack_description_neon(enum pipe_format format) ATTRIBUTE_CONST;
 
@@ -653,7 +653,13 @@ def generate_format_pack(format, src_channel, src_native_type, src_suffix):
     print('void util_format_%s_pack_%s(uint8_t *restrict dst_row, unsigned dst_stride, const %s *restrict src_row, unsigned src_stride, unsigned width, unsigned height);' %
           (name, src_suffix, src_native_type), file=sys.stdout2)
     
-    if is_format_supported(format):
+    if src_suffix == 'rgba_8unorm' and is_pack_8unorm_copy(format):
+        print('   for(unsigned y = 0; y < height; y += 1) {')
+        print('      memcpy(dst_row, src_row, width * 4);')
+        print('      dst_row += dst_stride;')
+        print('      src_row += src_stride/sizeof(*src_row);')
+        print('   }')
+    elif is_format_supported(format):
         print('   unsigned x, y;')
         print('   for(y = 0; y < height; y += %u) {' % (format.block_height,))
         print('      const %s *src = src_row;' % (src_native_type))
@@ -673,6 +679,400 @@ def generate_format_pack(format, src_channel, src_native_type, src_suffix):
     print()
     
 
+def pack_8unorm_byte_shuffle(format):
+    '''Get the index of the source byte of each destination byte of a pixel
+    when packing from R8G8B8A8_UNORM into this format is a plain byte shuffle,
+    with None for the bytes that are zeroed.  Returns None for formats that
+    need any conversion.'''
+
+    if not is_format_supported(format) or is_format_hand_written(format):
+        return None
+    if format.colorspace != RGB or format.is_pure_color():
+        return None
+    if format.block_width != 1 or format.block_size() not in (24, 32):
+        return None
+
+    inv_swizzle = inv_swizzles(format.le_swizzles)
+
+    shuffle = [None] * (format.block_size() // 8)
+    for i in range(4):
+        channel = format.le_channels[i]
+        if not channel.size:
+            continue
+        if channel.size != 8 or channel.shift % 8:
+            return None
+        if channel.type == UNSIGNED and channel.norm:
+            shuffle[channel.shift // 8] = inv_swizzle[i]
+        elif channel.type != VOID:
+            return None
+
+    return shuffle
+
+
+def is_pack_8unorm_copy(format):
+    '''Whether packing from R8G8B8A8_UNORM into this format leaves the bytes
+    as they are.'''
+
+    return format.is_array() and pack_8unorm_byte_shuffle(format) == [0, 1, 2, 3]
+
+
+def pack_8unorm_avx2_shuffle(format):
+    '''Get the byte shuffle of the AVX2 function packing from R8G8B8A8_UNORM
+    into this format, or None if there is none.  Plain copies are left to
+    memcpy.'''
+
+    if is_pack_8unorm_copy(format):
+        return None
+    return pack_8unorm_byte_shuffle(format)
+
+
+def pack_8unorm_avx2_channels(format):
+    '''Get the source byte, size and shift of each channel of a 16 or 32-bit
+    bitmask format with only unorm channels, which the AVX2 function packing
+    from R8G8B8A8_UNORM converts with one pixel per 32-bit lane, or None for
+    other formats.  Plain copies are left to memcpy.'''
+
+    if not is_format_supported(format) or is_format_hand_written(format):
+        return None
+    if format.colorspace != RGB or format.is_pure_color():
+        return None
+    if not format.is_bitmask() or format.block_size() not in (16, 32):
+        return None
+    if is_pack_8unorm_copy(format):
+        return None
+
+    inv_swizzle = inv_swizzles(format.le_swizzles)
+
+    channels = []
+    for i in range(4):
+        channel = format.le_channels[i]
+        if not channel.size or channel.type == VOID:
+            continue
+        if channel.type != UNSIGNED or not channel.norm:
+            return None
+        if inv_swizzle[i] is not None:
+            channels.append((inv_swizzle[i], channel.size, channel.shift))
+
+    return channels
+
+
+def has_pack_8unorm_avx2(format):
+    '''Whether an AVX2 function packing from R8G8B8A8_UNORM is generated for
+    this format.'''
+
+    return (pack_8unorm_avx2_shuffle(format) is not None or
+            pack_8unorm_avx2_channels(format) is not None)
+
+
+def avx2_byte_shuffle_mask(shuffle):
+    '''Get the _mm256_shuffle_epi8 mask applying the byte shuffle of a pixel,
+    with the index of the source byte of each destination byte, to 8 pixels of
+    4 bytes.  The destination pixels are packed at the start of each 128-bit
+    lane.'''
+
+    # _mm256_shuffle_epi8 shuffles each 128-bit lane separately, so the mask
+    # handles the 4 pixels of a lane, and is repeated for both lanes.
+    mask = []
+    for i in range(4):
+        for src_byte in shuffle:
+            mask.append(-1 if src_byte is None else i * 4 + src_byte)
+    mask += [-1] * (16 - len(mask))
+    return '_mm256_setr_epi8(%s)' % ', '.join(str(x) for x in mask * 2)
+
+
+def generate_format_pack_avx2(format):
+    '''Generate the function to pack pixels from R8G8B8A8_UNORM with AVX2,
+    8 pixels at a time'''
+
+    name = format.short_name()
+    bpp = format.block_size() // 8
+    shuffle = pack_8unorm_avx2_shuffle(format)
+
+    print('static void __attribute__((target("avx2")))')
+    print('util_format_%s_pack_rgba_8unorm_avx2(uint8_t *restrict dst_row, unsigned dst_stride, const uint8_t *restrict src_row, unsigned src_stride, unsigned width, unsigned height)' % name)
+    print('{')
+    if shuffle is not None:
+        print('   const __m256i shuffle = %s;' % avx2_byte_shuffle_mask(shuffle))
+        if bpp == 3:
+            print('   const __m256i compact = _mm256_setr_epi32(0, 1, 2, 4, 5, 6, 7, 7);')
+    elif any(src_byte < 3 for src_byte, _, _ in pack_8unorm_avx2_channels(format)):
+        print('   const __m256i byte_mask = _mm256_set1_epi32(0xff);')
+    print('   for (unsigned y = 0; y < height; y++) {')
+    print('      const uint8_t *src = src_row;')
+    print('      uint8_t *dst = dst_row;')
+    print('      unsigned x;')
+    print('      for (x = 0; x + 8 <= width; x += 8) {')
+    print('         __m256i pixels = _mm256_loadu_si256((const __m256i *)src);')
+    if shuffle is not None:
+        print('         pixels = _mm256_shuffle_epi8(pixels, shuffle);')
+    else:
+        # Each 32-bit lane holds one pixel, so every channel is extracted,
+        # converted and shifted into place for the 8 pixels at once.
+        print('         __m256i value = _mm256_setzero_si256();')
+        for src_byte, size, shift in pack_8unorm_avx2_channels(format):
+            value = 'pixels'
+            if src_byte:
+                value = '_mm256_srli_epi32(%s, %u)' % (value, src_byte * 8)
+            if src_byte < 3:
+                value = '_mm256_and_si256(%s, byte_mask)' % value
+            if size != 8:
+                value = 'util_format_unorm8_to_unorm_avx2(%s, %u)' % (value, size)
+            if shift:
+                value = '_mm256_slli_epi32(%s, %u)' % (value, shift)
+            print('         value = _mm256_or_si256(value, %s);' % value)
+        if bpp == 4:
+            print('         pixels = value;')
+        else:
+            # Narrow the lanes to 16 bits, and gather the 8 values of both
+            # 128-bit lanes in the lower one.
+            print('         pixels = _mm256_packus_epi32(value, value);')
+            print('         pixels = _mm256_permute4x64_epi64(pixels, 0x08);')
+    if bpp == 4:
+        print('         _mm256_storeu_si256((__m256i *)dst, pixels);')
+    elif bpp == 3:
+        # Move the 12 bytes of the upper lane right after the 12 bytes of
+        # the lower lane, and store just the 24 bytes of the 8 pixels.
+        print('         pixels = _mm256_permutevar8x32_epi32(pixels, compact);')
+        print('         _mm_storeu_si128((__m128i *)dst, _mm256_castsi256_si128(pixels));')
+        print('         _mm_storel_epi64((__m128i *)(dst + 16), _mm256_extracti128_si256(pixels, 1));')
+    else:
+        print('         _mm_storeu_si128((__m128i *)dst, _mm256_castsi256_si128(pixels));')
+    print('         src += 32;')
+    print('         dst += %u;' % (bpp * 8))
+    print('      }')
+    print('      if (x < width)')
+    print('         util_format_%s_pack_rgba_8unorm(dst, 0, src, 0, width - x, 1);' % name)
+    print('      dst_row += dst_stride;')
+    print('      src_row += src_stride;')
+    print('   }')
+    print('}')
+
+
+def unpack_8unorm_avx2_channels(format):
+    '''Get the shift, size and destination components of each channel of an
+    8, 16 or 32-bit bitmask format with only unorm channels of up to 8 bits,
+    which the AVX2 function unpacking into R8G8B8A8_UNORM extracts with one
+    pixel per 32-bit lane, or None for other formats.'''
+
+    if not is_format_supported(format) or is_format_hand_written(format):
+        return None
+    if format.colorspace != RGB or format.is_pure_color():
+        return None
+    if not format.is_bitmask():
+        return None
+
+    channels = []
+    for i in range(format.nr_channels()):
+        channel = format.le_channels[i]
+        if channel.type == VOID:
+            continue
+        if channel.type != UNSIGNED or not channel.norm or channel.size > 8:
+            return None
+        components = [j for j in range(4) if format.le_swizzles[j] == i]
+        if components:
+            channels.append((channel.shift, channel.size, components))
+
+    return channels
+
+
+def has_unpack_8unorm_avx2(format):
+    '''Whether an AVX2 function unpacking into R8G8B8A8_UNORM is generated
+    for this format.'''
+
+    return bool(unpack_8unorm_avx2_channels(format))
+
+
+def unpack_8unorm_avx2_shuffle(format):
+    '''Get the index of the source byte of each destination byte of a pixel
+    when unpacking a 32-bit format of 8-bit channels into R8G8B8A8_UNORM is a
+    plain byte shuffle, with None for the bytes that are set to 0 or 0xff.
+    Returns None for formats that need any other conversion.'''
+
+    channels = unpack_8unorm_avx2_channels(format)
+    if channels is None or format.block_size() != 32:
+        return None
+
+    shuffle = [None] * 4
+    for shift, size, components in channels:
+        if size != 8 or shift % 8:
+            return None
+        for i in components:
+            shuffle[i] = shift // 8
+
+    return shuffle
+
+
+def generate_format_unpack_avx2(format):
+    '''Generate the function to unpack pixels into R8G8B8A8_UNORM with AVX2,
+    8 pixels at a time'''
+
+    name = format.short_name()
+    bpp = format.block_size() // 8
+    shuffle = unpack_8unorm_avx2_shuffle(format)
+    ones = sum(0xff << (i * 8) for i in range(4) if format.le_swizzles[i] == SWIZZLE_1)
+
+    print('static void __attribute__((target("avx2")))')
+    print('util_format_%s_unpack_rgba_8unorm_avx2(uint8_t *restrict dst, const uint8_t *restrict src, unsigned width)' % name)
+    print('{')
+    if shuffle is not None:
+        print('   const __m256i shuffle = %s;' % avx2_byte_shuffle_mask(shuffle))
+    if ones:
+        print('   const __m256i ones = _mm256_set1_epi32((int)0x%08x);' % ones)
+    print('   unsigned x;')
+    print('   for (x = 0; x + 8 <= width; x += 8) {')
+    if bpp == 4:
+        print('      __m256i pixels = _mm256_loadu_si256((const __m256i *)src);')
+    elif bpp == 2:
+        print('      __m256i pixels = _mm256_cvtepu16_epi32(_mm_loadu_si128((const __m128i *)src));')
+    else:
+        print('      __m256i pixels = _mm256_cvtepu8_epi32(_mm_loadl_epi64((const __m128i *)src));')
+    if shuffle is not None:
+        print('      __m256i value = _mm256_shuffle_epi8(pixels, shuffle);')
+    else:
+        # Each 32-bit lane holds one pixel, so every channel is extracted,
+        # extended to 8 bits like _mesa_unorm_to_unorm() and shifted into the
+        # bytes of its components for the 8 pixels at once.
+        print('      __m256i value = _mm256_setzero_si256();')
+        for shift, size, components in unpack_8unorm_avx2_channels(format):
+            channel = 'pixels'
+            if shift:
+                channel = '_mm256_srli_epi32(%s, %u)' % (channel, shift)
+            if shift + size < format.block_size():
+                channel = '_mm256_and_si256(%s, _mm256_set1_epi32(0x%x))' % (channel, (1 << size) - 1)
+            print('      {')
+            print('         __m256i c = %s;' % channel)
+            if size < 8:
+                # EXTEND_NORMALIZED_INT(x, size, 8), where the products fit in
+                # 16 bits
+                extended = '_mm256_mullo_epi16(c, _mm256_set1_epi32(%u))' % (255 // ((1 << size) - 1))
+                if 8 % size:
+                    extended = '_mm256_add_epi32(%s, _mm256_srli_epi32(c, %u))' % (extended, size - 8 % size)
+                print('         c = %s;' % extended)
+            for i in components:
+                if i:
+                    print('         value = _mm256_or_si256(value, _mm256_slli_epi32(c, %u));' % (i * 8))
+                else:
+                    print('         value = _mm256_or_si256(value, c);')
+            print('      }')
+    if ones:
+        print('      value = _mm256_or_si256(value, ones);')
+    print('      _mm256_storeu_si256((__m256i *)dst, value);')
+    print('      src += %u;' % (bpp * 8))
+    print('      dst += 32;')
+    print('   }')
+    print('   if (x < width)')
+    print('      util_format_%s_unpack_rgba_8unorm(dst, src, width - x);' % name)
+    print('}')
+
+
+def pack_float16_f16c_channels(format):
+    '''Get the source component of each channel of an array format of 16-bit
+    floats, with None for the channels that are zeroed, when the F16C function
+    packing from floats is generated for it, or None for other formats.'''
+
+    if not is_format_supported(format) or is_format_hand_written(format):
+        return None
+    if format.colorspace != RGB or not format.is_array():
+        return None
+
+    inv_swizzle = inv_swizzles(format.le_swizzles)
+
+    channels = []
+    for i in range(4):
+        channel = format.le_channels[i]
+        if not channel.size:
+            continue
+        if channel.size != 16 or channel.type not in (FLOAT, VOID):
+            return None
+        channels.append(inv_swizzle[i] if channel.type == FLOAT else None)
+
+    if all(src is None for src in channels):
+        return None
+
+    return channels
+
+
+def generate_format_pack_float_f16c(format):
+    '''Generate the function to pack pixels from floats with AVX2 and F16C,
+    8 pixels at a time'''
+
+    name = format.short_name()
+    channels = pack_float16_f16c_channels(format)
+    nr_channels = len(channels)
+
+    print('static void __attribute__((target("avx2,f16c")))')
+    print('util_format_%s_pack_rgba_float_f16c(uint8_t *restrict dst_row, unsigned dst_stride, const float *restrict src_row, unsigned src_stride, unsigned width, unsigned height)' % name)
+    print('{')
+    print('   for (unsigned y = 0; y < height; y++) {')
+    print('      const float *src = src_row;')
+    print('      uint8_t *dst = dst_row;')
+    print('      unsigned x;')
+    print('      for (x = 0; x + 8 <= width; x += 8) {')
+    for i in range(4):
+        print('         __m256 src%u = _mm256_loadu_ps(src + %u);' % (i, i * 8))
+    # Each group of 8 values is converted to halves with one vcvtps2ph, so the
+    # values are gathered from the 2 pixels of each source vector with
+    # permutes, and blended together.
+    for group in range(nr_channels):
+        lanes = []
+        for lane in range(8):
+            pixel, channel = divmod(group * 8 + lane, nr_channels)
+            if channels[channel] is None:
+                lanes.append(None)
+            else:
+                lanes.append((pixel // 2, (pixel % 2) * 4 + channels[channel]))
+        value = None
+        for vector in sorted(set(l[0] for l in lanes if l is not None)):
+            index = [l[1] if l is not None and l[0] == vector else 0 for l in lanes]
+            if index == list(range(8)):
+                permuted = 'src%u' % vector
+            else:
+                permuted = '_mm256_permutevar8x32_ps(src%u, _mm256_setr_epi32(%s))' % (
+                    vector, ', '.join(str(i) for i in index))
+            if value is None:
+                value = permuted
+            else:
+                mask = sum(1 << i for i, l in enumerate(lanes) if l is not None and l[0] == vector)
+                value = '_mm256_blend_ps(%s, %s, 0x%02x)' % (value, permuted, mask)
+        zero = sum(1 << i for i, l in enumerate(lanes) if l is None)
+        if zero:
+            value = '_mm256_blend_ps(%s, _mm256_setzero_ps(), 0x%02x)' % (value, zero)
+        print('         _mm_storeu_si128((__m128i *)(dst + %u),' % (group * 16))
+        print('                          _mm256_cvtps_ph(%s, _MM_FROUND_TO_ZERO));' % value)
+    print('         src += 32;')
+    print('         dst += %u;' % (nr_channels * 16))
+    print('      }')
+    print('      if (x < width)')
+    print('         util_format_%s_pack_rgba_float(dst, 0, src, 0, width - x, 1);' % name)
+    print('      dst_row += dst_stride;')
+    print('      src_row += src_stride/sizeof(*src_row);')
+    print('   }')
+    print('}')
+
+
+def generate_format_avx2(format):
+    '''Generate the AVX2 variants of the pack and unpack functions of a
+    format, if it has any'''
+
+    has_pack_float_f16c = pack_float16_f16c_channels(format) is not None
+    if not (has_pack_8unorm_avx2(format) or has_unpack_8unorm_avx2(format) or
+            has_pack_float_f16c):
+        return
+
+    print('#ifdef UTIL_FORMAT_PACK_AVX2')
+    if has_pack_8unorm_avx2(format):
+        generate_format_pack_avx2(format)
+        print()
+    if has_unpack_8unorm_avx2(format):
+        generate_format_unpack_avx2(format)
+        print()
+    if has_pack_float_f16c:
+        generate_format_pack_float_f16c(format)
+        print()
+    print('#endif')
+    print()
+
+
 def generate_format_fetch(format, dst_channel, dst_native_type):
     '''Generate the function to unpack pixels from a particular format'''
 
@@ -711,6 +1111,33 @@ def generate(formats):
     print('#include "u_format_zs.h"')
     print('#include "u_format_pack.h"')
     print()
+    print('#ifdef UTIL_FORMAT_PACK_AVX2')
+    print('#include <immintrin.h>')
+    print()
+    print('/* Converts 8-bit unorm values in 32-bit lanes to dst_bits, rounding like')
+    print(' * _mesa_unorm_to_unorm().')
+    print(' */')
+    print('static inline __m256i __attribute__((target("avx2")))')
+    print('util_format_unorm8_to_unorm_avx2(__m256i x, unsigned dst_bits)')
+    print('{')
+    print('   if (dst_bits < 8) {')
+    print('      /* (x * MAX_UINT(dst_bits) + 127) / 255, where the division is exact')
+    print('       * as (v + 1 + (v >> 8)) >> 8 since v is less than 65535.')
+    print('       */')
+    print('      __m256i v = _mm256_mullo_epi32(x, _mm256_set1_epi32(MAX_UINT(dst_bits)));')
+    print('      v = _mm256_add_epi32(v, _mm256_set1_epi32(127));')
+    print('      v = _mm256_add_epi32(v, _mm256_add_epi32(_mm256_srli_epi32(v, 8), _mm256_set1_epi32(1)));')
+    print('      return _mm256_srli_epi32(v, 8);')
+    print('   } else {')
+    print('      /* EXTEND_NORMALIZED_INT(x, 8, dst_bits) */')
+    print('      __m256i v = _mm256_mullo_epi32(x, _mm256_set1_epi32(MAX_UINT(dst_bits) / 255));')
+    print('      if (dst_bits % 8)')
+    print('         v = _mm256_add_epi32(v, _mm256_srli_epi32(x, 8 - dst_bits % 8));')
+    print('      return v;')
+    print('   }')
+    print('}')
+    print('#endif')
+    print()
 
     for format in formats:
         if not is_format_hand_written(format):
@@ -759,3 +1186,5 @@ def generate(formats):
 
                 generate_format_unpack(format, channel, native_type, suffix)
                 generate_format_pack(format, channel, native_type, suffix)
+
+                generate_format_avx2(format)
@@ -0,0 +1,193 @@
+/*
+ * Permission is hereby granted, free of charge, to any person obtaining a
+ * copy of this software and associated documentation files (the "Software"),
+ * to deal in the Software without restriction, including without limitation
+ * the rights to use, copy, modify, merge, publish, distribute, sublicense,
+ * and/or sell copies of the Software, and to permit persons to whom the
+ * Software is furnished to do so, subject to the following conditions:
+ *
+ * The above copyright notice and this permission notice (including the next
+ * paragraph) shall be included in all copies or substantial portions of the
+ * Software.
+ *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+ * THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ * LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+ * FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS
+ * IN THE SOFTWARE.
+ */
+
+#include <u_format.h>
+
+#if (defined(PIPE_ARCH_AARCH64) || defined(PIPE_ARCH_ARM)) && !defined NO_FORMAT_ASM
+
+/* armhf builds default to vfp, not neon, and refuses to compile neon intrinsics
+ * unless you tell it "no really".
+ */
+#ifdef PIPE_ARCH_ARM
+#pragma GCC target ("fpu=neon")
+#endif
+
+#include <arm_neon.h>
+#include "u_format_pack.h"
+#include "util/u_cpu_detect.h"
+
+static void
+util_format_b8g8r8a8_unorm_pack_rgba_8unorm_neon(uint8_t *restrict dst_row, unsigned dst_stride,
+                                                 const uint8_t *restrict src_row, unsigned src_stride,
+                                                 unsigned width, unsigned height)
+{
+   for (unsigned y = 0; y < height; y++) {
+      const uint8_t *src = src_row;
+      uint8_t *dst = dst_row;
+      unsigned x;
+      for (x = 0; x + 16 <= width; x += 16) {
+         uint8x16x4_t load = vld4q_u8(src);
+         uint8x16x4_t swap = { .val = { load.val[2], load.val[1], load.val[0], load.val[3] } };
+         vst4q_u8(dst, swap);
+         src += 16 * 4;
+         dst += 16 * 4;
+      }
+      if (x < width)
+         util_format_b8g8r8a8_unorm_pack_rgba_8unorm(dst, 0, src, 0, width - x, 1);
+      dst_row += dst_stride;
+      src_row += src_stride;
+   }
+}
+
+static void
+util_format_b8g8r8x8_unorm_pack_rgba_8unorm_neon(uint8_t *restrict dst_row, unsigned dst_stride,
+                                                 const uint8_t *restrict src_row, unsigned src_stride,
+                                                 unsigned width, unsigned height)
+{
+   for (unsigned y = 0; y < height; y++) {
+      const uint8_t *src = src_row;
+      uint8_t *dst = dst_row;
+      unsigned x;
+      for (x = 0; x + 16 <= width; x += 16) {
+         uint8x16x4_t load = vld4q_u8(src);
+         uint8x16x4_t swap = { .val = { load.val[2], load.val[1], load.val[0], vdupq_n_u8(0) } };
+         vst4q_u8(dst, swap);
+         src += 16 * 4;
+         dst += 16 * 4;
+      }
+      if (x < width)
+         util_format_b8g8r8x8_unorm_pack_rgba_8unorm(dst, 0, src, 0, width - x, 1);
+      dst_row += dst_stride;
+      src_row += src_stride;
+   }
+}
+
+static void
+util_format_r8g8b8x8_unorm_pack_rgba_8unorm_neon(uint8_t *restrict dst_row, unsigned dst_stride,
+                                                 const uint8_t *restrict src_row, unsigned src_stride,
+                                                 unsigned width, unsigned height)
+{
+   const uint8x16_t rgb_mask = vreinterpretq_u8_u32(vdupq_n_u32(0x00ffffff));
+
+   for (unsigned y = 0; y < height; y++) {
+      const uint8_t *src = src_row;
+      uint8_t *dst = dst_row;
+      unsigned x;
+      for (x = 0; x + 4 <= width; x += 4) {
+         vst1q_u8(dst, vandq_u8(vld1q_u8(src), rgb_mask));
+         src += 4 * 4;
+         dst += 4 * 4;
+      }
+      if (x < width)
+         util_format_r8g8b8x8_unorm_pack_rgba_8unorm(dst, 0, src, 0, width - x, 1);
+      dst_row += dst_stride;
+      src_row += src_stride;
+   }
+}
+
+static void
+util_format_r8g8b8_unorm_pack_rgba_8unorm_neon(uint8_t *restrict dst_row, unsigned dst_stride,
+                                               const uint8_t *restrict src_row, unsigned src_stride,
+                                               unsigned width, unsigned height)
+{
+   for (unsigned y = 0; y < height; y++) {
+      const uint8_t *src = src_row;
+      uint8_t *dst = dst_row;
+      unsigned x;
+      for (x = 0; x + 16 <= width; x += 16) {
+         uint8x16x4_t load = vld4q_u8(src);
+         uint8x16x3_t rgb = { .val = { load.val[0], load.val[1], load.val[2] } };
+         vst3q_u8(dst, rgb);
+         src += 16 * 4;
+         dst += 16 * 3;
+      }
+      if (x < width)
+         util_format_r8g8b8_unorm_pack_rgba_8unorm(dst, 0, src, 0, width - x, 1);
+      dst_row += dst_stride;
+      src_row += src_stride;
+   }
+}
+
+static void
+util_format_b8g8r8_unorm_pack_rgba_8unorm_neon(uint8_t *restrict dst_row, unsigned dst_stride,
+                                               const uint8_t *restrict src_row, unsigned src_stride,
+                                               unsigned width, unsigned height)
+{
+   for (unsigned y = 0; y < height; y++) {
+      const uint8_t *src = src_row;
+      uint8_t *dst = dst_row;
+      unsigned x;
+      for (x = 0; x + 16 <= width; x += 16) {
+         uint8x16x4_t load = vld4q_u8(src);
+         uint8x16x3_t bgr = { .val = { load.val[2], load.val[1], load.val[0] } };
+         vst3q_u8(dst, bgr);
+         src += 16 * 4;
+         dst += 16 * 3;
+      }
+      if (x < width)
+         util_format_b8g8r8_unorm_pack_rgba_8unorm(dst, 0, src, 0, width - x, 1);
+      dst_row += dst_stride;
+      src_row += src_stride;
+   }
+}
+
+static const struct util_format_pack_description util_format_pack_descriptions_neon[] = {
+   [PIPE_FORMAT_B8G8R8A8_UNORM] = {
+      .pack_rgba_8unorm = &util_format_b8g8r8a8_unorm_pack_rgba_8unorm_neon,
+      .pack_rgba_float = &util_format_b8g8r8a8_unorm_pack_rgba_float,
+   },
+   [PIPE_FORMAT_B8G8R8X8_UNORM] = {
+      .pack_rgba_8unorm = &util_format_b8g8r8x8_unorm_pack_rgba_8unorm_neon,
+      .pack_rgba_float = &util_format_b8g8r8x8_unorm_pack_rgba_float,
+   },
+   [PIPE_FORMAT_R8G8B8X8_UNORM] = {
+      .pack_rgba_8unorm = &util_format_r8g8b8x8_unorm_pack_rgba_8unorm_neon,
+      .pack_rgba_float = &util_format_r8g8b8x8_unorm_pack_rgba_float,
+   },
+   [PIPE_FORMAT_R8G8B8_UNORM] = {
+      .pack_rgba_8unorm = &util_format_r8g8b8_unorm_pack_rgba_8unorm_neon,
+      .pack_rgba_float = &util_format_r8g8b8_unorm_pack_rgba_float,
+   },
+   [PIPE_FORMAT_B8G8R8_UNORM] = {
+      .pack_rgba_8unorm = &util_format_b8g8r8_unorm_pack_rgba_8unorm_neon,
+      .pack_rgba_float = &util_format_b8g8r8_unorm_pack_rgba_float,
+   },
+};
+
+const struct util_format_pack_description *
+util_format_pack_description_neon(enum pipe_format format)
+{
+   /* CPU detect for NEON support.  On arm64, it's implied. */
+#ifdef PIPE_ARCH_ARM
+   if (!util_get_cpu_caps()->has_neon)
+      return NULL;
+#endif
+
+   if (format >= ARRAY_SIZE(util_format_pack_descriptions_neon))
+      return NULL;
+
+   if (!util_format_pack_descriptions_neon[format].pack_rgba_8unorm)
+      return NULL;
+
+   return &util_format_pack_descriptions_neon[format];
+}
+
+#endif /* PIPE_ARCH_AARCH64 | PIPE_ARCH_ARM */
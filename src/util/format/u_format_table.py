@@ -130,6 +130,7 @@ def write_format_table(formats):
     print('#include "u_format_rgtc.h"')
     print('#include "u_format_latc.h"')
     print('#include "u_format_etc.h"')
+    print('#include "util/u_cpu_detect.h"')
     print()
 
     write_format_table_header(sys.stdout2)
@@ -167,7 +168,7 @@ def write_format_table(formats):
 
     def generate_table_getter(type):
         suffix = ""
-        if type == "unpack_":
+        if type in ("pack_", "unpack_"):
             suffix = "_generic"
         print("const struct util_format_%sdescription *" % type)
         print("util_format_%sdescription%s(enum pipe_format format)" % (type, suffix))
@@ -179,6 +180,46 @@ def write_format_table(formats):
         print("}")
         print()
 
+    def generate_avx2_table(type, field, unsupported, functions):
+        '''Writes the table of the AVX2 variants of the pack or unpack
+        functions, with the functions(format) entries of each format, and its
+        getter, which returns NULL when the unsupported condition is true or
+        the format has no AVX2 variant.'''
+        print('#ifdef UTIL_FORMAT_PACK_AVX2')
+        print('static const struct util_format_%sdescription' % type)
+        print('util_format_%sdescriptions_avx2[] = {' % type)
+        for format in formats:
+            if not has_access(format):
+                continue
+
+            entries = functions(format)
+            if entries is None:
+                continue
+
+            print("   [%s] = {" % (format.name,))
+            for name, func in entries:
+                print("      .%s = &%s," % (name, func))
+            print("   },")
+            print()
+        print("};")
+        print()
+        print("const struct util_format_%sdescription *" % type)
+        print("util_format_%sdescription_avx2(enum pipe_format format)" % type)
+        print("{")
+        print("   if (%s)" % unsupported)
+        print("      return NULL;")
+        print()
+        print("   if (format >= ARRAY_SIZE(util_format_%sdescriptions_avx2))" % type)
+        print("      return NULL;")
+        print()
+        print("   if (!util_format_%sdescriptions_avx2[format].%s)" % (type, field))
+        print("      return NULL;")
+        print()
+        print("   return &util_format_%sdescriptions_avx2[format];" % type)
+        print("}")
+        print('#endif /* UTIL_FORMAT_PACK_AVX2 */')
+        print()
+
     def generate_function_getter(func):
         print("util_format_%s_func_ptr" % func)
         print("util_format_%s_func(enum pipe_format format)" % (func))
@@ -245,6 +286,22 @@ def write_format_table(formats):
     print("};")
     print()
     generate_table_getter("pack_")
+
+    def pack_avx2_functions(format):
+        sn = format.short_name()
+        if u_format_pack.has_pack_8unorm_avx2(format):
+            return [("pack_rgba_8unorm", "util_format_%s_pack_rgba_8unorm_avx2" % sn),
+                    ("pack_rgba_float", "util_format_%s_pack_rgba_float" % sn)]
+        if u_format_pack.pack_float16_f16c_channels(format) is not None:
+            return [("pack_rgba_8unorm", "util_format_%s_pack_rgba_8unorm" % sn),
+                    ("pack_rgba_float", "util_format_%s_pack_rgba_float_f16c" % sn)]
+        return None
+
+    # the half float paths also need F16C, which every CPU with AVX2 has
+    generate_avx2_table("pack_", "pack_rgba_8unorm",
+                        "!util_get_cpu_caps()->has_avx2 || !util_get_cpu_caps()->has_f16c",
+                        pack_avx2_functions)
+
     print('static const struct util_format_unpack_description')
     print('util_format_unpack_descriptions[] = {')
     for format in formats:
@@ -286,6 +343,17 @@ def write_format_table(formats):
 
     generate_table_getter("unpack_")
 
+    def unpack_avx2_functions(format):
+        sn = format.short_name()
+        if u_format_pack.has_unpack_8unorm_avx2(format):
+            return [("unpack_rgba_8unorm", "util_format_%s_unpack_rgba_8unorm_avx2" % sn),
+                    ("unpack_rgba", "util_format_%s_unpack_rgba_float" % sn)]
+        return None
+
+    generate_avx2_table("unpack_", "unpack_rgba_8unorm",
+                        "!util_get_cpu_caps()->has_avx2",
+                        unpack_avx2_functions)
+
     print('static const util_format_fetch_rgba_func_ptr util_format_fetch_rgba_table[] = {')
     for format in formats:
         sn = format.short_name()
@@ -305,15 +373,27 @@ def main():
 
     sys.stdout2 = open(os.devnull, "w")
 
-    for arg in sys.argv[1:]:
+    # --output and --header-output write the table and the header in a single
+    # run, so the formats are only parsed and generated once per build
+    args = iter(sys.argv[1:])
+    for arg in args:
         if arg == '--header':
             sys.stdout2 = sys.stdout
             sys.stdout = open(os.devnull, "w")
             continue
+        if arg == '--output':
+            sys.stdout = open(next(args), "w")
+            continue
+        if arg == '--header-output':
+            sys.stdout2 = open(next(args), "w")
+            continue
 
         formats.extend(parse(arg))
 
     write_format_table(formats)
 
+    sys.stdout.flush()
+    sys.stdout2.flush()
+
 if __name__ == '__main__':
     main()
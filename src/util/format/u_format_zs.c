@@ -29,6 +29,14 @@
 #include "util/format/u_format_zs.h"
 #include "util/u_math.h"
 
+#ifdef __SSE2__
+#include <emmintrin.h>
+#endif
+
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+#include <arm_neon.h>
+#endif
+
 
 /*
  * z32_unorm conversion functions
@@ -62,6 +70,78 @@ z24_unorm_to_z32_unorm(uint32_t z)
    return (z << 8) | (z >> 16);
 }
 
+/* z24_unorm_to_z32_unorm() on the depth of two 32-bit words at once, which is
+ * in their upper 24 bits if z_high is set, and in their lower ones otherwise.
+ */
+static inline void
+z24_unorm_to_z32_unorm_x2(uint32_t *dst, const uint32_t *src, bool z_high)
+{
+   uint64_t value;
+
+   memcpy(&value, src, sizeof(value));
+   if (z_high)
+      value = (value & 0xffffff00ffffff00ull) |
+              ((value >> 24) & 0x000000ff000000ffull);
+   else
+      value = ((value << 8) & 0xffffff00ffffff00ull) |
+              ((value >> 16) & 0x000000ff000000ffull);
+   memcpy(dst, &value, sizeof(value));
+}
+
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+/* How far ahead, in bytes, the NEON row loops below prefetch their source.
+ * They do it once per 64-byte line, for the in-order ARM cores which don't
+ * detect the streaming access on their own.
+ */
+#define Z_UNPACK_PREFETCH_AHEAD 256
+
+/* Unpacks as many depth values of a Z16_UNORM row as possible 8 at a time,
+ * like z16_unorm_to_z32_unorm() does, and returns their number.
+ */
+static inline unsigned
+z16_unorm_unpack_z_32unorm_neon(uint32_t *restrict dst, const uint16_t *restrict src,
+                                unsigned width)
+{
+   unsigned x;
+
+   for (x = 0; x + 8 <= width; x += 8) {
+      if (x % 32 == 0)
+         __builtin_prefetch((const uint8_t *)(src + x) + Z_UNPACK_PREFETCH_AHEAD);
+      uint16x8_t z = vld1q_u16(src + x);
+      uint32x4_t lo = vmovl_u16(vget_low_u16(z));
+      uint32x4_t hi = vmovl_u16(vget_high_u16(z));
+      vst1q_u32(dst + x, vorrq_u32(vshlq_n_u32(lo, 16), lo));
+      vst1q_u32(dst + x + 4, vorrq_u32(vshlq_n_u32(hi, 16), hi));
+   }
+
+   return x;
+}
+
+/* Unpacks as many depth values of a row of 24-bit depth in 32-bit words as
+ * possible 4 at a time, like z24_unorm_to_z32_unorm_x2() does, and returns
+ * their number.
+ */
+static inline unsigned
+z24_unorm_unpack_z_32unorm_neon(uint32_t *restrict dst, const uint32_t *restrict src,
+                                unsigned width, bool z_high)
+{
+   unsigned x;
+
+   for (x = 0; x + 4 <= width; x += 4) {
+      if (x % 16 == 0)
+         __builtin_prefetch((const uint8_t *)(src + x) + Z_UNPACK_PREFETCH_AHEAD);
+      uint32x4_t z = vld1q_u32(src + x);
+      if (z_high)
+         z = vorrq_u32(vandq_u32(z, vdupq_n_u32(0xffffff00)), vshrq_n_u32(z, 24));
+      else
+         z = vorrq_u32(vshlq_n_u32(z, 8),
+                       vandq_u32(vshrq_n_u32(z, 16), vdupq_n_u32(0xff)));
+      vst1q_u32(dst + x, z);
+   }
+
+   return x;
+}
+#endif
 
 /*
  * z32_float conversion functions
@@ -81,6 +161,30 @@ z16_unorm_to_z32_float(uint16_t z)
    return (float)(z * scale);
 }
 
+#ifdef __SSE2__
+/* Unpacks as many depth values of a Z16_UNORM row as possible 8 at a time,
+ * like z16_unorm_to_z32_float() does, and returns their number.
+ */
+static inline unsigned
+z16_unorm_unpack_z_float_sse2(float *restrict dst, const uint16_t *restrict src,
+                              unsigned width)
+{
+   const __m128 scale = _mm_set1_ps((float)(1.0 / 0xffff));
+   const __m128i zero = _mm_setzero_si128();
+   unsigned x;
+
+   for (x = 0; x + 8 <= width; x += 8) {
+      __m128i z = _mm_loadu_si128((const __m128i *)(src + x));
+      __m128 lo = _mm_cvtepi32_ps(_mm_unpacklo_epi16(z, zero));
+      __m128 hi = _mm_cvtepi32_ps(_mm_unpackhi_epi16(z, zero));
+      _mm_storeu_ps(dst + x, _mm_mul_ps(lo, scale));
+      _mm_storeu_ps(dst + x + 4, _mm_mul_ps(hi, scale));
+   }
+
+   return x;
+}
+#endif
+
 static inline uint32_t
 z32_float_to_z24_unorm(float z)
 {
@@ -91,10 +195,166 @@ z32_float_to_z24_unorm(float z)
 static inline float
 z24_unorm_to_z32_float(uint32_t z)
 {
-   const double scale = 1.0 / 0xffffff;
-   return (float)(z * scale);
+   /* A float division is exact enough to round like the multiplication by
+    * 1.0 / 0xffffff in double precision for all 24-bit values.
+    */
+   return (float)z / (float)0xffffff;
+}
+
+#ifdef __SSE2__
+/* Unpacks as many depth values of a row of 24-bit depth in 32-bit words as
+ * possible 4 at a time, like z24_unorm_to_z32_float() does, and returns their
+ * number.  The depth is in the upper 24 bits of the words if z_high is set,
+ * and in the lower ones otherwise.
+ */
+static inline unsigned
+z24_unorm_unpack_z_float_sse2(float *restrict dst, const uint32_t *restrict src,
+                              unsigned width, bool z_high)
+{
+   const __m128 scale = _mm_set1_ps((float)0xffffff);
+   unsigned x;
+
+   for (x = 0; x + 4 <= width; x += 4) {
+      __m128i z = _mm_loadu_si128((const __m128i *)(src + x));
+      if (z_high)
+         z = _mm_srli_epi32(z, 8);
+      else
+         z = _mm_and_si128(z, _mm_set1_epi32(0xffffff));
+      _mm_storeu_ps(dst + x, _mm_div_ps(_mm_cvtepi32_ps(z), scale));
+   }
+
+   return x;
+}
+#endif
+
+#ifdef __SSE2__
+/* Splits as many Z32_FLOAT_S8X24_UINT pixels of a row as possible 4 at a time
+ * and stores their depth, returning their number.
+ */
+static inline unsigned
+z32_float_s8x24_uint_unpack_z_float_sse2(float *restrict dst,
+                                         const float *restrict src,
+                                         unsigned width)
+{
+   unsigned x;
+
+   for (x = 0; x + 4 <= width; x += 4) {
+      __m128 lo = _mm_loadu_ps(src + 2 * x);
+      __m128 hi = _mm_loadu_ps(src + 2 * x + 4);
+      _mm_storeu_ps(dst + x, _mm_shuffle_ps(lo, hi, _MM_SHUFFLE(2, 0, 2, 0)));
+   }
+
+   return x;
+}
+
+/* Splits as many Z32_FLOAT_S8X24_UINT pixels of a row as possible 8 at a time
+ * and stores their stencil, returning their number.
+ */
+static inline unsigned
+z32_float_s8x24_uint_unpack_s_8uint_sse2(uint8_t *restrict dst,
+                                         const uint32_t *restrict src,
+                                         unsigned width)
+{
+   const __m128i mask = _mm_set1_epi32(0xff);
+   unsigned x;
+
+   for (x = 0; x + 8 <= width; x += 8) {
+      __m128 s[4];
+      for (unsigned i = 0; i < 4; i++)
+         s[i] = _mm_loadu_ps((const float *)(src + 2 * x + 4 * i));
+      __m128i lo = _mm_castps_si128(_mm_shuffle_ps(s[0], s[1], _MM_SHUFFLE(3, 1, 3, 1)));
+      __m128i hi = _mm_castps_si128(_mm_shuffle_ps(s[2], s[3], _MM_SHUFFLE(3, 1, 3, 1)));
+      __m128i s16 = _mm_packs_epi32(_mm_and_si128(lo, mask),
+                                    _mm_and_si128(hi, mask));
+      _mm_storel_epi64((__m128i *)(dst + x), _mm_packus_epi16(s16, s16));
+   }
+
+   return x;
+}
+
+/* Stores as many depth values of a row as possible 4 at a time into
+ * Z32_FLOAT_S8X24_UINT pixels, keeping their stencil, and returns their
+ * number.
+ */
+static inline unsigned
+z32_float_s8x24_uint_pack_z_float_sse2(float *restrict dst,
+                                       const float *restrict src,
+                                       unsigned width)
+{
+   unsigned x;
+
+   for (x = 0; x + 4 <= width; x += 4) {
+      __m128 z = _mm_loadu_ps(src + x);
+      __m128 s = _mm_shuffle_ps(_mm_loadu_ps(dst + 2 * x),
+                                _mm_loadu_ps(dst + 2 * x + 4),
+                                _MM_SHUFFLE(3, 1, 3, 1));
+      _mm_storeu_ps(dst + 2 * x, _mm_unpacklo_ps(z, s));
+      _mm_storeu_ps(dst + 2 * x + 4, _mm_unpackhi_ps(z, s));
+   }
+
+   return x;
 }
 
+/* Stores as many stencil values of a row as possible 8 at a time into
+ * Z32_FLOAT_S8X24_UINT pixels, keeping their depth, and returns their number.
+ */
+static inline unsigned
+z32_float_s8x24_uint_pack_s_8uint_sse2(uint32_t *restrict dst,
+                                       const uint8_t *restrict src,
+                                       unsigned width)
+{
+   const __m128i zero = _mm_setzero_si128();
+   unsigned x;
+
+   for (x = 0; x + 8 <= width; x += 8) {
+      __m128i s16 = _mm_unpacklo_epi8(_mm_loadl_epi64((const __m128i *)(src + x)),
+                                      zero);
+      for (unsigned i = 0; i < 2; i++) {
+         __m128 s = _mm_castsi128_ps(i ? _mm_unpackhi_epi16(s16, zero)
+                                       : _mm_unpacklo_epi16(s16, zero));
+         uint32_t *d = dst + 2 * x + 8 * i;
+         __m128 z = _mm_shuffle_ps(_mm_loadu_ps((const float *)d),
+                                   _mm_loadu_ps((const float *)(d + 4)),
+                                   _MM_SHUFFLE(2, 0, 2, 0));
+         _mm_storeu_ps((float *)d, _mm_unpacklo_ps(z, s));
+         _mm_storeu_ps((float *)(d + 4), _mm_unpackhi_ps(z, s));
+      }
+   }
+
+   return x;
+}
+#endif
+
+#ifdef __SSE2__
+/* Unpacks as many stencil values of a row of 8-bit stencil in 32-bit words as
+ * possible 16 at a time and returns their number.  The stencil is in the upper
+ * 8 bits of the words if s_high is set, and in the lower ones otherwise.
+ */
+static inline unsigned
+s8_unpack_s_8uint_sse2(uint8_t *restrict dst, const uint32_t *restrict src,
+                       unsigned width, bool s_high)
+{
+   const __m128i mask = _mm_set1_epi32(0xff);
+   unsigned x;
+
+   for (x = 0; x + 16 <= width; x += 16) {
+      __m128i s[4];
+      for (unsigned i = 0; i < 4; i++) {
+         s[i] = _mm_loadu_si128((const __m128i *)(src + x + 4 * i));
+         if (s_high)
+            s[i] = _mm_srli_epi32(s[i], 24);
+         else
+            s[i] = _mm_and_si128(s[i], mask);
+      }
+      _mm_storeu_si128((__m128i *)(dst + x),
+                       _mm_packus_epi16(_mm_packs_epi32(s[0], s[1]),
+                                        _mm_packs_epi32(s[2], s[3])));
+   }
+
+   return x;
+}
+#endif
+
 static inline uint32_t
 z32_float_to_z32_unorm(float z)
 {
@@ -102,6 +362,52 @@ z32_float_to_z32_unorm(float z)
    return (uint32_t)(z * scale);
 }
 
+#ifdef __SSE2__
+/* Converts as many depth values of a row of 32-bit floats as possible 4 at a
+ * time like z32_float_to_z32_unorm(CLAMP(z, 0.0f, 1.0f)) does, and returns
+ * their number.  If s8x24 is set, each float is followed by a 32-bit word of
+ * stencil to skip, as in Z32_FLOAT_S8X24_UINT.
+ */
+static inline unsigned
+z32_float_unpack_z_32unorm_sse2(uint32_t *restrict dst, const float *restrict src,
+                                unsigned width, bool s8x24)
+{
+   const __m128d scale = _mm_set1_pd(0xffffffff);
+   const __m128d bias = _mm_set1_pd(0x80000000);
+   unsigned x;
+
+   for (x = 0; x + 4 <= width; x += 4) {
+      __m128 z;
+      if (s8x24)
+         z = _mm_shuffle_ps(_mm_loadu_ps(src + 2 * x),
+                            _mm_loadu_ps(src + 2 * x + 4),
+                            _MM_SHUFFLE(2, 0, 2, 0));
+      else
+         z = _mm_loadu_ps(src + x);
+
+      /* maxps returns its second operand for NaN, so this matches CLAMP. */
+      z = _mm_min_ps(_mm_max_ps(z, _mm_setzero_ps()), _mm_set1_ps(1.0f));
+
+      /* Scale in double precision, then truncate to unsigned by converting
+       * the values from 2^31 up with the bias removed and setting the sign
+       * bit back.
+       */
+      __m128i u[2];
+      for (unsigned i = 0; i < 2; i++) {
+         __m128d d = _mm_mul_pd(_mm_cvtps_pd(i ? _mm_movehl_ps(z, z) : z), scale);
+         __m128d big = _mm_cmpge_pd(d, bias);
+         __m128i sign = _mm_slli_epi32(_mm_shuffle_epi32(_mm_castpd_si128(big),
+                                                         _MM_SHUFFLE(3, 3, 2, 0)), 31);
+         u[i] = _mm_xor_si128(_mm_cvttpd_epi32(_mm_sub_pd(d, _mm_and_pd(big, bias))),
+                              sign);
+      }
+      _mm_storeu_si128((__m128i *)(dst + x), _mm_unpacklo_epi64(u[0], u[1]));
+   }
+
+   return x;
+}
+#endif
+
 static inline float
 z32_unorm_to_z32_float(uint32_t z)
 {
@@ -145,7 +451,13 @@ util_format_z16_unorm_unpack_z_float(float *restrict dst_row, unsigned dst_strid
    for(y = 0; y < height; ++y) {
       float *dst = dst_row;
       const uint16_t *src = (const uint16_t *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z16_unorm_unpack_z_float_sse2(dst, src, width);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst++ = z16_unorm_to_z32_float(*src++);
       }
       src_row += src_stride/sizeof(*src_row);
@@ -179,7 +491,13 @@ util_format_z16_unorm_unpack_z_32unorm(uint32_t *restrict dst_row, unsigned dst_
    for(y = 0; y < height; ++y) {
       uint32_t *dst = dst_row;
       const uint16_t *src = (const uint16_t *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+      x = z16_unorm_unpack_z_32unorm_neon(dst, src, width);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst++ = z16_unorm_to_z32_unorm(*src++);
       }
       src_row += src_stride/sizeof(*src_row);
@@ -299,7 +617,13 @@ util_format_z32_float_unpack_z_32unorm(uint32_t *restrict dst_row, unsigned dst_
    for(y = 0; y < height; ++y) {
       uint32_t *dst = dst_row;
       const float *src = (const float *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z32_float_unpack_z_32unorm_sse2(dst, src, width, false);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          float z = *src++;
          *dst++ = z32_float_to_z32_unorm(CLAMP(z, 0.0f, 1.0f));
       }
@@ -382,7 +706,13 @@ util_format_z24_unorm_s8_uint_unpack_z_float(float *restrict dst_row, unsigned d
    for(y = 0; y < height; ++y) {
       float *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z24_unorm_unpack_z_float_sse2(dst, src, width, false);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst++ = z24_unorm_to_z32_float((*src++) & 0xffffff);
       }
       src_row += src_stride/sizeof(*src_row);
@@ -458,9 +788,19 @@ util_format_z24_unorm_s8_uint_unpack_z_32unorm(uint32_t *restrict dst_row, unsig
    for(y = 0; y < height; ++y) {
       uint32_t *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
-         *dst++ = z24_unorm_to_z32_unorm((*src++) & 0xffffff);
+      x = 0;
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+      x = z24_unorm_unpack_z_32unorm_neon(dst, src, width, false);
+      dst += x;
+      src += x;
+#endif
+      for(; x + 2 <= width; x += 2) {
+         z24_unorm_to_z32_unorm_x2(dst, src, false);
+         dst += 2;
+         src += 2;
       }
+      if (x < width)
+         *dst = z24_unorm_to_z32_unorm((*src) & 0xffffff);
       src_row += src_stride/sizeof(*src_row);
       dst_row += dst_stride/sizeof(*dst_row);
    }
@@ -495,7 +835,13 @@ util_format_z24_unorm_s8_uint_unpack_s_8uint(uint8_t *restrict dst_row, unsigned
    for(y = 0; y < height; ++y) {
       uint8_t *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = s8_unpack_s_8uint_sse2(dst, src, width, true);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst++ = (*src++) >> 24;
       }
       src_row += src_stride/sizeof(*src_row);
@@ -552,7 +898,13 @@ util_format_s8_uint_z24_unorm_unpack_z_float(float *restrict dst_row, unsigned d
    for(y = 0; y < height; ++y) {
       float *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z24_unorm_unpack_z_float_sse2(dst, src, width, true);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst++ = z24_unorm_to_z32_float((*src++) >> 8);
       }
       src_row += src_stride/sizeof(*src_row);
@@ -589,10 +941,19 @@ util_format_s8_uint_z24_unorm_unpack_z_32unorm(uint32_t *restrict dst_row, unsig
    for(y = 0; y < height; ++y) {
       uint32_t *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
-         uint32_t value = *src++;
-         *dst++ = z24_unorm_to_z32_unorm(value >> 8);
+      x = 0;
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+      x = z24_unorm_unpack_z_32unorm_neon(dst, src, width, true);
+      dst += x;
+      src += x;
+#endif
+      for(; x + 2 <= width; x += 2) {
+         z24_unorm_to_z32_unorm_x2(dst, src, true);
+         dst += 2;
+         src += 2;
       }
+      if (x < width)
+         *dst = z24_unorm_to_z32_unorm((*src) >> 8);
       src_row += src_stride/sizeof(*src_row);
       dst_row += dst_stride/sizeof(*dst_row);
    }
@@ -627,7 +988,13 @@ util_format_s8_uint_z24_unorm_unpack_s_8uint(uint8_t *restrict dst_row, unsigned
    for(y = 0; y < height; ++y) {
       uint8_t *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = s8_unpack_s_8uint_sse2(dst, src, width, false);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst++ = (*src++) & 0xff;
       }
       src_row += src_stride/sizeof(*src_row);
@@ -664,7 +1031,13 @@ util_format_z24x8_unorm_unpack_z_float(float *restrict dst_row, unsigned dst_str
    for(y = 0; y < height; ++y) {
       float *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z24_unorm_unpack_z_float_sse2(dst, src, width, false);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst++ = z24_unorm_to_z32_float((*src++) & 0xffffff);
       }
       src_row += src_stride/sizeof(*src_row);
@@ -698,9 +1071,19 @@ util_format_z24x8_unorm_unpack_z_32unorm(uint32_t *restrict dst_row, unsigned ds
    for(y = 0; y < height; ++y) {
       uint32_t *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
-         *dst++ = z24_unorm_to_z32_unorm((*src++) & 0xffffff);
+      x = 0;
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+      x = z24_unorm_unpack_z_32unorm_neon(dst, src, width, false);
+      dst += x;
+      src += x;
+#endif
+      for(; x + 2 <= width; x += 2) {
+         z24_unorm_to_z32_unorm_x2(dst, src, false);
+         dst += 2;
+         src += 2;
       }
+      if (x < width)
+         *dst = z24_unorm_to_z32_unorm((*src) & 0xffffff);
       src_row += src_stride/sizeof(*src_row);
       dst_row += dst_stride/sizeof(*dst_row);
    }
@@ -732,7 +1115,13 @@ util_format_x8z24_unorm_unpack_z_float(float *restrict dst_row, unsigned dst_str
    for(y = 0; y < height; ++y) {
       float *dst = dst_row;
       const uint32_t *src = (uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z24_unorm_unpack_z_float_sse2(dst, src, width, true);
+      dst += x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst++ = z24_unorm_to_z32_float((*src++) >> 8);
       }
       src_row += src_stride/sizeof(*src_row);
@@ -766,9 +1155,19 @@ util_format_x8z24_unorm_unpack_z_32unorm(uint32_t *restrict dst_row, unsigned ds
    for(y = 0; y < height; ++y) {
       uint32_t *dst = dst_row;
       const uint32_t *src = (const uint32_t *)src_row;
-      for(x = 0; x < width; ++x) {
-         *dst++ = z24_unorm_to_z32_unorm((*src++) >> 8);
+      x = 0;
+#if defined(__ARM_NEON) || defined(__ARM_NEON__)
+      x = z24_unorm_unpack_z_32unorm_neon(dst, src, width, true);
+      dst += x;
+      src += x;
+#endif
+      for(; x + 2 <= width; x += 2) {
+         z24_unorm_to_z32_unorm_x2(dst, src, true);
+         dst += 2;
+         src += 2;
       }
+      if (x < width)
+         *dst = z24_unorm_to_z32_unorm((*src) >> 8);
       src_row += src_stride/sizeof(*src_row);
       dst_row += dst_stride/sizeof(*dst_row);
    }
@@ -800,7 +1199,13 @@ util_format_z32_float_s8x24_uint_unpack_z_float(float *restrict dst_row, unsigne
    for(y = 0; y < height; ++y) {
       float *dst = dst_row;
       const float *src = (const float *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z32_float_s8x24_uint_unpack_z_float_sse2(dst, src, width);
+      dst += x;
+      src += 2 * x;
+#endif
+      for(; x < width; ++x) {
          *dst = *src;
          src += 2;
          dst += 1;
@@ -819,7 +1224,13 @@ util_format_z32_float_s8x24_uint_pack_z_float(uint8_t *restrict dst_row, unsigne
    for(y = 0; y < height; ++y) {
       const float *src = src_row;
       float *dst = (float *)dst_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z32_float_s8x24_uint_pack_z_float_sse2(dst, src, width);
+      dst += 2 * x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst = *src;
          src += 1;
          dst += 2;
@@ -838,7 +1249,13 @@ util_format_z32_float_s8x24_uint_unpack_z_32unorm(uint32_t *restrict dst_row, un
    for(y = 0; y < height; ++y) {
       uint32_t *dst = dst_row;
       const float *src = (const float *)src_row;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z32_float_unpack_z_32unorm_sse2(dst, src, width, true);
+      dst += x;
+      src += 2 * x;
+#endif
+      for(; x < width; ++x) {
          *dst = z32_float_to_z32_unorm(CLAMP(*src, 0.0f, 1.0f));
          src += 2;
          dst += 1;
@@ -859,6 +1276,7 @@ util_format_z32_float_s8x24_uint_pack_z_32unorm(uint8_t *restrict dst_row, unsig
       float *dst = (float *)dst_row;
       for(x = 0; x < width; ++x) {
          *dst++ = z32_unorm_to_z32_float(*src++);
+         dst += 1;
       }
       dst_row += dst_stride/sizeof(*dst_row);
       src_row += src_stride/sizeof(*src_row);
@@ -874,7 +1292,14 @@ util_format_z32_float_s8x24_uint_unpack_s_8uint(uint8_t *restrict dst_row, unsig
    for(y = 0; y < height; ++y) {
       uint8_t *dst = dst_row;
       const uint32_t *src = (uint32_t *)(src_row + 4);
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z32_float_s8x24_uint_unpack_s_8uint_sse2(dst, (const uint32_t *)src_row,
+                                                   width);
+      dst += x;
+      src += 2 * x;
+#endif
+      for(; x < width; ++x) {
          *dst = *src;
          src += 2;
          dst += 1;
@@ -893,7 +1318,13 @@ util_format_z32_float_s8x24_uint_pack_s_8uint(uint8_t *restrict dst_row, unsigne
    for(y = 0; y < height; ++y) {
       const uint8_t *src = src_row;
       uint32_t *dst = ((uint32_t *)dst_row) + 1;
-      for(x = 0; x < width; ++x) {
+      x = 0;
+#ifdef __SSE2__
+      x = z32_float_s8x24_uint_pack_s_8uint_sse2((uint32_t *)dst_row, src, width);
+      dst += 2 * x;
+      src += x;
+#endif
+      for(; x < width; ++x) {
          *dst = *src;
          src += 1;
          dst += 2;
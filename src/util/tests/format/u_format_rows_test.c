@@ -0,0 +1,260 @@
+/*
+ * Copyright © 2026 Mesa contributors
+ *
+ * Permission is hereby granted, free of charge, to any person obtaining a
+ * copy of this software and associated documentation files (the "Software"),
+ * to deal in the Software without restriction, including without limitation
+ * the rights to use, copy, modify, merge, publish, distribute, sublicense,
+ * and/or sell copies of the Software, and to permit persons to whom the
+ * Software is furnished to do so, subject to the following conditions:
+ *
+ * The above copyright notice and this permission notice (including the next
+ * paragraph) shall be included in all copies or substantial portions of the
+ * Software.
+ *
+ * THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+ * IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+ * FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.  IN NO EVENT SHALL
+ * THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+ * LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+ * FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER
+ * DEALINGS IN THE SOFTWARE.
+ */
+
+/*
+ * u_format_test only converts single pixels, which never reaches the SIMD
+ * bodies of the row functions.  This converts rows of every width up to a
+ * few SIMD vectors plus a tail, and checks that:
+ *
+ * - the pack/unpack functions picked for this CPU give the same bytes as the
+ *   generic ones,
+ * - the depth/stencil row functions give the same bytes as converting the
+ *   row one pixel at a time, which only runs their scalar code.
+ */
+
+#include <stdlib.h>
+#include <stdio.h>
+#include <string.h>
+
+#include "util/u_cpu_detect.h"
+#include "util/format/u_format.h"
+
+
+#define MAX_WIDTH 67
+#define ROWS 3
+/* padding at the end of each row, which must be left alone */
+#define PAD 16
+/* the largest pixels are 4 floats */
+#define ROW_SIZE (MAX_WIDTH * 16 + PAD)
+#define BUF_SIZE (ROWS * ROW_SIZE)
+
+
+static uint8_t src_bytes[BUF_SIZE];
+static uint8_t src_packed[BUF_SIZE];
+static float src_floats[BUF_SIZE / 4];
+static uint32_t src_uints[BUF_SIZE / 4];
+static uint8_t dst_a[BUF_SIZE];
+static uint8_t dst_b[BUF_SIZE];
+
+
+static float
+random_float(void)
+{
+   /* mostly in [-0.25, 1.25], where the unorm conversions round, with some
+    * larger values for the half float formats
+    */
+   if (rand() % 4 == 0)
+      return (rand() % 200000) / 1.7f - 50000.0f;
+   return (rand() % 1500) / 1000.0f - 0.25f;
+}
+
+static void
+init_sources(void)
+{
+   for (unsigned i = 0; i < BUF_SIZE; i++)
+      src_bytes[i] = rand();
+   for (unsigned i = 0; i < BUF_SIZE / 4; i++) {
+      src_floats[i] = random_float();
+      src_uints[i] = (uint32_t)rand() ^ ((uint32_t)rand() << 16);
+   }
+}
+
+/* Fills src_packed with rows of the format.  Float channels are packed from
+ * finite values, as NaNs may be converted differently by different paths.
+ */
+static void
+init_packed(const struct util_format_description *desc)
+{
+   const struct util_format_pack_description *pack =
+      util_format_pack_description_generic(desc->format);
+   boolean has_float = FALSE;
+
+   memcpy(src_packed, src_bytes, BUF_SIZE);
+
+   for (unsigned i = 0; i < desc->nr_channels; i++) {
+      if (desc->channel[i].type == UTIL_FORMAT_TYPE_FLOAT)
+         has_float = TRUE;
+   }
+
+   if (!has_float || !pack)
+      return;
+
+   if (util_format_is_depth_or_stencil(desc->format)) {
+      if (pack->pack_z_float)
+         pack->pack_z_float(src_packed, ROW_SIZE, src_floats, MAX_WIDTH * 4,
+                            MAX_WIDTH, ROWS);
+      if (pack->pack_s_8uint)
+         pack->pack_s_8uint(src_packed, ROW_SIZE, src_bytes, MAX_WIDTH,
+                            MAX_WIDTH, ROWS);
+   } else if (pack->pack_rgba_float) {
+      pack->pack_rgba_float(src_packed, ROW_SIZE, src_floats, MAX_WIDTH * 16,
+                            MAX_WIDTH, ROWS);
+   }
+}
+
+static boolean
+check(const struct util_format_description *desc, const char *func,
+      unsigned width)
+{
+   if (memcmp(dst_a, dst_b, BUF_SIZE) == 0)
+      return TRUE;
+
+   printf("FAILED: %s %s with width %u\n", desc->short_name, func, width);
+   return FALSE;
+}
+
+/* Runs a pack or unpack function of both tables on the same rows */
+#define TEST_RECT(a, b, name, dst_bpp, src, src_stride) \
+   if ((a)->name && (a)->name != (b)->name) { \
+      for (unsigned w = 1; w <= MAX_WIDTH; w++) { \
+         unsigned dst_stride = w * (dst_bpp) + PAD; \
+         memset(dst_a, 0xcd, BUF_SIZE); \
+         memset(dst_b, 0xcd, BUF_SIZE); \
+         (a)->name((void *)dst_a, dst_stride, src, src_stride, w, ROWS); \
+         (b)->name((void *)dst_b, dst_stride, src, src_stride, w, ROWS); \
+         if (!check(desc, #name, w)) \
+            success = FALSE; \
+      } \
+   }
+
+/* Same for the unpack functions that only take a row */
+#define TEST_ROW(a, b, name, dst_bpp, src, src_stride) \
+   if ((a)->name && (a)->name != (b)->name) { \
+      for (unsigned w = 1; w <= MAX_WIDTH; w++) { \
+         unsigned dst_stride = w * (dst_bpp) + PAD; \
+         memset(dst_a, 0xcd, BUF_SIZE); \
+         memset(dst_b, 0xcd, BUF_SIZE); \
+         for (unsigned y = 0; y < ROWS; y++) { \
+            (a)->name((void *)(dst_a + y * dst_stride), (const uint8_t *)(src) + y * (src_stride), w); \
+            (b)->name((void *)(dst_b + y * dst_stride), (const uint8_t *)(src) + y * (src_stride), w); \
+         } \
+         if (!check(desc, #name, w)) \
+            success = FALSE; \
+      } \
+   }
+
+/* Runs a depth/stencil function on whole rows, and one pixel at a time */
+#define TEST_PIXELS(d, name, dst_type, dst_bpp, src_type, src_bpp, src) \
+   if ((d)->name) { \
+      for (unsigned w = 1; w <= MAX_WIDTH; w++) { \
+         unsigned dst_stride = w * (dst_bpp) + PAD; \
+         unsigned src_stride = MAX_WIDTH * (src_bpp); \
+         memset(dst_a, 0xcd, BUF_SIZE); \
+         memset(dst_b, 0xcd, BUF_SIZE); \
+         (d)->name((dst_type *)dst_a, dst_stride, (const src_type *)(src), src_stride, w, ROWS); \
+         for (unsigned y = 0; y < ROWS; y++) { \
+            for (unsigned x = 0; x < w; x++) { \
+               (d)->name((dst_type *)(dst_b + y * dst_stride + x * (dst_bpp)), 0, \
+                         (const src_type *)((const uint8_t *)(src) + y * src_stride + x * (src_bpp)), 0, \
+                         1, 1); \
+            } \
+         } \
+         if (!check(desc, #name, w)) \
+            success = FALSE; \
+      } \
+   }
+
+static boolean
+test_format(const struct util_format_description *desc)
+{
+   const struct util_format_pack_description *pack =
+      util_format_pack_description(desc->format);
+   const struct util_format_pack_description *pack_generic =
+      util_format_pack_description_generic(desc->format);
+   const struct util_format_unpack_description *unpack =
+      util_format_unpack_description(desc->format);
+   const struct util_format_unpack_description *unpack_generic =
+      util_format_unpack_description_generic(desc->format);
+   const unsigned bpp = desc->block.bits / 8;
+   boolean success = TRUE;
+
+   init_packed(desc);
+
+   if (pack && pack_generic) {
+      TEST_RECT(pack, pack_generic, pack_rgba_8unorm, bpp,
+                src_bytes, MAX_WIDTH * 4);
+      TEST_RECT(pack, pack_generic, pack_rgba_float, bpp,
+                src_floats, MAX_WIDTH * 16);
+   }
+
+   if (unpack && unpack_generic) {
+      TEST_ROW(unpack, unpack_generic, unpack_rgba_8unorm, 4,
+               src_packed, ROW_SIZE);
+      TEST_ROW(unpack, unpack_generic, unpack_rgba, 16,
+               src_packed, ROW_SIZE);
+   }
+
+   if (util_format_is_depth_or_stencil(desc->format)) {
+      if (unpack) {
+         TEST_PIXELS(unpack, unpack_z_float, float, 4, uint8_t, bpp, src_packed);
+         TEST_PIXELS(unpack, unpack_z_32unorm, uint32_t, 4, uint8_t, bpp, src_packed);
+         TEST_PIXELS(unpack, unpack_s_8uint, uint8_t, 1, uint8_t, bpp, src_packed);
+      }
+      if (pack) {
+         /* the stencil and depth packs keep the other component of dst */
+         TEST_PIXELS(pack, pack_z_float, uint8_t, bpp, float, 4, src_floats);
+         TEST_PIXELS(pack, pack_z_32unorm, uint8_t, bpp, uint32_t, 4, src_uints);
+         TEST_PIXELS(pack, pack_s_8uint, uint8_t, bpp, uint8_t, 1, src_bytes);
+      }
+   }
+
+   return success;
+}
+
+static boolean
+test_all(void)
+{
+   enum pipe_format format;
+   boolean success = TRUE;
+
+   init_sources();
+
+   for (format = 1; format < PIPE_FORMAT_COUNT; ++format) {
+      const struct util_format_description *desc;
+
+      desc = util_format_description(format);
+      if (!desc || desc->block.width != 1 || desc->block.height != 1)
+         continue;
+
+      /* its depth/stencil functions only assert */
+      if (format == PIPE_FORMAT_Z16_UNORM_S8_UINT)
+         continue;
+
+      if (!test_format(desc))
+         success = FALSE;
+   }
+
+   return success;
+}
+
+
+int main(int argc, char **argv)
+{
+   boolean success;
+
+   util_cpu_detect();
+
+   success = test_all();
+
+   return success ? 0 : 1;
+}
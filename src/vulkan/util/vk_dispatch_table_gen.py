@@ -28,23 +28,34 @@ COPYRIGHT = """\
 import argparse
 import math
 import os
-import xml.etree.ElementTree as et
+import sys
 
-from collections import OrderedDict, namedtuple
-from mako.template import Template
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
 
 # Mesa-local imports must be declared in meson variable
 # '{file_without_suffix}_depend_files'.
 from vk_extensions import *
 
-# We generate a static hash table for entry point lookup
-# (vkGetProcAddress). We use a linear congruential generator for our hash
-# function and a power-of-two size table. The prime numbers are determined
-# experimentally.
-
-TEMPLATE_H = Template(COPYRIGHT + """\
-/* This file generated from ${filename}, don't edit directly. */
+# lxml parses the registry noticeably faster, but is not a hard dependency.
+# This has to come after the vk_extensions import, which brings its own 'et'.
+try:
+    import lxml.etree as et
+except ImportError:
+    import xml.etree.ElementTree as et
 
+# We generate a static perfect hash table for entry point lookup
+# (vkGetProcAddress). We use a linear congruential generator for our hash
+# function and a power-of-two size table. The strings are split in buckets by
+# the low bits of their hash, and each bucket gets a displacement that moves
+# all of its strings to free slots of the table, so a lookup is a single
+# probe. The prime numbers are determined experimentally.
+
+# The output is put together directly in Python rather than through a
+# template engine: it is mostly the same few lines per entrypoint, and this
+# keeps the generator down to the standard library.
+H_PROLOGUE = """\
 #ifndef VK_DISPATCH_TABLE_H
 #define VK_DISPATCH_TABLE_H
 
@@ -66,62 +77,9 @@ TEMPLATE_H = Template(COPYRIGHT + """\
 #ifdef __cplusplus
 extern "C" {
 #endif
+"""
 
-<%def name="dispatch_table(type, entrypoints)">
-struct vk_${type}_dispatch_table {
-% for e in entrypoints:
-  % if e.alias:
-    <% continue %>
-  % endif
-  % if e.guard is not None:
-#ifdef ${e.guard}
-  % endif
-  % if e.aliases:
-    union {
-        PFN_vk${e.name} ${e.name};
-      % for a in e.aliases:
-        PFN_vk${a.name} ${a.name};
-      % endfor
-    };
-  % else:
-    PFN_vk${e.name} ${e.name};
-  % endif
-  % if e.guard is not None:
-#else
-    % if e.aliases:
-    union {
-        PFN_vkVoidFunction ${e.name};
-      % for a in e.aliases:
-        PFN_vkVoidFunction ${a.name};
-      % endfor
-    };
-    % else:
-    PFN_vkVoidFunction ${e.name};
-    % endif
-#endif
-  % endif
-% endfor
-};
-
-struct vk_${type}_entrypoint_table {
-% for e in entrypoints:
-  % if e.guard is not None:
-#ifdef ${e.guard}
-  % endif
-    PFN_vk${e.name} ${e.name};
-  % if e.guard is not None:
-#else
-    PFN_vkVoidFunction ${e.name};
-# endif
-  % endif
-% endfor
-};
-</%def>
-
-${dispatch_table('instance', instance_entrypoints)}
-${dispatch_table('physical_device', physical_device_entrypoints)}
-${dispatch_table('device', device_entrypoints)}
-
+H_EPILOGUE = """\
 void
 vk_instance_dispatch_table_load(struct vk_instance_dispatch_table *table,
                                 PFN_vkGetInstanceProcAddr gpa,
@@ -192,11 +150,74 @@ extern struct vk_device_dispatch_table vk_device_trampolines;
 #endif
 
 #endif /* VK_DISPATCH_TABLE_H */
-""", output_encoding='utf-8')
+"""
 
-TEMPLATE_C = Template(COPYRIGHT + """\
-/* This file generated from ${filename}, don't edit directly. */
+def emit_guarded(out, entrypoints, emit, emit_else=None):
+    """Call emit(out, e) for each entrypoint, with a single #ifdef around each
+    run of entrypoints sharing the same guard. emit_else(out, e) fills the
+    #else branch of those, if given.
+    """
+    for guard, group in groupby(entrypoints, key=lambda e: e.guard):
+        if guard is None:
+            for e in group:
+                emit(out, e)
+            continue
 
+        group = list(group)
+        out.append('#ifdef %s' % guard)
+        for e in group:
+            emit(out, e)
+        if emit_else is not None:
+            out.append('#else')
+            for e in group:
+                emit_else(out, e)
+        out.append('#endif')
+
+def dispatch_table_h(type, entrypoints):
+    def member(out, e, pfn):
+        if e.aliases:
+            out.append('    union {')
+            out.append('        %s %s;' % (pfn(e), e.name))
+            for a in e.aliases:
+                out.append('        %s %s;' % (pfn(a), a.name))
+            out.append('    };')
+        else:
+            out.append('    %s %s;' % (pfn(e), e.name))
+
+    def typed(e):
+        return 'PFN_vk' + e.name
+
+    def void(e):
+        return 'PFN_vkVoidFunction'
+
+    out = []
+    out.append('struct vk_%s_dispatch_table {' % type)
+    emit_guarded(out, [e for e in entrypoints if not e.alias],
+                 lambda out, e: member(out, e, typed),
+                 lambda out, e: member(out, e, void))
+    out.append('};')
+    out.append('')
+
+    out.append('struct vk_%s_entrypoint_table {' % type)
+    emit_guarded(out, entrypoints,
+                 lambda out, e: out.append('    %s %s;' % (typed(e), e.name)),
+                 lambda out, e: out.append('    %s %s;' % (void(e), e.name)))
+    out.append('};')
+
+    return '\n'.join(out) + '\n'
+
+def render_h(instance_entrypoints, physical_device_entrypoints,
+             device_entrypoints, filename):
+    return [
+        "/* This file generated from %s, don't edit directly. */\n" % filename,
+        H_PROLOGUE,
+        dispatch_table_h('instance', instance_entrypoints),
+        dispatch_table_h('physical_device', physical_device_entrypoints),
+        dispatch_table_h('device', device_entrypoints),
+        H_EPILOGUE,
+    ]
+
+C_PROLOGUE = """\
 #include "vk_device.h"
 #include "vk_dispatch_table.h"
 #include "vk_instance.h"
@@ -205,46 +226,63 @@ TEMPLATE_C = Template(COPYRIGHT + """\
 
 #include "util/macros.h"
 #include "string.h"
+"""
 
-<%def name="load_dispatch_table(type, VkType, ProcAddr, entrypoints)">
-void
-vk_${type}_dispatch_table_load(struct vk_${type}_dispatch_table *table,
-                               PFN_vk${ProcAddr} gpa,
-                               ${VkType} obj)
+C_GPA_TRY = """\
+/* Returns the first of the given names the loader knows about */
+static PFN_vkVoidFunction
+%(name)s(PFN_vk%(ProcAddr)s gpa, %(VkType)s obj,
+%(indent)s const char *const *names, unsigned count)
 {
-% if type != 'physical_device':
-    table->${ProcAddr} = gpa;
-% endif
-% for e in entrypoints:
-  % if e.alias or e.name == '${ProcAddr}':
-    <% continue %>
-  % endif
-  % if e.guard is not None:
-#ifdef ${e.guard}
-  % endif
-    table->${e.name} = (PFN_vk${e.name}) gpa(obj, "vk${e.name}");
-  % for a in e.aliases:
-    if (table->${e.name} == NULL) {
-        table->${e.name} = (PFN_vk${e.name}) gpa(obj, "vk${a.name}");
-    }
-  % endfor
-  % if e.guard is not None:
-#endif
-  % endif
-% endfor
+    PFN_vkVoidFunction func = NULL;
+    for (unsigned i = 0; i < count && func == NULL; i++)
+        func = gpa(obj, names[i]);
+    return func;
 }
-</%def>
+"""
 
-${load_dispatch_table('instance', 'VkInstance', 'GetInstanceProcAddr',
-                      instance_entrypoints)}
+def gpa_try_c(name, VkType, ProcAddr):
+    return C_GPA_TRY % {
+        'name': name,
+        'VkType': VkType,
+        'ProcAddr': ProcAddr,
+        'indent': ' ' * len(name),
+    }
 
-${load_dispatch_table('physical_device', 'VkInstance', 'GetInstanceProcAddr',
-                      physical_device_entrypoints)}
+def load_dispatch_table_c(type, VkType, ProcAddr, gpa_try, entrypoints):
+    func = 'vk_%s_dispatch_table_load(' % type
+    indent = ' ' * len(func)
+
+    out = []
+    out.append('void')
+    out.append(func + 'struct vk_%s_dispatch_table *table,' % type)
+    out.append(indent + 'PFN_vk%s gpa,' % ProcAddr)
+    out.append(indent + '%s obj)' % VkType)
+    out.append('{')
+    if type != 'physical_device':
+        out.append('    table->%s = gpa;' % ProcAddr)
+
+    def load(out, e):
+        if e.aliases:
+            out.append('    {')
+            out.append('        static const char *const names[] = {')
+            out.append('            "vk%s",' % e.name)
+            for a in e.aliases:
+                out.append('            "vk%s",' % a.name)
+            out.append('        };')
+            out.append('        table->%s = (PFN_vk%s)' % (e.name, e.name))
+            out.append('            %s(gpa, obj, names, ARRAY_SIZE(names));' % gpa_try)
+            out.append('    }')
+        else:
+            out.append('    table->%s = (PFN_vk%s) gpa(obj, "vk%s");' %
+                       (e.name, e.name, e.name))
 
-${load_dispatch_table('device', 'VkDevice', 'GetDeviceProcAddr',
-                      device_entrypoints)}
+    emit_guarded(out, [e for e in entrypoints if not e.alias], load)
+    out.append('}')
 
+    return '\n'.join(out) + '\n'
 
+C_STRING_MAP_ENTRY = """\
 struct string_map_entry {
    uint32_t name;
    uint32_t hash;
@@ -255,40 +293,13 @@ struct string_map_entry {
  * point table to lots of little strings. The entries in the entry point table
  * store the index into this big string.
  */
+"""
 
-<%def name="strmap(strmap, prefix)">
-static const char ${prefix}_strings[] =
-% for s in strmap.sorted_strings:
-    "${s.string}\\0"
-% endfor
-;
-
-static const struct string_map_entry ${prefix}_string_map_entries[] = {
-% for s in strmap.sorted_strings:
-    { ${s.offset}, ${'{:0=#8x}'.format(s.hash)}, ${s.num} }, /* ${s.string} */
-% endfor
-};
-
-/* Hash table stats:
- * size ${len(strmap.sorted_strings)} entries
- * collisions entries:
-% for i in range(10):
- *     ${i}${'+' if i == 9 else ' '}     ${strmap.collisions[i]}
-% endfor
- */
-
-#define none 0xffff
-static const uint16_t ${prefix}_string_map[${strmap.hash_size}] = {
-% for e in strmap.mapping:
-    ${ '{:0=#6x}'.format(e) if e >= 0 else 'none' },
-% endfor
-};
-
+C_STRING_MAP_LOOKUP = """\
 static int
-${prefix}_string_map_lookup(const char *str)
+%(prefix)s_string_map_lookup(const char *str)
 {
-    static const uint32_t prime_factor = ${strmap.prime_factor};
-    static const uint32_t prime_step = ${strmap.prime_step};
+    static const uint32_t prime_factor = %(prime_factor)d;
     const struct string_map_entry *e;
     uint32_t hash, h;
     uint16_t i;
@@ -298,147 +309,127 @@ ${prefix}_string_map_lookup(const char *str)
     for (p = str; *p; p++)
         hash = hash * prime_factor + *p;
 
-    h = hash;
-    while (1) {
-        i = ${prefix}_string_map[h & ${strmap.hash_mask}];
-        if (i == none)
-           return -1;
-        e = &${prefix}_string_map_entries[i];
-        if (e->hash == hash && strcmp(str, ${prefix}_strings + e->name) == 0)
-            return e->num;
-        h += prime_step;
-    }
-
-    return -1;
-}
-</%def>
-
-${strmap(instance_strmap, 'instance')}
-${strmap(physical_device_strmap, 'physical_device')}
-${strmap(device_strmap, 'device')}
-
-<% assert len(instance_entrypoints) < 2**8 %>
-static const uint8_t instance_compaction_table[] = {
-% for e in instance_entrypoints:
-    ${e.disp_table_index},
-% endfor
-};
-
-<% assert len(physical_device_entrypoints) < 2**8 %>
-static const uint8_t physical_device_compaction_table[] = {
-% for e in physical_device_entrypoints:
-    ${e.disp_table_index},
-% endfor
-};
-
-<% assert len(device_entrypoints) < 2**16 %>
-static const uint16_t device_compaction_table[] = {
-% for e in device_entrypoints:
-    ${e.disp_table_index},
-% endfor
-};
-
-static bool
-vk_instance_entrypoint_is_enabled(int index, uint32_t core_version,
-                                  const struct vk_instance_extension_table *instance)
-{
-   switch (index) {
-% for e in instance_entrypoints:
-   case ${e.entry_table_index}:
-      /* ${e.name} */
-   % if e.core_version:
-      return ${e.core_version.c_vk_version()} <= core_version;
-   % elif e.extensions:
-     % for ext in e.extensions:
-        % if ext.type == 'instance':
-      if (instance->${ext.name[3:]}) return true;
-        % else:
-      /* All device extensions are considered enabled at the instance level */
-      return true;
-        % endif
-     % endfor
-      return false;
-   % else:
-      return true;
-   % endif
-% endfor
-   default:
-      return false;
-   }
-}
+    /* The table is a perfect hash: displacing the hash by the value stored
+     * for its bucket gives the one slot the string can be in.
+     */
+    h = hash ^ (%(prefix)s_string_map_disp[hash & %(bucket_mask)d] * %(displace_factor)#xu);
+    i = %(prefix)s_string_map[(h * %(slot_factor)#xu) >> %(slot_shift)d];
+    if (i == none)
+        return -1;
 
-/** Return true if the core version or extension in which the given entrypoint
- * is defined is enabled.
- *
- * If device is NULL, all device extensions are considered enabled.
- */
-static bool
-vk_physical_device_entrypoint_is_enabled(int index, uint32_t core_version,
-                                         const struct vk_instance_extension_table *instance)
-{
-   switch (index) {
-% for e in physical_device_entrypoints:
-   case ${e.entry_table_index}:
-      /* ${e.name} */
-   % if e.core_version:
-      return ${e.core_version.c_vk_version()} <= core_version;
-   % elif e.extensions:
-     % for ext in e.extensions:
-        % if ext.type == 'instance':
-      if (instance->${ext.name[3:]}) return true;
-        % else:
-      /* All device extensions are considered enabled at the instance level */
-      return true;
-        % endif
-     % endfor
-      return false;
-   % else:
-      return true;
-   % endif
-% endfor
-   default:
-      return false;
-   }
-}
+    e = &%(prefix)s_string_map_entries[i];
+    if (e->hash != hash || strcmp(str, %(prefix)s_strings + e->name) != 0)
+        return -1;
 
-/** Return true if the core version or extension in which the given entrypoint
- * is defined is enabled.
- *
- * If device is NULL, all device extensions are considered enabled.
- */
-static bool
-vk_device_entrypoint_is_enabled(int index, uint32_t core_version,
-                                const struct vk_instance_extension_table *instance,
-                                const struct vk_device_extension_table *device)
-{
-   switch (index) {
-% for e in device_entrypoints:
-   case ${e.entry_table_index}:
-      /* ${e.name} */
-   % if e.core_version:
-      return ${e.core_version.c_vk_version()} <= core_version;
-   % elif e.extensions:
-     % for ext in e.extensions:
-        % if ext.type == 'instance':
-      if (instance->${ext.name[3:]}) return true;
-        % else:
-      if (!device || device->${ext.name[3:]}) return true;
-        % endif
-     % endfor
-      return false;
-   % else:
-      return true;
-   % endif
-% endfor
-   default:
-      return false;
-   }
+    return e->num;
 }
+"""
 
-<%def name="dispatch_table_from_entrypoints(type)">
-void vk_${type}_dispatch_table_from_entrypoints(
-    struct vk_${type}_dispatch_table *dispatch_table,
-    const struct vk_${type}_entrypoint_table *entrypoint_table,
+def strmap_c(strmap, prefix):
+    out = []
+    out.append('static const char %s_strings[] =' % prefix)
+    for s in strmap.sorted_strings:
+        out.append('    "%s\\0"' % s.string)
+    out.append(';')
+    out.append('')
+
+    out.append('static const struct string_map_entry %s_string_map_entries[] = {' % prefix)
+    for s in strmap.sorted_strings:
+        out.append('    { %d, %s, %d }, /* %s */' %
+                   (s.offset, '{:0=#8x}'.format(s.hash), s.num, s.string))
+    out.append('};')
+    out.append('')
+
+    out.append('/* Hash table stats:')
+    out.append(' * size %d entries in %d slots' %
+               (len(strmap.sorted_strings), strmap.hash_size))
+    out.append(' * %d displacement buckets' % strmap.num_buckets)
+    out.append(' */')
+    out.append('')
+
+    out.append('static const uint16_t %s_string_map_disp[%d] = {' %
+               (prefix, strmap.num_buckets))
+    for d in strmap.displacements:
+        out.append('    {:0=#6x},'.format(d))
+    out.append('};')
+    out.append('')
+
+    out.append('#define none 0xffff')
+    out.append('static const uint16_t %s_string_map[%d] = {' %
+               (prefix, strmap.hash_size))
+    for e in strmap.mapping:
+        out.append('    %s,' % ('{:0=#6x}'.format(e) if e >= 0 else 'none'))
+    out.append('};')
+    out.append('')
+
+    out.append(C_STRING_MAP_LOOKUP % {
+        'prefix': prefix,
+        'prime_factor': strmap.prime_factor,
+        'bucket_mask': strmap.bucket_mask,
+        'displace_factor': strmap.displace_factor,
+        'slot_factor': strmap.slot_factor,
+        'slot_shift': strmap.slot_shift,
+    })
+
+    return '\n'.join(out)
+
+def compaction_table_c(type, index_type, entrypoints):
+    out = []
+    out.append('static const %s %s_compaction_table[] = {' % (index_type, type))
+    for e in entrypoints:
+        out.append('    %d,' % e.disp_table_index)
+    out.append('};')
+
+    return '\n'.join(out) + '\n'
+
+def entrypoint_is_enabled_c(type, entrypoints):
+    func = 'vk_%s_entrypoint_is_enabled(' % type
+    indent = ' ' * len(func)
+
+    out = []
+    out.append('/** Return true if the core version or extension in which the given entrypoint')
+    out.append(' * is defined is enabled.')
+    out.append(' *')
+    out.append(' * If device is NULL, all device extensions are considered enabled.')
+    out.append(' */')
+    out.append('static bool')
+    out.append(func + 'int index, uint32_t core_version,')
+    if type == 'device':
+        out.append(indent + 'const struct vk_instance_extension_table *instance,')
+        out.append(indent + 'const struct vk_device_extension_table *device)')
+    else:
+        out.append(indent + 'const struct vk_instance_extension_table *instance)')
+    out.append('{')
+    out.append('   switch (index) {')
+    for e in entrypoints:
+        out.append('   case %d:' % e.entry_table_index)
+        out.append('      /* %s */' % e.name)
+        if e.core_version:
+            out.append('      return %s <= core_version;' %
+                       e.core_version.c_vk_version())
+        elif e.extensions:
+            for ext in e.extensions:
+                if ext.type == 'instance':
+                    out.append('      if (instance->%s) return true;' % ext.name[3:])
+                elif type == 'device':
+                    out.append('      if (!device || device->%s) return true;' % ext.name[3:])
+                else:
+                    out.append('      /* All device extensions are considered enabled at the instance level */')
+                    out.append('      return true;')
+            out.append('      return false;')
+        else:
+            out.append('      return true;')
+    out.append('   default:')
+    out.append('      return false;')
+    out.append('   }')
+    out.append('}')
+
+    return '\n'.join(out) + '\n'
+
+C_DISPATCH_TABLE_FROM_ENTRYPOINTS = """\
+void vk_%(type)s_dispatch_table_from_entrypoints(
+    struct vk_%(type)s_dispatch_table *dispatch_table,
+    const struct vk_%(type)s_entrypoint_table *entrypoint_table,
     bool overwrite)
 {
     PFN_vkVoidFunction *disp = (PFN_vkVoidFunction *)dispatch_table;
@@ -446,7 +437,7 @@ void vk_${type}_dispatch_table_from_entrypoints(
 
     if (overwrite) {
         memset(dispatch_table, 0, sizeof(*dispatch_table));
-        for (unsigned i = 0; i < ARRAY_SIZE(${type}_compaction_table); i++) {
+        for (unsigned i = 0; i < ARRAY_SIZE(%(type)s_compaction_table); i++) {
 #ifdef _MSC_VER
             const uintptr_t zero = 0;
             if (entry[i] == NULL || memcmp(entry[i], &zero, sizeof(zero)) == 0)
@@ -454,50 +445,43 @@ void vk_${type}_dispatch_table_from_entrypoints(
             if (entry[i] == NULL)
 #endif
                 continue;
-            unsigned disp_index = ${type}_compaction_table[i];
+            unsigned disp_index = %(type)s_compaction_table[i];
             assert(disp[disp_index] == NULL);
             disp[disp_index] = entry[i];
         }
     } else {
-        for (unsigned i = 0; i < ARRAY_SIZE(${type}_compaction_table); i++) {
-            unsigned disp_index = ${type}_compaction_table[i];
+        for (unsigned i = 0; i < ARRAY_SIZE(%(type)s_compaction_table); i++) {
+            unsigned disp_index = %(type)s_compaction_table[i];
             if (disp[disp_index] == NULL)
                 disp[disp_index] = entry[i];
         }
     }
 }
-</%def>
-
-${dispatch_table_from_entrypoints('instance')}
-${dispatch_table_from_entrypoints('physical_device')}
-${dispatch_table_from_entrypoints('device')}
+"""
 
-<%def name="lookup_funcs(type)">
+C_LOOKUP_FUNCS = """\
 static PFN_vkVoidFunction
-vk_${type}_dispatch_table_get_for_entry_index(
-    const struct vk_${type}_dispatch_table *table, int entry_index)
+vk_%(type)s_dispatch_table_get_for_entry_index(
+    const struct vk_%(type)s_dispatch_table *table, int entry_index)
 {
-    assert(entry_index < ARRAY_SIZE(${type}_compaction_table));
-    int disp_index = ${type}_compaction_table[entry_index];
+    assert(entry_index < ARRAY_SIZE(%(type)s_compaction_table));
+    int disp_index = %(type)s_compaction_table[entry_index];
     return ((PFN_vkVoidFunction *)table)[disp_index];
 }
 
 PFN_vkVoidFunction
-vk_${type}_dispatch_table_get(
-    const struct vk_${type}_dispatch_table *table, const char *name)
+vk_%(type)s_dispatch_table_get(
+    const struct vk_%(type)s_dispatch_table *table, const char *name)
 {
-    int entry_index = ${type}_string_map_lookup(name);
+    int entry_index = %(type)s_string_map_lookup(name);
     if (entry_index < 0)
         return NULL;
 
-    return vk_${type}_dispatch_table_get_for_entry_index(table, entry_index);
+    return vk_%(type)s_dispatch_table_get_for_entry_index(table, entry_index);
 }
-</%def>
-
-${lookup_funcs('instance')}
-${lookup_funcs('physical_device')}
-${lookup_funcs('device')}
+"""
 
+C_GET_IF_SUPPORTED = """\
 PFN_vkVoidFunction
 vk_instance_dispatch_table_get_if_supported(
     const struct vk_instance_dispatch_table *table,
@@ -552,98 +536,121 @@ vk_device_dispatch_table_get_if_supported(
 
     return vk_device_dispatch_table_get_for_entry_index(table, entry_index);
 }
+"""
 
-% for e in physical_device_entrypoints:
-  % if e.alias:
-    <% continue %>
-  % endif
-  % if e.guard is not None:
-#ifdef ${e.guard}
-  % endif
-static VKAPI_ATTR ${e.return_type} VKAPI_CALL
-${e.prefixed_name('vk_tramp')}(${e.decl_params()})
-{
-    <% assert e.params[0].type == 'VkPhysicalDevice' %>
-    VK_FROM_HANDLE(vk_physical_device, vk_physical_device, ${e.params[0].name});
-  % if e.return_type == 'void':
-    vk_physical_device->dispatch_table.${e.name}(${e.call_params()});
-  % else:
-    return vk_physical_device->dispatch_table.${e.name}(${e.call_params()});
-  % endif
-}
-  % if e.guard is not None:
-#endif
-  % endif
-% endfor
-
-struct vk_physical_device_dispatch_table vk_physical_device_trampolines = {
-% for e in physical_device_entrypoints:
-  % if e.alias:
-    <% continue %>
-  % endif
-  % if e.guard is not None:
-#ifdef ${e.guard}
-  % endif
-    .${e.name} = ${e.prefixed_name('vk_tramp')},
-  % if e.guard is not None:
-#endif
-  % endif
-% endfor
-};
+def trampolines_c(type, entrypoints):
+    def trampoline(out, e):
+        out.append('static VKAPI_ATTR %s VKAPI_CALL' % e.return_type)
+        out.append('%s(%s)' % (e.prefixed_name('vk_tramp'), e.decl_params()))
+        out.append('{')
+
+        handle = e.params[0]
+        if type == 'physical_device':
+            assert handle.type == 'VkPhysicalDevice'
+            out.append('    VK_FROM_HANDLE(vk_physical_device, vk_physical_device, %s);' % handle.name)
+            table = 'vk_physical_device->dispatch_table'
+        elif handle.type == 'VkDevice':
+            out.append('    VK_FROM_HANDLE(vk_device, vk_device, %s);' % handle.name)
+            table = 'vk_device->dispatch_table'
+        elif handle.type in ('VkCommandBuffer', 'VkQueue'):
+            out.append('    struct vk_object_base *vk_object = (struct vk_object_base *)%s;' % handle.name)
+            table = 'vk_object->device->dispatch_table'
+        else:
+            out.append('    assert(!"Unhandled device child trampoline case: %s");' % handle.type)
+            table = None
+
+        if table is not None:
+            call = '%s.%s(%s);' % (table, e.name, e.call_params())
+            if e.return_type == 'void':
+                out.append('    ' + call)
+            else:
+                out.append('    return ' + call)
+        out.append('}')
+
+    def initializer(out, e):
+        out.append('    .%s = %s,' % (e.name, e.prefixed_name('vk_tramp')))
+
+    entrypoints = [e for e in entrypoints if not e.alias]
+
+    out = []
+    emit_guarded(out, entrypoints, trampoline)
+    out.append('')
+
+    out.append('struct vk_%s_dispatch_table vk_%s_trampolines = {' % (type, type))
+    emit_guarded(out, entrypoints, initializer)
+    out.append('};')
+
+    return '\n'.join(out) + '\n'
+
+def render_c(instance_entrypoints, physical_device_entrypoints,
+             device_entrypoints, instance_strmap, physical_device_strmap,
+             device_strmap, filename):
+    assert len(instance_entrypoints) < 2**8
+    assert len(physical_device_entrypoints) < 2**8
+    assert len(device_entrypoints) < 2**16
+
+    sections = [
+        "/* This file generated from %s, don't edit directly. */\n" % filename,
+        C_PROLOGUE,
+        gpa_try_c('instance_gpa_try', 'VkInstance', 'GetInstanceProcAddr'),
+        gpa_try_c('device_gpa_try', 'VkDevice', 'GetDeviceProcAddr'),
+        load_dispatch_table_c('instance', 'VkInstance', 'GetInstanceProcAddr',
+                              'instance_gpa_try', instance_entrypoints),
+        load_dispatch_table_c('physical_device', 'VkInstance', 'GetInstanceProcAddr',
+                              'instance_gpa_try', physical_device_entrypoints),
+        load_dispatch_table_c('device', 'VkDevice', 'GetDeviceProcAddr',
+                              'device_gpa_try', device_entrypoints),
+        C_STRING_MAP_ENTRY,
+        strmap_c(instance_strmap, 'instance'),
+        strmap_c(physical_device_strmap, 'physical_device'),
+        strmap_c(device_strmap, 'device'),
+        compaction_table_c('instance', 'uint8_t', instance_entrypoints),
+        compaction_table_c('physical_device', 'uint8_t', physical_device_entrypoints),
+        compaction_table_c('device', 'uint16_t', device_entrypoints),
+        entrypoint_is_enabled_c('instance', instance_entrypoints),
+        entrypoint_is_enabled_c('physical_device', physical_device_entrypoints),
+        entrypoint_is_enabled_c('device', device_entrypoints),
+    ]
+    for type in ('instance', 'physical_device', 'device'):
+        sections.append(C_DISPATCH_TABLE_FROM_ENTRYPOINTS % {'type': type})
+    for type in ('instance', 'physical_device', 'device'):
+        sections.append(C_LOOKUP_FUNCS % {'type': type})
+    sections.append(C_GET_IF_SUPPORTED)
+    sections.append(trampolines_c('physical_device', physical_device_entrypoints))
+    sections.append(trampolines_c('device', device_entrypoints))
+
+    return sections
+
+def write_sections(path, sections):
+    """Write out the copyright and the sections, one blank line apart.
+
+    The file is left untouched if it already has this content, so that its
+    mtime does not change and whatever includes it is not rebuilt for
+    nothing. Otherwise it is replaced atomically.
+    """
+    data = (COPYRIGHT + '\n'.join(sections)).encode('utf-8')
+
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return
+    except FileNotFoundError:
+        pass
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
 
-% for e in device_entrypoints:
-  % if e.alias:
-    <% continue %>
-  % endif
-  % if e.guard is not None:
-#ifdef ${e.guard}
-  % endif
-static VKAPI_ATTR ${e.return_type} VKAPI_CALL
-${e.prefixed_name('vk_tramp')}(${e.decl_params()})
-{
-  % if e.params[0].type == 'VkDevice':
-    VK_FROM_HANDLE(vk_device, vk_device, ${e.params[0].name});
-    % if e.return_type == 'void':
-    vk_device->dispatch_table.${e.name}(${e.call_params()});
-    % else:
-    return vk_device->dispatch_table.${e.name}(${e.call_params()});
-    % endif
-  % elif e.params[0].type in ('VkCommandBuffer', 'VkQueue'):
-    struct vk_object_base *vk_object = (struct vk_object_base *)${e.params[0].name};
-    % if e.return_type == 'void':
-    vk_object->device->dispatch_table.${e.name}(${e.call_params()});
-    % else:
-    return vk_object->device->dispatch_table.${e.name}(${e.call_params()});
-    % endif
-  % else:
-    assert(!"Unhandled device child trampoline case: ${e.params[0].type}");
-  % endif
-}
-  % if e.guard is not None:
-#endif
-  % endif
-% endfor
-
-struct vk_device_dispatch_table vk_device_trampolines = {
-% for e in device_entrypoints:
-  % if e.alias:
-    <% continue %>
-  % endif
-  % if e.guard is not None:
-#ifdef ${e.guard}
-  % endif
-    .${e.name} = ${e.prefixed_name('vk_tramp')},
-  % if e.guard is not None:
-#endif
-  % endif
-% endfor
-};
-""", output_encoding='utf-8')
 
 U32_MASK = 2**32 - 1
 
 PRIME_FACTOR = 5024183
-PRIME_STEP = 19
+
+# Multiplicative hashing constants used to pick the slot from the hash and
+# the bucket displacement.
+DISPLACE_FACTOR = 0x9e3779b1
+SLOT_FACTOR = 0x85ebca6b
 
 class StringIntMapEntry(object):
     def __init__(self, string, num):
@@ -681,24 +688,47 @@ class StringIntMap(object):
             offset += len(entry.string) + 1
 
         # Save off some values that we'll need in C
-        self.hash_size = round_to_pow2(len(self.strings) * 1.25)
-        self.hash_mask = self.hash_size - 1
+        self.hash_size = round_to_pow2(max(len(self.strings) * 1.25, 2))
+        self.slot_shift = 32 - int(math.log(self.hash_size, 2))
+        self.num_buckets = round_to_pow2(max(len(self.strings) / 4, 1))
+        self.bucket_mask = self.num_buckets - 1
         self.prime_factor = PRIME_FACTOR
-        self.prime_step = PRIME_STEP
+        self.displace_factor = DISPLACE_FACTOR
+        self.slot_factor = SLOT_FACTOR
 
-        self.mapping = [-1] * self.hash_size
-        self.collisions = [0] * 10
+        buckets = [[] for _ in range(self.num_buckets)]
         for idx, s in enumerate(self.sorted_strings):
-            level = 0
-            h = s.hash
-            while self.mapping[h & self.hash_mask] >= 0:
-                h = h + PRIME_STEP
-                level = level + 1
-            self.collisions[min(level, 9)] += 1
-            self.mapping[h & self.hash_mask] = idx
+            buckets[s.hash & self.bucket_mask].append(idx)
+
+        # Place the biggest buckets first, while the table is still empty.
+        self.mapping = [-1] * self.hash_size
+        self.displacements = [0] * self.num_buckets
+        for b in sorted(range(self.num_buckets), key=lambda b: -len(buckets[b])):
+            if not buckets[b]:
+                break
+            for d in range(2**16):
+                slots = [self.slot(self.sorted_strings[idx].hash, d)
+                         for idx in buckets[b]]
+                if len(set(slots)) == len(slots) and \
+                   all(self.mapping[slot] < 0 for slot in slots):
+                    break
+            else:
+                raise Exception('No displacement found for bucket {}'.format(b))
+
+            self.displacements[b] = d
+            for idx, slot in zip(buckets[b], slots):
+                self.mapping[slot] = idx
+
+    def slot(self, h, d):
+        """Return the same slot as we will calculate in C."""
+        h = h ^ ((d * DISPLACE_FACTOR) & U32_MASK)
+        return ((h * SLOT_FACTOR) & U32_MASK) >> self.slot_shift
 
 EntrypointParam = namedtuple('EntrypointParam', 'type name decl')
 
+# Entrypoints whose first parameter is one of these go in the device table
+DEVICE_HANDLE_TYPES = frozenset(['VkDevice', 'VkCommandBuffer', 'VkQueue'])
+
 class EntrypointBase(object):
     def __init__(self, name):
         assert name.startswith('vk')
@@ -709,6 +739,14 @@ class EntrypointBase(object):
         # Extensions which require this entrypoint
         self.core_version = None
         self.extensions = []
+        # Which dispatch table this goes in, set by the subclasses
+        self.kind = None
+
+    def is_physical_device_entrypoint(self):
+        return self.kind == 'physical_device'
+
+    def is_device_entrypoint(self):
+        return self.kind == 'device'
 
     def prefixed_name(self, prefix):
         return prefix + '_' + self.name
@@ -722,11 +760,12 @@ class Entrypoint(EntrypointBase):
         self.aliases = []
         self.disp_table_index = None
 
-    def is_physical_device_entrypoint(self):
-        return self.params[0].type in ('VkPhysicalDevice', )
-
-    def is_device_entrypoint(self):
-        return self.params[0].type in ('VkDevice', 'VkCommandBuffer', 'VkQueue')
+        if params[0].type in DEVICE_HANDLE_TYPES:
+            self.kind = 'device'
+        elif params[0].type == 'VkPhysicalDevice':
+            self.kind = 'physical_device'
+        else:
+            self.kind = 'instance'
 
     def decl_params(self):
         return ', '.join(p.decl for p in self.params)
@@ -739,12 +778,7 @@ class EntrypointAlias(EntrypointBase):
         super(EntrypointAlias, self).__init__(name)
         self.alias = entrypoint
         entrypoint.aliases.append(self)
-
-    def is_physical_device_entrypoint(self):
-        return self.alias.is_physical_device_entrypoint()
-
-    def is_device_entrypoint(self):
-        return self.alias.is_device_entrypoint()
+        self.kind = entrypoint.kind
 
     def prefixed_name(self, prefix):
         return self.alias.prefixed_name(prefix)
@@ -767,81 +801,132 @@ class EntrypointAlias(EntrypointBase):
     def call_params(self):
         return self.alias.call_params()
 
-def get_entrypoints(doc, entrypoints_to_defines):
-    """Extract the entry points from the registry."""
-    entrypoints = OrderedDict()
-
-    for command in doc.findall('./commands/command'):
-        if 'alias' in command.attrib:
-            alias = command.attrib['name']
-            target = command.attrib['alias']
-            entrypoints[alias] = EntrypointAlias(alias, entrypoints[target])
-        else:
-            name = command.find('./proto/name').text
-            ret_type = command.find('./proto/type').text
-            params = [EntrypointParam(
-                type=p.find('./type').text,
-                name=p.find('./name').text,
-                decl=''.join(p.itertext())
-            ) for p in command.findall('./param')]
-            guard = entrypoints_to_defines.get(name)
-            # They really need to be unique
-            assert name not in entrypoints
-            entrypoints[name] = Entrypoint(name, ret_type, params, guard)
-
-    for feature in doc.findall('./feature'):
-        assert feature.attrib['api'] == 'vulkan'
-        version = VkVersion(feature.attrib['number'])
-        for command in feature.findall('./require/command'):
-            e = entrypoints[command.attrib['name']]
-            assert e.core_version is None
-            e.core_version = version
-
-    for extension in doc.findall('.extensions/extension'):
-        if extension.attrib['supported'] != 'vulkan':
-            continue
-
-        ext_name = extension.attrib['name']
-
-        ext = Extension(ext_name, 1, True)
-        ext.type = extension.attrib['type']
-
-        for command in extension.findall('./require/command'):
-            e = entrypoints[command.attrib['name']]
-            assert e.core_version is None
-            e.extensions.append(ext)
-
-    return entrypoints.values()
-
-
-def get_entrypoints_defines(doc):
-    """Maps entry points to extension defines."""
-    entrypoints_to_defines = {}
-
+def get_entrypoint_param(param):
+    """Gather the type, name and declaration of a <param> in one walk.
+
+    The same few types, names and declarations come back over and over in the
+    registry, so they are interned to share a single copy of each.
+    """
+    p_type = p_name = None
+    decl = [param.text or '']
+    for child in param:
+        if child.tag == 'type' and p_type is None:
+            p_type = child.text
+        elif child.tag == 'name' and p_name is None:
+            p_name = child.text
+        decl.append(child.text or '')
+        decl.append(child.tail or '')
+    return EntrypointParam(type=sys.intern(p_type), name=sys.intern(p_name),
+                           decl=sys.intern(''.join(decl)))
+
+def get_entrypoints(doc):
+    """Extract the entry points from the registry.
+
+    This goes over the sections of the registry once, in order. The platform
+    guards come from the extensions, which follow the commands, so they are
+    applied to the entrypoints that were already created.
+
+    The entrypoints are returned split by the dispatch table they go in, in
+    registry order.
+    """
+    entrypoints = {}
+    entrypoints_by_kind = {
+        'instance': [],
+        'physical_device': [],
+        'device': [],
+    }
     platform_define = {}
-    for platform in doc.findall('./platforms/platform'):
-        name = platform.attrib['name']
-        define = platform.attrib['protect']
-        platform_define[name] = define
 
-    for extension in doc.findall('./extensions/extension[@platform]'):
-        platform = extension.attrib['platform']
+    for elem in doc.getroot():
+        if elem.tag == 'platforms':
+            for platform in elem.iterfind('./platform'):
+                name = platform.attrib['name']
+                define = platform.attrib['protect']
+                platform_define[name] = define
+        elif elem.tag == 'commands':
+            for command in elem.iterfind('./command'):
+                e = add_command(entrypoints, command)
+                entrypoints_by_kind[e.kind].append(e)
+        elif elem.tag == 'feature':
+            add_feature(entrypoints, elem)
+        elif elem.tag == 'extensions':
+            for extension in elem.iterfind('./extension'):
+                add_extension(entrypoints, platform_define, extension)
+
+    return entrypoints_by_kind
+
+def add_command(entrypoints, command):
+    attrib = command.attrib
+    target = attrib.get('alias')
+    if target is not None:
+        alias = attrib['name']
+        e = EntrypointAlias(alias, entrypoints[target])
+        entrypoints[alias] = e
+    else:
+        proto = command.find('./proto')
+        name = proto.find('./name').text
+        ret_type = proto.find('./type').text
+        params = [get_entrypoint_param(p)
+                  for p in command.iterfind('./param')]
+        # They really need to be unique
+        assert name not in entrypoints
+        e = Entrypoint(name, ret_type, params)
+        entrypoints[name] = e
+
+    return e
+
+def add_feature(entrypoints, feature):
+    assert feature.attrib['api'] == 'vulkan'
+    version = VkVersion(feature.attrib['number'])
+    for command in feature.findall('./require/command'):
+        e = entrypoints[command.attrib['name']]
+        assert e.core_version is None
+        e.core_version = version
+
+def add_extension(entrypoints, platform_define, extension):
+    commands = [c.attrib['name']
+                for c in extension.findall('./require/command')]
+
+    attrib = extension.attrib
+
+    # Maps entry points to extension defines.
+    platform = attrib.get('platform')
+    if platform is not None:
         define = platform_define[platform]
+        for name in commands:
+            e = entrypoints.get(name)
+            if e is not None and e.alias is None:
+                e.guard = define
+
+    if attrib['supported'] != 'vulkan':
+        return
 
-        for entrypoint in extension.findall('./require/command'):
-            fullname = entrypoint.attrib['name']
-            entrypoints_to_defines[fullname] = define
+    ext = Extension(attrib['name'], 1, True)
+    ext.type = attrib['type']
 
-    return entrypoints_to_defines
+    for name in commands:
+        e = entrypoints[name]
+        assert e.core_version is None
+        e.extensions.append(ext)
 
 def get_entrypoints_from_xml(xml_files):
-    entrypoints = []
+    instance_entrypoints = []
+    physical_device_entrypoints = []
+    device_entrypoints = []
 
-    for filename in xml_files:
-        doc = et.parse(filename)
-        entrypoints += get_entrypoints(doc, get_entrypoints_defines(doc))
+    # The parsing itself happens in C, and lxml lets go of the GIL while it
+    # runs, so several registries can be parsed at once. The entrypoints are
+    # still gathered in the order of the files.
+    with ThreadPoolExecutor() as executor:
+        docs = executor.map(et.parse, xml_files)
 
-    return entrypoints
+    for doc in docs:
+        entrypoints_by_kind = get_entrypoints(doc)
+        instance_entrypoints.extend(entrypoints_by_kind['instance'])
+        physical_device_entrypoints.extend(entrypoints_by_kind['physical_device'])
+        device_entrypoints.extend(entrypoints_by_kind['device'])
+
+    return instance_entrypoints, physical_device_entrypoints, device_entrypoints
 
 def main():
     parser = argparse.ArgumentParser()
@@ -854,18 +939,15 @@ def main():
                         dest='xml_files')
     args = parser.parse_args()
 
-    entrypoints = get_entrypoints_from_xml(args.xml_files)
+    instance_entrypoints, physical_device_entrypoints, device_entrypoints = \
+        get_entrypoints_from_xml(args.xml_files)
 
-    device_entrypoints = []
-    physical_device_entrypoints = []
-    instance_entrypoints = []
-    for e in entrypoints:
-        if e.is_device_entrypoint():
-            device_entrypoints.append(e)
-        elif e.is_physical_device_entrypoint():
-            physical_device_entrypoints.append(e)
-        else:
-            instance_entrypoints.append(e)
+    # Move the entrypoints sharing a platform guard next to each other, so
+    # each guard is only opened once per table. The order is stable otherwise,
+    # and everything that depends on it is generated from the same lists.
+    for entrypoints in (instance_entrypoints, physical_device_entrypoints,
+                        device_entrypoints):
+        entrypoints.sort(key=lambda e: e.guard or '')
 
     for i, e in enumerate(e for e in device_entrypoints if not e.alias):
         e.disp_table_index = i
@@ -894,35 +976,21 @@ def main():
         instance_strmap.add_string("vk" + e.name, e.entry_table_index)
     instance_strmap.bake()
 
-    # For outputting entrypoints.h we generate a anv_EntryPoint() prototype
-    # per entry point.
-    try:
-        if args.out_h:
-            with open(args.out_h, 'wb') as f:
-                f.write(TEMPLATE_H.render(instance_entrypoints=instance_entrypoints,
-                                          physical_device_entrypoints=physical_device_entrypoints,
-                                          device_entrypoints=device_entrypoints,
-                                          filename=os.path.basename(__file__)))
-        if args.out_c:
-            with open(args.out_c, 'wb') as f:
-                f.write(TEMPLATE_C.render(instance_entrypoints=instance_entrypoints,
-                                          physical_device_entrypoints=physical_device_entrypoints,
-                                          device_entrypoints=device_entrypoints,
-                                          instance_strmap=instance_strmap,
-                                          physical_device_strmap=physical_device_strmap,
-                                          device_strmap=device_strmap,
-                                          filename=os.path.basename(__file__)))
-    except Exception:
-        # In the event there's an error, this imports some helpers from mako
-        # to print a useful stack trace and prints it, then exits with
-        # status 1, if python is run with debug; otherwise it just raises
-        # the exception
-        if __debug__:
-            import sys
-            from mako import exceptions
-            sys.stderr.write(exceptions.text_error_template().render() + '\n')
-            sys.exit(1)
-        raise
+    if args.out_h:
+        write_sections(args.out_h,
+                       render_h(instance_entrypoints,
+                                physical_device_entrypoints,
+                                device_entrypoints,
+                                os.path.basename(__file__)))
+    if args.out_c:
+        write_sections(args.out_c,
+                       render_c(instance_entrypoints,
+                                physical_device_entrypoints,
+                                device_entrypoints,
+                                instance_strmap,
+                                physical_device_strmap,
+                                device_strmap,
+                                os.path.basename(__file__)))
 
 
 if __name__ == '__main__':
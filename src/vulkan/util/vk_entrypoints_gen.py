@@ -153,27 +153,6 @@ ${entrypoint_table('physical_device', physical_device_entrypoints, physical_devi
 ${entrypoint_table('device', device_entrypoints, device_prefixes)}
 """, output_encoding='utf-8')
 
-def get_entrypoints_defines(doc):
-    """Maps entry points to extension defines."""
-    entrypoints_to_defines = {}
-
-    platform_define = {}
-    for platform in doc.findall('./platforms/platform'):
-        name = platform.attrib['name']
-        define = platform.attrib['protect']
-        platform_define[name] = define
-
-    for extension in doc.findall('./extensions/extension[@platform]'):
-        platform = extension.attrib['platform']
-        define = platform_define[platform]
-
-        for entrypoint in extension.findall('./require/command'):
-            fullname = entrypoint.attrib['name']
-            entrypoints_to_defines[fullname] = define
-
-    return entrypoints_to_defines
-
-
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--out-c', required=True, help='Output C file.')
@@ -197,18 +176,8 @@ def main():
     physical_device_prefixes = args.prefixes
     device_prefixes = args.prefixes + args.device_prefixes
 
-    entrypoints = get_entrypoints_from_xml(args.xml_files)
-
-    device_entrypoints = []
-    physical_device_entrypoints = []
-    instance_entrypoints = []
-    for e in entrypoints:
-        if e.is_device_entrypoint():
-            device_entrypoints.append(e)
-        elif e.is_physical_device_entrypoint():
-            physical_device_entrypoints.append(e)
-        else:
-            instance_entrypoints.append(e)
+    instance_entrypoints, physical_device_entrypoints, device_entrypoints = \
+        get_entrypoints_from_xml(args.xml_files)
 
     assert os.path.dirname(args.out_c) == os.path.dirname(args.out_h)
 